@@ -1,22 +1,33 @@
 """
 A2A Agent with Airport Knowledge Base functionality.
 """
-import uvicorn
+import os
+import sys
+
+from starlette.applications import Starlette
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.event_queue import create_queue_manager
+from common.metrics import add_metrics_route
+from common.serving import add_lifespan_hooks, parse_server_args, serve, shared_db_path
+from common.task_store import create_task_store
 from agent_executor import (
     AirportKnowledgeBaseAgentExecutor,
 )
 
 if __name__ == '__main__':
 
+    args = parse_server_args('Airport Knowledge Base Agent', default_port=9991)
+
     airport_knowledge_skill = AgentSkill(
         id='airport_knowledge_base',
         name='Airport Knowledge Base',
@@ -34,7 +45,7 @@ if __name__ == '__main__':
     public_agent_card = AgentCard(
         name='Airport Knowledge Base Agent',
         description='Knowledge base agent for retrieving correct airport names and city-airport mappings',
-        url='http://localhost:9991/',
+        url=f'http://localhost:{args.port}/',
         version='1.0.0',
         defaultInputModes=['text'],
         defaultOutputModes=['text'],
@@ -42,14 +53,36 @@ if __name__ == '__main__':
         skills=[airport_knowledge_skill],
     )
 
-    request_handler = DefaultRequestHandler(
-        agent_executor=AirportKnowledgeBaseAgentExecutor(),
-        task_store=InMemoryTaskStore(),
-    )
+    # Loaded before forking so every worker shares the airport DataFrames copy-on-write.
+    agent_executor = AirportKnowledgeBaseAgentExecutor()
 
-    server = A2AStarletteApplication(
-        agent_card=public_agent_card,
-        http_handler=request_handler,
-    )
+    def create_app() -> Starlette:
+        """Build one worker's app with its own task store, event queues and execution pool."""
+        task_store = create_task_store(
+            shared_db_path('TASK_STORE_PATH', 'airport-tasks.db', args.workers), shared=args.workers > 1
+        )
+        queue_manager = create_queue_manager()
+
+        request_handler = DefaultRequestHandler(
+            agent_executor=agent_executor,
+            task_store=task_store,
+            queue_manager=queue_manager,
+        )
+
+        server = A2AStarletteApplication(
+            agent_card=public_agent_card,
+            http_handler=request_handler,
+        )
+
+        app = server.build()
+        add_metrics_route(
+            app,
+            {'task_store': task_store, 'event_queues': queue_manager, 'execution': agent_executor.execution_policy},
+        )
+        shutdown_hooks = [agent_executor.execution_policy.shutdown]
+        if hasattr(task_store, 'aclose'):
+            shutdown_hooks.append(task_store.aclose)
+        add_lifespan_hooks(app, shutdown=shutdown_hooks)
+        return app
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9991)
+    serve(create_app, args.host, args.port, args.workers)
@@ -11,11 +11,32 @@ from a2a.server.tasks import TaskUpdater
 from a2a.utils import new_agent_text_message, new_task
 from a2a.types import Part, TextPart, TaskState, Task, Message, Role
 
+from common.execution import ExecutionMode, ExecutionPolicy, create_execution_policy
+
+
+# Knowledge base loaded once in each worker of a process pool execution policy.
+_process_agent = None
+
+
+def _init_process_agent() -> None:
+    global _process_agent
+    _process_agent = AirportKnowledgeBaseAgent()
+
+
+def _call_process_agent(method_name: str, *args):
+    return getattr(_process_agent, method_name)(*args)
+
+
 class AirportKnowledgeBaseAgent:
     """Agent that serves as a knowledge base for airport information, providing correct airport names and city-airport mappings."""
 
-    def __init__(self):
-        """Initialize the agent and load airport knowledge base."""
+    def __init__(self, execution_policy: ExecutionPolicy = None):
+        """Initialize the agent and load airport knowledge base.
+
+        Args:
+            execution_policy: Where the fuzzy matching runs (inline in the event loop by default)
+        """
+        self.execution_policy = execution_policy or ExecutionPolicy('airport', mode=ExecutionMode.inline)
         base_dir = os.path.dirname(os.path.dirname(__file__))
         airports_csv_path = os.path.join(base_dir, 'databases', 'airport-codes.csv')
         countries_csv_path = os.path.join(base_dir, 'databases', 'isocountry-codes.csv')
@@ -44,6 +65,66 @@ class AirportKnowledgeBaseAgent:
             self.airport_names = []
             self.municipalities = []
 
+    def match_airport_names(self, query: str) -> list:
+        """Top 5 airport names by fuzzy match score."""
+        return process.extract(query, self.airport_names, limit=5, scorer=fuzz.partial_ratio)
+
+    def match_municipalities(self, query: str) -> list:
+        """Top 5 municipalities by fuzzy match score."""
+        return process.extract(query, self.municipalities, limit=5, scorer=fuzz.partial_ratio)
+
+    async def _run(self, method_name: str, *args):
+        """Run one of the CPU-heavy lookup steps according to the execution policy."""
+        if self.execution_policy.mode == ExecutionMode.process:
+            return await self.execution_policy.run(_call_process_agent, method_name, *args)
+        return await self.execution_policy.run(getattr(self, method_name), *args)
+
+    def format_results(self, airport_matches: list, municipality_matches: list) -> str:
+        """Render the matched airports and cities with their country and IATA codes."""
+        result_lines = ""
+        
+        result_lines += "🛫 TOP 5 AIRPORT NAMES:\n"
+        for match_name, score in airport_matches:
+            airport_info = self.airport_knowledge[self.airport_knowledge['name'] == match_name].iloc[0]
+            country_name = self.country_dict.get(airport_info['iso_country'], airport_info['iso_country'])
+            result_lines += f"  • {match_name} ({score}% match)\n"
+            result_lines += f"    📍 {airport_info['municipality']}, {country_name}\n"
+            if pd.notna(airport_info['iata_code']):
+                result_lines += f"    ✈️ IATA: {airport_info['iata_code']}\n"
+            result_lines += "\n"
+        
+        result_lines += "🏙️ TOP 5 CITIES:\n"
+        processed_municipality_country = set()
+        city_results = []
+        
+        for match_municipality, score in municipality_matches:
+            city_airports = self.airport_knowledge[self.airport_knowledge['municipality'] == match_municipality]
+            
+            for country_code in city_airports['iso_country'].unique():
+                municipality_country_key = f"{match_municipality}_{country_code}"
+                if municipality_country_key not in processed_municipality_country:
+                    processed_municipality_country.add(municipality_country_key)
+                    country_airports = city_airports[city_airports['iso_country'] == country_code]
+                    country_name = self.country_dict.get(country_code, country_code)
+                    
+                    city_results.append({
+                        'municipality': match_municipality,
+                        'country': country_name,
+                        'score': score,
+                        'airports': country_airports
+                    })
+        
+        for _, city_result in enumerate(city_results[:5]):
+            result_lines += f"  • {city_result['municipality']}, {city_result['country']} ({city_result['score']}% match)\n"
+            result_lines += "    ✈️ Airports:\n"
+            
+            airport_info = [(row['name'], row['iata_code']) for _, row in city_result['airports'].iterrows()]
+            unique_airports = set(airport_info)
+            for airport_name, iata_code in sorted(unique_airports):
+                result_lines += f"     - (IATA: {iata_code}) {airport_name}\n"
+            result_lines += "\n"
+        return result_lines
+
     async def invoke(self, task: Task, updater: TaskUpdater, query: str = None) -> None:
         """
         Retrieve airport information using fuzzy matching by name and municipality.
@@ -87,7 +168,7 @@ class AirportKnowledgeBaseAgent:
                 ),
             )
             
-            airport_matches = process.extract(query, self.airport_names, limit=5, scorer=fuzz.partial_ratio)
+            airport_matches = await self._run('match_airport_names', query)
             
             await updater.update_status(
                 TaskState.working,
@@ -98,7 +179,7 @@ class AirportKnowledgeBaseAgent:
                 ),
             )
             
-            municipality_matches = process.extract(query, self.municipalities, limit=5, scorer=fuzz.partial_ratio)
+            municipality_matches = await self._run('match_municipalities', query)
             
             await updater.update_status(
                 TaskState.working,
@@ -109,49 +190,8 @@ class AirportKnowledgeBaseAgent:
                 ),
             )
             
-            result_lines = ""
-            
-            result_lines += "🛫 TOP 5 AIRPORT NAMES:\n"
-            for match_name, score in airport_matches:
-                airport_info = self.airport_knowledge[self.airport_knowledge['name'] == match_name].iloc[0]
-                country_name = self.country_dict.get(airport_info['iso_country'], airport_info['iso_country'])
-                result_lines += f"  • {match_name} ({score}% match)\n"
-                result_lines += f"    📍 {airport_info['municipality']}, {country_name}\n"
-                if pd.notna(airport_info['iata_code']):
-                    result_lines += f"    ✈️ IATA: {airport_info['iata_code']}\n"
-                result_lines += "\n"
-            
-            result_lines += "🏙️ TOP 5 CITIES:\n"
-            processed_municipality_country = set()
-            city_results = []
-            
-            for match_municipality, score in municipality_matches:
-                city_airports = self.airport_knowledge[self.airport_knowledge['municipality'] == match_municipality]
-                
-                for country_code in city_airports['iso_country'].unique():
-                    municipality_country_key = f"{match_municipality}_{country_code}"
-                    if municipality_country_key not in processed_municipality_country:
-                        processed_municipality_country.add(municipality_country_key)
-                        country_airports = city_airports[city_airports['iso_country'] == country_code]
-                        country_name = self.country_dict.get(country_code, country_code)
-                        
-                        city_results.append({
-                            'municipality': match_municipality,
-                            'country': country_name,
-                            'score': score,
-                            'airports': country_airports
-                        })
-            
-            for _, city_result in enumerate(city_results[:5]):
-                result_lines += f"  • {city_result['municipality']}, {city_result['country']} ({city_result['score']}% match)\n"
-                result_lines += "    ✈️ Airports:\n"
-                
-                airport_info = [(row['name'], row['iata_code']) for _, row in city_result['airports'].iterrows()]
-                unique_airports = set(airport_info)
-                for airport_name, iata_code in sorted(unique_airports):
-                    result_lines += f"     - (IATA: {iata_code}) {airport_name}\n"
-                result_lines += "\n"
-            
+            result_lines = await self._run('format_results', airport_matches, municipality_matches)
+
             await updater.update_status(
                 TaskState.working,
                 new_agent_text_message(
@@ -183,10 +223,17 @@ class AirportKnowledgeBaseAgent:
             )
 
 class AirportKnowledgeBaseAgentExecutor(AgentExecutor):
-    """Airport knowledge base agent executor."""
+    """Airport knowledge base agent executor.
+
+    The fuzzy matching runs in the pool configured by AIRPORT_EXECUTION_MODE,
+    AIRPORT_EXECUTION_WORKERS and AIRPORT_MAX_CONCURRENCY (thread pool by default).
+    """
 
-    def __init__(self):
-        self.agent = AirportKnowledgeBaseAgent()
+    def __init__(self, execution_policy: ExecutionPolicy = None):
+        self.execution_policy = execution_policy or create_execution_policy(
+            'airport', 'AIRPORT', initializer=_init_process_agent
+        )
+        self.agent = AirportKnowledgeBaseAgent(execution_policy=self.execution_policy)
 
     async def execute(
         self,
@@ -7,27 +7,34 @@ import asyncio
 import json
 import logging
 import os
-import select
+import re
 import sys
 import threading
+import time
 import uvicorn
-from datetime import datetime
-from queue import Queue
-from typing import Any, Dict, List, Optional
+import weakref
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 from uuid import uuid4
 
 import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from langchain_anthropic import ChatAnthropic
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+from langgraph.prebuilt import ToolNode, create_react_agent
+from langgraph.prebuilt.tool_node import ToolCallRequest
 
 from a2a.client import A2ACardResolver, A2AClient
 from a2a.types import (
     AgentCard,
+    CancelTaskRequest,
     MessageSendParams,
     SendMessageRequest,
     SendStreamingMessageRequest,
@@ -42,14 +49,171 @@ from a2a.types import (
     TaskIdParams,
     MessageSendConfiguration,
     GetTaskRequest,
+    JSONRPCErrorResponse,
     Task,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
 )
 
+from common.checkpointer import create_checkpointer
+from common.prompt_cache import PromptCacheUsage, cache_tool_definitions, cached_prompt
+from common.push_payload import PushPayloadError, loads, read_flight_search_payload
+
 load_dotenv()
 
 FLIGHTS_ENDPOINT_PATH = "/api/flights-findings"
 HTTP_SERVER_PORT = 9990
 
+# Only final states are useful to the flights webhook, and it only reads the last history message.
+FLIGHT_SEARCH_PUSH_FILTER = {"states": ["completed", "failed"], "history": "last"}
+
+# Connection pool and timeout settings for each agent's HTTP client; a registry entry can override any of them
+# under "http". Streaming calls (SSE) wait on the agent between events, so they get a longer read timeout.
+DEFAULT_AGENT_HTTP_SETTINGS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+    "http2": False,
+    "connect_timeout": 5.0,
+    "unary_timeout": 30.0,
+    "stream_timeout": 300.0,
+    "discovery_timeout": 3.0,
+}
+
+# Seconds between background agent card refreshes (0 disables them).
+AGENT_HEALTH_CHECK_INTERVAL = float(os.getenv("AGENT_HEALTH_CHECK_INTERVAL", "15"))
+
+# Workers processing push-delivered messages, and the cap on LLM calls running at once (console included).
+EXTERNAL_MESSAGE_WORKERS = int(os.getenv("EXTERNAL_MESSAGE_WORKERS", "4"))
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "4"))
+
+# Tool calls the model makes in one turn run concurrently, at most this many at a time.
+MAX_PARALLEL_TOOL_CALLS = int(os.getenv("MAX_PARALLEL_TOOL_CALLS", "4"))
+
+# Approximate token budget for the conversation history sent to the model, and the size above which a message from
+# an earlier turn (flight JSON dumps, knowledge base listings) is replaced by a short reference.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "12000"))
+HISTORY_REFERENCE_TOKENS = int(os.getenv("HISTORY_REFERENCE_TOKENS", "400"))
+
+# Flight searches stream in the background until their results are pushed back: at most FLIGHT_SEARCH_MAX_IN_FLIGHT
+# run at once, up to FLIGHT_SEARCH_MAX_QUEUED more wait for a slot, and each is cancelled after FLIGHT_SEARCH_DEADLINE
+# seconds of running.
+FLIGHT_SEARCH_MAX_IN_FLIGHT = int(os.getenv("FLIGHT_SEARCH_MAX_IN_FLIGHT", "4"))
+FLIGHT_SEARCH_MAX_QUEUED = int(os.getenv("FLIGHT_SEARCH_MAX_QUEUED", "16"))
+FLIGHT_SEARCH_DEADLINE = float(os.getenv("FLIGHT_SEARCH_DEADLINE", "300"))
+
+# Seconds a tool result is reused for the same (normalized) query; 0 disables caching for that tool. Airport data
+# rarely changes, employee request status does, and flight search results arrive by push, so they are never cached.
+TOOL_CACHE_TTLS = {
+    "airport_knowledge_base": float(os.getenv("TOOL_CACHE_TTL_AIRPORT", "3600")),
+    "employee_flight_requests": float(os.getenv("TOOL_CACHE_TTL_EMPLOYEE", "30")),
+    "flight_search": 0,
+}
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256"))
+
+# Answer well-formed chat commands by calling their tool directly, without the LLM.
+INTENT_ROUTER_ENABLED = os.getenv("CHAT_INTENT_ROUTER", "true").lower() in ("1", "true", "yes")
+
+# Render console replies token by token as the model generates them, instead of once each graph step completes.
+STREAM_TOKENS = os.getenv("CHAT_STREAM_TOKENS", "true").lower() in ("1", "true", "yes")
+
+
+def http2_available() -> bool:
+    """Whether the optional h2 package needed by httpx for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_agent_http_client(settings: Dict[str, Any]) -> httpx.AsyncClient:
+    """Create a pooled, keep-alive HTTP client for one A2A agent."""
+    http2 = settings["http2"] and http2_available()
+    if settings["http2"] and not http2:
+        print("⚠️  HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(settings["unary_timeout"], connect=settings["connect_timeout"]),
+    )
+
+def report_tool_progress(tool_name: str, message: str):
+    """Emit a tool progress event on the graph's custom stream, or print it when called outside a graph run."""
+    try:
+        writer = get_stream_writer()
+    except (RuntimeError, KeyError):
+        # Outside any runnable, or in a tool invoked directly rather than by the graph.
+        print(message)
+        return
+    writer({"tool": tool_name, "message": message})
+
+
+def render_tool_progress(event: Any):
+    """Print a tool progress event received from the graph's custom stream."""
+    if isinstance(event, dict) and "message" in event:
+        print(f"\n{event['message']}", flush=True)
+    else:
+        print(f"\n{event}", flush=True)
+
+
+# A2A responses and stream events are read through these accessors, straight off the pydantic objects: dumping every
+# event to a dict just to read its state and text costs more than the rest of the handling.
+A2AEvent = Union[Task, Message, TaskStatusUpdateEvent, TaskArtifactUpdateEvent]
+
+
+def a2a_event(response: Any) -> Optional[A2AEvent]:
+    """Task, message or update event carried by an A2A response or stream chunk, or None for an error response."""
+    root = getattr(response, "root", response)
+    if isinstance(root, JSONRPCErrorResponse):
+        return None
+    return getattr(root, "result", None)
+
+
+def a2a_error(response: Any) -> str:
+    """Error message of an A2A error response."""
+    error = getattr(getattr(response, "root", response), "error", None)
+    return getattr(error, "message", None) or "unknown error"
+
+
+def a2a_event_state(event: Optional[A2AEvent]) -> Optional[TaskState]:
+    """Task state reported by the event; None for messages and artifact updates."""
+    status = getattr(event, "status", None)
+    return status.state if status is not None else None
+
+
+def a2a_parts_text(parts: Optional[List[Any]]) -> str:
+    return "\n".join(part.root.text for part in parts or [] if isinstance(part.root, TextPart))
+
+
+def a2a_event_text(event: Optional[A2AEvent]) -> str:
+    """Text parts of the event: a message's parts, an update's artifact, or a task's status message."""
+    if isinstance(event, Message):
+        return a2a_parts_text(event.parts)
+    if isinstance(event, TaskArtifactUpdateEvent):
+        return a2a_parts_text(event.artifact.parts)
+    status = getattr(event, "status", None)
+    if status is not None and status.message is not None:
+        return a2a_parts_text(status.message.parts)
+    if isinstance(event, Task) and event.artifacts:
+        return a2a_parts_text(event.artifacts[-1].parts)
+    return ""
+
+
+def a2a_response_text(response: Any, agent_name: str) -> str:
+    """Text of a send_message reply, or an error message the tool can return as is."""
+    event = a2a_event(response)
+    if event is None:
+        return f"❌ Error from {agent_name}: {a2a_error(response)}"
+    if a2a_event_state(event) in (TaskState.failed, TaskState.rejected):
+        return f"❌ {agent_name} failed: {a2a_event_text(event)}"
+    return a2a_event_text(event)
+
+
 class InternalMessage:
     """Internal message class for queue processing."""
     def __init__(self, user_input: str, thread_id: str, source: str, timestamp: str, metadata: Optional[Dict[str, Any]] = None):
@@ -70,6 +234,7 @@ class A2AAgentRegistry:
                 "description": "Knowledge base for airport information and city-airport mappings",
                 "base_url": "http://localhost:9991",
                 "capabilities": ["airport_lookup", "city_airport_mapping"],
+                "http": {"max_connections": 10, "max_keepalive_connections": 5},
                 "card": None,
                 "client": None
             },
@@ -78,6 +243,7 @@ class A2AAgentRegistry:
                 "description": "Check employee flight requests and booking status",
                 "base_url": "http://localhost:9992",
                 "capabilities": ["flight_request_check", "booking_lookup"],
+                "http": {"max_connections": 10, "max_keepalive_connections": 5, "unary_timeout": 15.0},
                 "card": None,
                 "client": None
             },
@@ -86,36 +252,93 @@ class A2AAgentRegistry:
                 "description": "Scheduled flight search using Aviation Stack",
                 "base_url": "http://localhost:9993",
                 "capabilities": ["flight_search"],
+                "http": {"max_connections": 50, "max_keepalive_connections": 10, "stream_timeout": 600.0},
                 "card": None,
                 "client": None
             }
         }
+        for agent_info in self.agents.values():
+            agent_info["http"] = {**DEFAULT_AGENT_HTTP_SETTINGS, **agent_info.get("http", {})}
+            agent_info["http_client"] = None
+            agent_info["status"] = "unknown"
+            agent_info["last_checked"] = None
+        self._health_task: Optional[asyncio.Task] = None
+    
+    async def initialize_agents(self):
+        """Resolve every agent card concurrently and create A2A clients, each with its own connection pool."""
+        await asyncio.gather(*(self._refresh_agent(agent_info) for agent_info in self.agents.values()))
     
-    async def initialize_agents(self, httpx_client: httpx.AsyncClient):
-        """Initialize A2A clients for all registered agents."""
-        for _, agent_info in self.agents.items():
+    async def _refresh_agent(self, agent_info: Dict[str, Any]):
+        """Re-resolve one agent card, marking the agent up or down and swapping in a new client if the card changed."""
+        try:
+            if agent_info["http_client"] is None:
+                agent_info["http_client"] = build_agent_http_client(agent_info["http"])
+            httpx_client = agent_info["http_client"]
+            resolver = A2ACardResolver(
+                httpx_client=httpx_client,
+                base_url=agent_info["base_url"]
+            )
+            
             try:
-                resolver = A2ACardResolver(
-                    httpx_client=httpx_client,
-                    base_url=agent_info["base_url"]
+                card: AgentCard = await asyncio.wait_for(
+                    resolver.get_agent_card(), agent_info["http"]["discovery_timeout"]
                 )
-                
-                try:
-                    card: AgentCard = await resolver.get_agent_card()
-                    client = A2AClient(httpx_client=httpx_client, agent_card=card)
-                    
-                    agent_info["card"] = card
-                    agent_info["client"] = client
-                    print(f"✅ Initialized {agent_info['name']} at {agent_info['base_url']}")
-                    print(f"   📝 Description: {agent_info['description']}")
-                    
-                except Exception as e:
-                    print(f"⚠️  Could not connect to {agent_info['name']} at {agent_info['base_url']}: {e}")
-                    agent_info["card"] = None
-                    agent_info["client"] = None
-                    
             except Exception as e:
-                print(f"❌ Failed to initialize {agent_info['name']}: {e}")
+                if agent_info["status"] != "down":
+                    print(f"⚠️  Could not connect to {agent_info['name']} at {agent_info['base_url']}: {str(e) or type(e).__name__}")
+                agent_info["status"] = "down"
+                agent_info["card"] = None
+                agent_info["client"] = None
+                return
+            finally:
+                agent_info["last_checked"] = datetime.now().isoformat()
+            
+            if agent_info["client"] is None or card != agent_info["card"]:
+                agent_info["client"] = A2AClient(httpx_client=httpx_client, agent_card=card)
+                agent_info["card"] = card
+            if agent_info["status"] != "up":
+                agent_info["status"] = "up"
+                print(f"✅ Initialized {agent_info['name']} at {agent_info['base_url']}")
+                print(f"   📝 Description: {agent_info['description']}")
+                
+        except Exception as e:
+            print(f"❌ Failed to initialize {agent_info['name']}: {e}")
+    
+    def start_health_checks(self, interval: float = AGENT_HEALTH_CHECK_INTERVAL):
+        """Periodically re-resolve agent cards in the background so agents that start late or restart are picked up."""
+        if interval > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop(interval), name="agent-health-checks")
+    
+    async def _health_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.initialize_agents()
+    
+    def agent_statuses(self) -> Dict[str, Dict[str, Any]]:
+        """Up/down status of every registered agent and when it was last checked."""
+        return {
+            agent_id: {"status": info["status"], "last_checked": info["last_checked"]}
+            for agent_id, info in self.agents.items()
+        }
+    
+    @staticmethod
+    def http_kwargs(agent_info: Dict[str, Any], streaming: bool = False) -> Dict[str, Any]:
+        """Per-call httpx options with the agent's unary or streaming timeout profile."""
+        settings = agent_info["http"]
+        read_timeout = settings["stream_timeout"] if streaming else settings["unary_timeout"]
+        return {"timeout": httpx.Timeout(read_timeout, connect=settings["connect_timeout"])}
+    
+    async def aclose(self):
+        """Stop the health checks and close every agent's HTTP client."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for agent_info in self.agents.values():
+            if agent_info["http_client"] is not None:
+                await agent_info["http_client"].aclose()
+                agent_info["http_client"] = None
+                agent_info["client"] = None
     
     def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Get agent info by ID."""
@@ -129,6 +352,97 @@ class A2AAgentRegistry:
         ]
 
 
+class ToolResultCache:
+    """Cache of A2A tool results shared by the chat agent's tools, keyed by tool name and normalized query.
+    
+    Entries expire after the tool's TTL, tools without a TTL are not cached, and the least recently used entries are
+    evicted beyond max_entries. Concurrent calls for the same key share a single A2A request, run in its own task so
+    that cancelling the call that started it does not cancel it for the others. Errors are not cached.
+    """
+    
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 256):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+    
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+    
+    @staticmethod
+    def is_cacheable(result: Any) -> bool:
+        if isinstance(result, str):
+            return not result.startswith("❌")
+        return not isinstance(getattr(result, "root", None), JSONRPCErrorResponse)
+    
+    def _count(self, tool_name: str, counter: str):
+        counters = self._counters.setdefault(tool_name, {"hits": 0, "shared": 0, "misses": 0})
+        counters[counter] += 1
+    
+    async def get_or_call(self, tool_name: str, query: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached result for the query, or call the agent and cache what it returns."""
+        ttl = self.ttls.get(tool_name, 0)
+        if ttl <= 0:
+            return await call()
+        
+        key = (tool_name, self.normalize(query))
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(tool_name, "hits")
+                return result
+            del self._entries[key]
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self._count(tool_name, "shared")
+        else:
+            self._count(tool_name, "misses")
+            in_flight = asyncio.ensure_future(call())
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda task: self._store(key, ttl, task))
+        # Shielded: a cancelled caller stops waiting, the shared request keeps running for the others.
+        return await asyncio.shield(in_flight)
+    
+    def _store(self, key: tuple, ttl: float, task: asyncio.Task):
+        """Cache the result of a finished shared request, unless it failed or returned an error."""
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if self.is_cacheable(result):
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, tool_name: str):
+        """Drop every cached result of a tool, e.g. after a change its results depend on."""
+        for key in [key for key in self._entries if key[0] == tool_name]:
+            del self._entries[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of entries and per-tool hit rates (calls sharing an in-flight request count as hits)."""
+        tools = {}
+        for tool_name, counters in self._counters.items():
+            calls = counters["hits"] + counters["shared"] + counters["misses"]
+            tools[tool_name] = {
+                **counters,
+                "ttl": self.ttls.get(tool_name, 0),
+                "hit_rate": round((counters["hits"] + counters["shared"]) / calls, 3) if calls else 0.0,
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "in_flight": len(self._in_flight),
+            "tools": tools,
+        }
+
+
 class AirportKnowledgeTool(BaseTool):
     """
     Tool to retrieve airport information from the knowledge base.
@@ -142,12 +456,19 @@ class AirportKnowledgeTool(BaseTool):
     name: str = "airport_knowledge_base"
     description: str = "Retrieve airport information from knowledge base. Use this when users ask about airport names or airports in specific cities."
     agent_registry: A2AAgentRegistry = None
+    result_cache: Optional[ToolResultCache] = None
     return_direct: bool = False
     
-    def __init__(self, agent_registry: A2AAgentRegistry):
-        super().__init__(agent_registry=agent_registry)
+    def __init__(self, agent_registry: A2AAgentRegistry, result_cache: Optional[ToolResultCache] = None):
+        super().__init__(agent_registry=agent_registry, result_cache=result_cache)
     
     async def _arun(self, query: str) -> str:
+        """Return the cached result for the query, or call the airport knowledge base agent."""
+        if self.result_cache is None:
+            return await self._call_agent(query)
+        return await self.result_cache.get_or_call(self.name, query, lambda: self._call_agent(query))
+    
+    async def _call_agent(self, query: str) -> str:
         """Async implementation to call the airport knowledge base agent."""
         agent_info = self.agent_registry.get_agent("airport_knowledge_base")
         
@@ -168,18 +489,26 @@ class AirportKnowledgeTool(BaseTool):
             )
             
             client = agent_info["client"]
-            stream_response = client.send_message_streaming(streaming_request)
+            stream_response = client.send_message_streaming(
+                streaming_request, http_kwargs=self.agent_registry.http_kwargs(agent_info, streaming=True)
+            )
             
             full_response = ""
-            print(f"\n📚 Looking up airport information for: {query}")
+            report_tool_progress(self.name, f"📚 Looking up airport information for: {query}")
             
             async for chunk in stream_response:
-                json_chunk = chunk.model_dump(mode='json', exclude_none=True)
-                if json_chunk['result']['status']['state'] == TaskState.completed:
-                    full_response = f"\n✅ Knowledge base lookup completed\n{json_chunk['result']['status']['message']['parts'][0]['text']}\n"
+                event = a2a_event(chunk)
+                if event is None:
+                    return f"❌ Error from airport knowledge base agent: {a2a_error(chunk)}"
+                state = a2a_event_state(event)
+                text = a2a_event_text(event)
+                if state == TaskState.completed or isinstance(event, Message):
+                    full_response = f"\n✅ Knowledge base lookup completed\n{text}\n"
                     break
-                else:
-                    print(f"📨 {json_chunk['result']['status']['message']['parts'][0]['text']}\n")
+                if state == TaskState.failed:
+                    return f"❌ Airport knowledge base lookup failed: {text}"
+                if text:
+                    report_tool_progress(self.name, f"📨 {text}")
             
             return full_response if full_response else "✅ Knowledge base lookup completed - check the streaming output above."
             
@@ -205,11 +534,18 @@ class EmployeeFlightRequestTool(BaseTool):
     name: str = "employee_flight_requests"
     description: str = "Check employee flight requests, bookings, or request status. Use when users ask about their flight requests or bookings."
     agent_registry: A2AAgentRegistry = None
+    result_cache: Optional[ToolResultCache] = None
     
-    def __init__(self, agent_registry: A2AAgentRegistry):
-        super().__init__(agent_registry=agent_registry)
+    def __init__(self, agent_registry: A2AAgentRegistry, result_cache: Optional[ToolResultCache] = None):
+        super().__init__(agent_registry=agent_registry, result_cache=result_cache)
     
     async def _arun(self, query: str) -> str:
+        """Return the cached result for the query, or call the employee flight request agent."""
+        if self.result_cache is None:
+            return await self._call_agent(query)
+        return await self.result_cache.get_or_call(self.name, query, lambda: self._call_agent(query))
+    
+    async def _call_agent(self, query: str) -> str:
         """Async implementation to call the employee flight request agent."""
         agent_info = self.agent_registry.get_agent("employee_flight_requests")
         
@@ -231,9 +567,10 @@ class EmployeeFlightRequestTool(BaseTool):
                 params=send_message_payload,
             )
             
-            print(f"\n📋 Checking flight requests for: {query}")
+            report_tool_progress(self.name, f"📋 Checking flight requests for: {query}")
             client = agent_info["client"]
-            return await client.send_message(request)
+            response = await client.send_message(request, http_kwargs=self.agent_registry.http_kwargs(agent_info))
+            return a2a_response_text(response, "employee flight request agent")
             
         except Exception as e:
             return f"❌ Error calling employee flight request agent: {str(e)}"
@@ -243,6 +580,221 @@ class EmployeeFlightRequestTool(BaseTool):
         return asyncio.run(self._arun(query))
 
 
+class EmployeeFlightBookingInput(BaseModel):
+    """Arguments for attaching a flight to an employee flight request."""
+    request_id: int = Field(description="Id of the employee flight request (shown as 'Request: #<id>')")
+    expected_version: int = Field(description="Version of the request the booking is based on (shown next to the request id)")
+    flight: str = Field(default="", description="Flight number to book, e.g. 'EI155'. Required unless action is 'cancel'")
+    seat: str = Field(default="", description="Seat assigned, if known")
+    gate: str = Field(default="", description="Departure gate, if known")
+    action: str = Field(default="book", description="'book' to attach the flight, 'cancel' to move the request back to pending")
+
+
+class EmployeeFlightBookingTool(BaseTool):
+    """
+    Tool to attach a found flight to an employee flight request.
+
+    This tool must be used when users want to book a flight for a pending request or cancel an existing booking.
+
+    The update only succeeds if the request still has the expected version; otherwise the tool returns a conflict
+    with the current version so the request can be re-checked. Each call carries an idempotency key so retries
+    do not book twice.
+    """
+    
+    name: str = "employee_flight_booking"
+    description: str = "Book a flight for an employee flight request (or cancel a booking). Requires the request id and its current version from employee_flight_requests."
+    args_schema: type[BaseModel] = EmployeeFlightBookingInput
+    agent_registry: A2AAgentRegistry = None
+    result_cache: Optional[ToolResultCache] = None
+    
+    def __init__(self, agent_registry: A2AAgentRegistry, result_cache: Optional[ToolResultCache] = None):
+        super().__init__(agent_registry=agent_registry, result_cache=result_cache)
+    
+    async def _arun(self, request_id: int, expected_version: int, flight: str = "", seat: str = "", gate: str = "", action: str = "book") -> str:
+        """Async implementation to send a booking update to the employee flight request agent."""
+        agent_info = self.agent_registry.get_agent("employee_flight_requests")
+        
+        if not agent_info or not agent_info["client"]:
+            return "❌ Employee flight request agent is not available. Please check if the service is running."
+        
+        try:
+            command = {
+                "action": action,
+                "request_id": request_id,
+                "flight": flight,
+                "seat": seat,
+                "gate": gate,
+                "expected_version": expected_version,
+                "idempotency_key": f"{request_id}:{expected_version}:{action}:{flight.upper()}",
+            }
+            part = TextPart(text=json.dumps(command))
+            message = Message(
+                role=Role.user,
+                parts=[part],
+                messageId=str(uuid4()),
+            )
+            
+            request = SendMessageRequest(
+                id=str(uuid4()), 
+                params=MessageSendParams(message=message),
+            )
+            
+            report_tool_progress(self.name, f"📝 Updating booking for request #{request_id}: {action} {flight}")
+            client = agent_info["client"]
+            response = await client.send_message(request, http_kwargs=self.agent_registry.http_kwargs(agent_info))
+            if self.result_cache is not None:
+                # Cached request listings no longer show the current status and version.
+                self.result_cache.invalidate("employee_flight_requests")
+            return a2a_response_text(response, "employee flight request agent")
+            
+        except Exception as e:
+            return f"❌ Error calling employee flight request agent: {str(e)}"
+    
+    def _run(self, request_id: int, expected_version: int, flight: str = "", seat: str = "", gate: str = "", action: str = "book") -> str:
+        """Sync wrapper (not used in async context)."""
+        return asyncio.run(self._arun(request_id, expected_version, flight, seat, gate, action))
+
+
+class SupervisorFullError(Exception):
+    """Raised when a job is submitted while the supervisor's queue is full."""
+
+
+class BackgroundJob:
+    """A supervised background job, identified by the A2A task id it works on."""
+    
+    def __init__(self, job_id: str, description: str, deadline: float):
+        self.job_id = job_id
+        self.description = description
+        self.deadline = deadline
+        self.state = "queued"
+        self.remote_id: Optional[str] = None
+        self.remote_state: Optional[str] = None
+        self.notified_state: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+    
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished_at or time.monotonic()
+        return {
+            "task_id": self.remote_id or self.job_id,
+            "description": self.description,
+            "state": self.state,
+            "remote_state": self.remote_state,
+            "notified_state": self.notified_state,
+            "age_s": round(end - self.submitted_at, 1),
+            "running_s": round(end - self.started_at, 1) if self.started_at else 0.0,
+            "error": self.error,
+        }
+
+
+class BackgroundTaskSupervisor:
+    """Runs fire-and-forget jobs as tracked asyncio tasks.
+    
+    Keeps a reference to every job until it ends, so none is garbage-collected mid-flight. At most max_in_flight jobs
+    run at once and up to max_queued more wait for a slot; further submissions are rejected. A job still running after
+    its deadline is cancelled. Jobs are keyed by the A2A task id they work on, so push notifications can be matched to
+    them, and the last few finished jobs are kept with how they ended.
+    """
+    
+    def __init__(self, name: str, max_in_flight: int = 4, max_queued: int = 16, deadline: float = 300.0,
+                 max_finished: int = 20):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.deadline = deadline
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.jobs: Dict[str, BackgroundJob] = {}
+        self.finished: deque = deque(maxlen=max_finished)
+        self.counters = {"completed": 0, "failed": 0, "cancelled": 0, "timed_out": 0, "rejected": 0}
+    
+    def queued(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.state == "queued")
+    
+    def submit(self, job_id: str, description: str, work: Callable[[BackgroundJob], Awaitable[Any]],
+               deadline: Optional[float] = None) -> BackgroundJob:
+        """Start work(job) as soon as a slot is free; raises SupervisorFullError if too many jobs are waiting."""
+        if len(self.jobs) >= self.max_in_flight + self.max_queued:
+            self.counters["rejected"] += 1
+            raise SupervisorFullError(f"{len(self.jobs)} {self.name} jobs are already in progress")
+        job = BackgroundJob(job_id, description, deadline or self.deadline)
+        self.jobs[job_id] = job
+        job.task = asyncio.create_task(self._run(job, work), name=f"{self.name}-{job_id}")
+        job.task.add_done_callback(lambda task: self._finish(job))
+        return job
+    
+    async def _run(self, job: BackgroundJob, work: Callable[[BackgroundJob], Awaitable[Any]]):
+        try:
+            async with self._semaphore:
+                job.state = "running"
+                job.started_at = time.monotonic()
+                await asyncio.wait_for(work(job), job.deadline)
+            job.state = "completed"
+        except asyncio.TimeoutError:
+            job.state = "timed_out"
+            job.error = f"deadline of {job.deadline:g}s exceeded"
+            print(f"⏰ {self.name} {job.job_id} cancelled after {job.deadline:g}s")
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e) or type(e).__name__
+            print(f"❌ {self.name} {job.job_id} failed: {e}")
+    
+    def _finish(self, job: BackgroundJob):
+        # A done callback rather than a finally clause, so jobs cancelled before they start are also recorded.
+        if job.state in ("queued", "running"):
+            job.state = "cancelled"
+        job.finished_at = time.monotonic()
+        self.counters[job.state] += 1
+        self.jobs.pop(job.job_id, None)
+        self.finished.append(job)
+    
+    def find(self, task_id: str) -> Optional[BackgroundJob]:
+        """Job working on the A2A task, whether still in progress or recently finished."""
+        for job in [*self.jobs.values(), *reversed(self.finished)]:
+            if task_id in (job.job_id, job.remote_id):
+                return job
+        return None
+    
+    def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running job; False if there is none for the task."""
+        job = self.find(task_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+    
+    def notify(self, task_id: str, state: str) -> Optional[BackgroundJob]:
+        """Record a push notification received for the job's task."""
+        job = self.find(task_id)
+        if job is not None:
+            job.notified_state = state
+        return job
+    
+    async def aclose(self):
+        """Cancel every job and wait for them to end."""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return limits, outcome counters, and the jobs in progress and recently finished with their ages."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "deadline_s": self.deadline,
+            "running": sum(1 for job in self.jobs.values() if job.state == "running"),
+            "queued": self.queued(),
+            **self.counters,
+            "in_progress": [job.summary() for job in self.jobs.values()],
+            "recent": [job.summary() for job in reversed(self.finished)],
+        }
+
+
 class FlightSearchTool(BaseTool):
     """
     Tool to search for flights using scheduled flights data.
@@ -256,58 +808,99 @@ class FlightSearchTool(BaseTool):
     name: str = "flight_search"
     description: str = "Search for scheduled flights by airport IATA code and date. Use when users want to find flights or check flight availability."
     agent_registry: A2AAgentRegistry = None
+    result_cache: Optional[ToolResultCache] = None
+    search_supervisor: Optional[BackgroundTaskSupervisor] = None
     flight_search_callback_url: str = f"http://localhost:{HTTP_SERVER_PORT}{FLIGHTS_ENDPOINT_PATH}"  # TODO: do not hardcode the callback URL
 
-    def __init__(self, agent_registry: A2AAgentRegistry):
-        super().__init__(agent_registry=agent_registry)
+    def __init__(self, agent_registry: A2AAgentRegistry, result_cache: Optional[ToolResultCache] = None,
+                 search_supervisor: Optional[BackgroundTaskSupervisor] = None):
+        super().__init__(
+            agent_registry=agent_registry,
+            result_cache=result_cache,
+            search_supervisor=search_supervisor or BackgroundTaskSupervisor(
+                "flight search", FLIGHT_SEARCH_MAX_IN_FLIGHT, FLIGHT_SEARCH_MAX_QUEUED, FLIGHT_SEARCH_DEADLINE
+            )
+        )
     
     async def _arun(self, query: str) -> str:
+        """Return the cached result for the query, or call the flight search agent."""
+        if self.result_cache is None:
+            return await self._call_agent(query)
+        return await self.result_cache.get_or_call(self.name, query, lambda: self._call_agent(query))
+    
+    async def _call_agent(self, query: str) -> str:
         """Async implementation to call the flight search agent."""
         agent_info = self.agent_registry.get_agent("flight_search")
         
         if not agent_info or not agent_info["client"]:
             return "❌ Flight search agent is not available. Please check if the service is running."
         
-        async def async_search():
-            """Execute flight search asynchronously."""
-            try:
-                client: A2AClient = agent_info["client"]
-                
-                part = TextPart(text=query)
-                message = Message(
-                    role=Role.user,
-                    parts=[part],
-                    messageId=str(uuid4()),
-                    contextId=str(uuid4()),
-                    taskId=str(uuid4())
-                )
-                
-                request = SendStreamingMessageRequest(
-                    id=str(uuid4()),
-                    params=MessageSendParams(
-                        message=message,
-                        configuration=MessageSendConfiguration(
-                            acceptedOutputModes=["text"],
-                            pushNotificationConfig=PushNotificationConfig(
-                                url=self.flight_search_callback_url
-                            )
+        client: A2AClient = agent_info["client"]
+        task_id = str(uuid4())
+        
+        async def search(job: BackgroundJob):
+            """Stream the search until the flight search agent finishes it; the results come by push notification."""
+            message = Message(
+                role=Role.user,
+                parts=[TextPart(text=query)],
+                messageId=str(uuid4()),
+                contextId=str(uuid4()),
+                taskId=task_id
+            )
+            
+            request = SendStreamingMessageRequest(
+                id=str(uuid4()),
+                params=MessageSendParams(
+                    message=message,
+                    configuration=MessageSendConfiguration(
+                        acceptedOutputModes=["text"],
+                        pushNotificationConfig=PushNotificationConfig(
+                            url=self.flight_search_callback_url
                         )
-                    )
+                    ),
+                    metadata={"pushNotificationFilter": FLIGHT_SEARCH_PUSH_FILTER}
                 )
-                
-                response = client.send_message_streaming(request=request)
-                
+            )
+            
+            response = client.send_message_streaming(
+                request=request, http_kwargs=self.agent_registry.http_kwargs(agent_info, streaming=True)
+            )
+            
+            try:
                 async for chunk in response:
-                    pass
-                    
-            except Exception as e:
-                print(f"❌ Error in background flight search: {str(e)}")
+                    event = a2a_event(chunk)
+                    if event is None:
+                        raise RuntimeError(a2a_error(chunk))
+                    if isinstance(event, Task):
+                        job.remote_id = event.id
+                    state = a2a_event_state(event)
+                    if state is not None:
+                        job.remote_state = state.value
+            except asyncio.CancelledError:
+                # Cancelled or past its deadline: also stop the search on the flight search agent.
+                await self.cancel_remote_search(agent_info, job.remote_id or task_id)
+                raise
         
-        asyncio.create_task(async_search())
+        try:
+            job = self.search_supervisor.submit(task_id, query, search)
+        except SupervisorFullError as e:
+            return f"❌ Flight search not started: {e}. Please try again once some of them have completed."
         
-        print(f"🛫 Flight search initiated in background for: {query}")
+        queued = " (queued until a running search finishes)" if self.search_supervisor.queued() > 0 else ""
+        report_tool_progress(self.name, f"🛫 Flight search {task_id} initiated in background for: {query}{queued}")
         
-        return "✅ Flight search initiated - results will be sent via push notification once completed"
+        return f"✅ Flight search {task_id} initiated - results will be sent via push notification once completed"
+    
+    async def cancel_remote_search(self, agent_info: Dict[str, Any], task_id: str):
+        """Ask the flight search agent to cancel a task, ignoring failures."""
+        request = CancelTaskRequest(id=str(uuid4()), params=TaskIdParams(id=task_id))
+        try:
+            await asyncio.wait_for(
+                agent_info["client"].cancel_task(request, http_kwargs=self.agent_registry.http_kwargs(agent_info)),
+                timeout=5
+            )
+        except Exception as e:
+            print(f"⚠️  Could not cancel flight search {task_id} on the agent: {e}")
             
 
     def _run(self, query: str) -> str:
@@ -315,6 +908,314 @@ class FlightSearchTool(BaseTool):
         return asyncio.run(self._arun(query))
 
 
+def message_text(message: BaseMessage) -> str:
+    """Text of a message whose content is a string or a list of content blocks."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in message.content
+    )
+
+
+class HistoryCompactor:
+    """Pre-model hook that keeps the conversation sent to the model within a token budget.
+    
+    The checkpointer keeps the full history; only the model input is compacted. Messages of earlier turns larger
+    than reference_tokens are replaced by a reference naming what was omitted, with a short preview. If the history
+    is still over budget, the oldest turns are dropped. The current turn is always sent as is.
+    """
+    
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, reference_tokens: int = HISTORY_REFERENCE_TOKENS,
+                 preview_chars: int = 160, max_tracked_threads: int = 100):
+        self.token_budget = token_budget
+        self.reference_tokens = reference_tokens
+        self.preview_chars = preview_chars
+        self.max_tracked_threads = max_tracked_threads
+        self.last_calls: Dict[str, Dict[str, int]] = {}
+        self.model_calls = 0
+        self.tokens_before_total = 0
+        self.tokens_after_total = 0
+        self.references_total = 0
+        self.dropped_total = 0
+    
+    def _reference(self, message: BaseMessage) -> BaseMessage:
+        """Replace a bulky message with a reference; messages carrying tool calls are kept so tool results still match."""
+        if isinstance(message, AIMessage) and message.tool_calls:
+            return message
+        tokens = count_tokens_approximately([message])
+        if tokens <= self.reference_tokens:
+            return message
+        if isinstance(message, ToolMessage):
+            label = f"{message.name or 'tool'} result"
+        elif isinstance(message, HumanMessage):
+            label = "user or external message"
+        else:
+            label = "assistant reply"
+        preview = " ".join(message_text(message).split())[:self.preview_chars]
+        content = f"[Earlier {label} omitted ({tokens} tokens). It started with: {preview}...]"
+        return message.model_copy(update={"content": content})
+    
+    def __call__(self, state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        messages = state["messages"]
+        turn_start = max((i for i, message in enumerate(messages) if isinstance(message, HumanMessage)), default=0)
+        current_turn = messages[turn_start:]
+        history = [self._reference(message) for message in messages[:turn_start]]
+        references = sum(1 for before, after in zip(messages, history) if before is not after)
+        
+        history_budget = self.token_budget - count_tokens_approximately(current_turn)
+        kept = trim_messages(
+            history,
+            max_tokens=max(history_budget, 0),
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            start_on="human",
+        ) if history_budget > 0 else []
+        compacted = kept + current_turn
+        
+        call = {
+            "messages": len(messages),
+            "messages_sent": len(compacted),
+            "tokens_before": count_tokens_approximately(messages),
+            "tokens_after": count_tokens_approximately(compacted),
+            "references": references,
+            "dropped": len(history) - len(kept),
+        }
+        self._record(config["configurable"].get("thread_id", "default"), call)
+        return {"llm_input_messages": compacted}
+    
+    def _record(self, thread_id: str, call: Dict[str, int]) -> None:
+        self.model_calls += 1
+        self.tokens_before_total += call["tokens_before"]
+        self.tokens_after_total += call["tokens_after"]
+        self.references_total += call["references"]
+        self.dropped_total += call["dropped"]
+        self.last_calls.pop(thread_id, None)
+        self.last_calls[thread_id] = call
+        while len(self.last_calls) > self.max_tracked_threads:
+            del self.last_calls[next(iter(self.last_calls))]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return compaction totals and the token counts of the last model call of recent threads."""
+        return {
+            "token_budget": self.token_budget,
+            "reference_tokens": self.reference_tokens,
+            "model_calls": self.model_calls,
+            "tokens_before_total": self.tokens_before_total,
+            "tokens_after_total": self.tokens_after_total,
+            "references": self.references_total,
+            "dropped_messages": self.dropped_total,
+            "threads": dict(self.last_calls),
+        }
+
+
+def tool_result_text(result: Any) -> Optional[str]:
+    """Text of a tool result (a string or an A2A send_message response), or None if the call failed.
+    
+    Agents report errors and missing records as text starting with ❌; those are failures too, so the router
+    leaves the input to the LLM.
+    """
+    if isinstance(result, str):
+        text = result.strip()
+    else:
+        event = a2a_event(result)
+        text = a2a_event_text(event).strip() if event is not None else ""
+    return None if not text or text.startswith("❌") else text
+
+
+def flight_search_date(value: str) -> str:
+    """Date of a flight search command as YYYY-MM-DD ('today' and 'tomorrow' are resolved)."""
+    value = value.lower()
+    if value == "today":
+        return datetime.now().strftime("%Y-%m-%d")
+    if value == "tomorrow":
+        return (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+def flight_search_query(match: re.Match) -> str:
+    destination = f" to {match['destination'].upper()}" if match["destination"] else ""
+    return f"search flights from {match['origin'].upper()}{destination} on {flight_search_date(match['date'])}"
+
+
+class Intent:
+    """A chat command the router answers by calling one tool and filling in a response template.
+    
+    query builds the tool query from the pattern match (raising ValueError if the match is not a valid command),
+    render builds the reply from the match and the tool result text.
+    """
+    
+    def __init__(self, name: str, tool_name: str, patterns: List[str], query: Callable[[re.Match], str],
+                 render: Callable[[re.Match, str], str]):
+        self.name = name
+        self.tool_name = tool_name
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        self.query = query
+        self.render = render
+
+
+# Words that make a "<name> flight request" command about something other than an employee.
+NOT_EMPLOYEE_NAME_WORDS = {
+    "check", "show", "list", "display", "find", "get", "the", "all", "any", "my", "our", "which", "what",
+    "pending", "booked", "remaining", "confirmed", "cancelled", "new", "open", "latest", "status",
+}
+
+EMPLOYEE_NAME = r"(?P<name>[a-z]+(?: [a-z]+){1,2})"
+
+
+def employee_request_query(name: str) -> str:
+    """The employee agent looks requests up by the whole query, so only the name is sent."""
+    if NOT_EMPLOYEE_NAME_WORDS.intersection(name.lower().split()):
+        raise ValueError(f"'{name}' is not an employee name")
+    return name
+
+
+INTENTS = [
+    Intent(
+        "flight_search", "flight_search",
+        [r"(?:search|find|get|show)(?: for)? (?:flights|departures) (?:from|leaving) (?P<origin>[a-z]{3})"
+         r"(?: to (?P<destination>[a-z]{3}))? (?:on )?(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow)"],
+        flight_search_query,
+        lambda match, text: f"🛫 Searching flights: {flight_search_query(match)}. "
+                            f"The results will arrive via push notification once the search completes.",
+    ),
+    Intent(
+        "airport_lookup", "airport_knowledge_base",
+        [r"(?:(?:find|get|show|list) )?(?:the )?airports? in (?P<place>[a-z .'-]+)",
+         r"what airports are (?:there )?in (?P<place>[a-z .'-]+)",
+         r"find (?:the )?correct name (?:for|of) (?P<place>[a-z .'-]+?) airport",
+         r"(?P<place>[a-z .'-]+?) airports? information"],
+        # The airport agent fuzzy-matches the whole query, so only the place is sent.
+        lambda match: match["place"].strip(),
+        lambda match, text: text,
+    ),
+    Intent(
+        "employee_request_statistics", "employee_flight_requests",
+        [r"how many .*requests.*",
+         r"count (?:flight )?requests .*",
+         r"(?:pending |booked )?(?:flight )?requests per .+",
+         r"stats(?:istics)? (?:by|per) .+"],
+        lambda match: match.string,
+        lambda match, text: text,
+    ),
+    Intent(
+        "pending_requests", "employee_flight_requests",
+        [r"(?:(?:check|list|show|display) )?(?:the |all )?(?:pending|remaining) (?:flight )?requests?",
+         r"which flights are not booked"],
+        lambda match: "pending flight requests",
+        lambda match, text: text,
+    ),
+    Intent(
+        "booked_requests", "employee_flight_requests",
+        [r"(?:(?:check|list|show|display) )?(?:the |all )?booked (?:flight )?(?:requests?|flights)",
+         r"which flights are confirmed"],
+        lambda match: "booked flight requests",
+        lambda match, text: text,
+    ),
+    Intent(
+        "employee_request", "employee_flight_requests",
+        [rf"check {EMPLOYEE_NAME}(?:'s)? flight requests?",
+         rf"flight (?:status|requests?) (?:for|of) {EMPLOYEE_NAME}",
+         rf"does {EMPLOYEE_NAME} have (?:a |any )?flight requests?",
+         rf"{EMPLOYEE_NAME}(?:'s)? flight (?:information|status|requests?)"],
+        lambda match: employee_request_query(match["name"]),
+        lambda match, text: text,
+    ),
+]
+
+
+class IntentRouter:
+    """Matches chat input against the intents' patterns, so well-formed commands skip the LLM.
+    
+    A pattern must match the whole input (trailing punctuation ignored); the first matching intent wins.
+    """
+    
+    def __init__(self, intents: List[Intent]):
+        self.intents = intents
+        self.routed: Dict[str, int] = {}
+        self.fallbacks = 0
+        self.unmatched = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+    
+    def match(self, text: str) -> Optional[tuple]:
+        """Return (intent, tool query, match) for a well-formed command, or None."""
+        text = " ".join(text.split()).rstrip("?.! ")
+        for intent in self.intents:
+            for pattern in intent.patterns:
+                match = pattern.fullmatch(text)
+                if match is None:
+                    continue
+                try:
+                    return intent, intent.query(match), match
+                except ValueError:
+                    continue
+        self.unmatched += 1
+        return None
+    
+    def record(self, intent: Intent, latency: float):
+        self.routed[intent.name] = self.routed.get(intent.name, 0) + 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return routed commands per intent, LLM fallbacks and routed-response latency (milliseconds)."""
+        routed = sum(self.routed.values())
+        return {
+            "enabled": INTENT_ROUTER_ENABLED,
+            "routed": dict(self.routed),
+            "unmatched": self.unmatched,
+            "fallbacks": self.fallbacks,
+            "latency_avg_ms": round(self.latency_total / routed * 1000, 1) if routed else 0.0,
+            "latency_max_ms": round(self.latency_max * 1000, 1),
+        }
+
+
+class ParallelToolCallLimiter:
+    """ToolNode interceptor capping how many tool calls of one model turn run at once.
+    
+    The graph runs every tool call of a model turn concurrently, so a turn costs its slowest A2A call rather than
+    the sum of them. Calls beyond max_parallel wait for a slot. Turns are told apart by the model message that
+    issued the calls.
+    """
+    
+    def __init__(self, max_parallel: int = MAX_PARALLEL_TOOL_CALLS):
+        self.max_parallel = max_parallel
+        self._turn_semaphores: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.calls = 0
+        self.waited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def __call__(self, request: ToolCallRequest, execute: Callable[[ToolCallRequest], Awaitable[Any]]) -> Any:
+        messages = request.state["messages"] if isinstance(request.state, dict) else []
+        turn = (messages[-1].id or str(id(messages[-1]))) if messages else request.tool_call["id"]
+        semaphore = self._turn_semaphores.get(turn)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_parallel)
+            self._turn_semaphores[turn] = semaphore
+        
+        self.calls += 1
+        if semaphore.locked():
+            self.waited += 1
+        async with semaphore:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                return await execute(request)
+            finally:
+                self.in_flight -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Return tool call counts and the peak number of calls running at once."""
+        return {
+            "max_parallel": self.max_parallel,
+            "calls": self.calls,
+            "waited": self.waited,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
 class ReactChatAgent:
     """LangGraph ReAct agent that can interact with A2A agents through tools and receive external messages via HTTP."""
     
@@ -325,17 +1226,30 @@ class ReactChatAgent:
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable must be set")
         
+        self.prompt_cache_usage = PromptCacheUsage("chat")
         self.model = ChatAnthropic(
             model="claude-3-5-sonnet-20241022",
             temperature=0,
-            api_key=api_key
+            api_key=api_key,
+            callbacks=[self.prompt_cache_usage]
         )
         
-        self.memory = MemorySaver()
+        self.memory = create_checkpointer()
+        self.history_compactor = HistoryCompactor()
+        self.tool_cache = ToolResultCache(TOOL_CACHE_TTLS, TOOL_CACHE_MAX_ENTRIES)
+        self.intent_router = IntentRouter(INTENTS)
+        self.tool_call_limiter = ParallelToolCallLimiter()
+        self.search_supervisor = BackgroundTaskSupervisor(
+            "flight search", FLIGHT_SEARCH_MAX_IN_FLIGHT, FLIGHT_SEARCH_MAX_QUEUED, FLIGHT_SEARCH_DEADLINE
+        )
+        self.tools: Dict[str, BaseTool] = {}
         
         self.agent_graph = None
         
-        self.external_message_queue = Queue()
+        self.external_message_queue: asyncio.Queue = asyncio.Queue()
+        self.external_messages_in_progress = 0
+        self.llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+        self._thread_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
 
         self.app = FastAPI(title="ReAct Chat Agent API", version="1.0.0")
         self.setup_http_endpoints()
@@ -344,37 +1258,69 @@ class ReactChatAgent:
         """Setup HTTP endpoints for receiving external messages."""
         
         @self.app.post(FLIGHTS_ENDPOINT_PATH)
-        async def receive_flight_findings(flight_finding: Task):
-            """Receive flight findings and add them to the message queue."""
+        async def receive_flight_findings(request: Request):
+            """Receive flight findings and add them to the message queue.
+            
+            The body is a Task, decoded once and read as plain JSON: validating the whole Task and its history
+            is skipped, and only the flight search payload of the last history message is used.
+            """
             try:
-                if flight_finding.status.state != TaskState.completed:
+                notification = loads(await request.body())
+                task_id = notification["id"]
+                state = notification["status"]["state"]
+            except (ValueError, TypeError, KeyError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid flight findings notification: {e}")
+            
+            self.search_supervisor.notify(task_id, state)
+            if state not in (TaskState.completed.value, TaskState.failed.value):
+                return
+            
+            try:
+                payload = read_flight_search_payload(notification)
+            except PushPayloadError as e:
+                if state == TaskState.failed.value:
+                    print(f"❌ Flight search {task_id} failed")
                     return
-                
-                data_string = flight_finding.history[-1].parts[0].root.text
-                outer_json = json.loads(data_string)
-                flights_data = json.loads(outer_json["flights"])
-                flights_list = flights_data["flights"]
-
-                internal_msg = InternalMessage(
-                    user_input=flights_list,
-                    thread_id=f"flights_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                    source="flight_findings",
-                    timestamp=datetime.now().isoformat()
-                )
-                
-                self.external_message_queue.put(internal_msg)
-                
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            if payload.get("error") or state == TaskState.failed.value:
+                error = payload.get("error") or payload.get("message") or "unknown error"
+                print(f"❌ Flight search {task_id} failed: {error}")
+                return {
+                    "status": "error",
+                    "message": payload.get("message") or f"Flight search failed: {error}",
+                    "error": error,
+                    "flights_count": 0,
+                    "endpoint": FLIGHTS_ENDPOINT_PATH
+                }
+            
+            flights_list = payload["flights"]
+            if not flights_list:
+                print(f"🛬 Flight search {task_id} returned no flights: {payload.get('message') or ''}")
                 return {
                     "status": "success",
-                    "message": "Flight findings received and queued for processing",
-                    "flights_count": len(flights_list),
+                    "message": "No flights found",
+                    "flights_count": 0,
                     "endpoint": FLIGHTS_ENDPOINT_PATH
                 }
-                
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error processing flight findings: {str(e)}")
+            
+            internal_msg = InternalMessage(
+                user_input=flights_list,
+                thread_id=f"flights_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                source="flight_findings",
+                timestamp=datetime.now().isoformat(),
+                metadata={"task_id": task_id, "search_info": payload.get("search_info")}
+            )
+            
+            self.external_message_queue.put_nowait(internal_msg)
+            
+            return {
+                "status": "success",
+                "message": "Flight findings received and queued for processing",
+                "flights_count": len(flights_list),
+                "endpoint": FLIGHTS_ENDPOINT_PATH
+            }
         
-
         @self.app.get("/api/status")
         async def get_status():
             """Get agent status and queue information."""
@@ -382,29 +1328,48 @@ class ReactChatAgent:
                 "status": "active",
                 "flights_endpoint": FLIGHTS_ENDPOINT_PATH,
                 "queue_size": self.external_message_queue.qsize(),
-                "available_agents": self.agent_registry.list_available_agents()
+                "external_messages_in_progress": self.external_messages_in_progress,
+                "available_agents": self.agent_registry.list_available_agents(),
+                "agents": self.agent_registry.agent_statuses(),
+                "checkpointer": self.memory.stats(),
+                "history": self.history_compactor.stats(),
+                "prompt_cache": self.prompt_cache_usage.stats(),
+                "tool_cache": self.tool_cache.stats(),
+                "intent_router": self.intent_router.stats(),
+                "tool_calls": self.tool_call_limiter.stats(),
+                "flight_searches": self.search_supervisor.stats()
             }
         
-    async def initialize(self, httpx_client: httpx.AsyncClient):
+        @self.app.delete("/api/flight-searches/{task_id}")
+        async def cancel_flight_search(task_id: str):
+            """Cancel a queued or running background flight search."""
+            if not self.search_supervisor.cancel(task_id):
+                raise HTTPException(status_code=404, detail=f"No flight search {task_id} in progress")
+            return {"status": "cancelled", "task_id": task_id}
+        
+    async def initialize(self):
         """Initialize the agent and its tools."""
         print("🤖 Initializing LangGraph ReAct Chat Agent with Anthropic Claude...")
         
-        await self.agent_registry.initialize_agents(httpx_client)
+        await self.agent_registry.initialize_agents()
+        self.agent_registry.start_health_checks()
         
         tools = [
-            AirportKnowledgeTool(self.agent_registry),
-            EmployeeFlightRequestTool(self.agent_registry),
-            FlightSearchTool(self.agent_registry)
+            AirportKnowledgeTool(self.agent_registry, self.tool_cache),
+            EmployeeFlightRequestTool(self.agent_registry, self.tool_cache),
+            EmployeeFlightBookingTool(self.agent_registry, self.tool_cache),
+            FlightSearchTool(self.agent_registry, self.tool_cache, self.search_supervisor)
         ]
+        self.tools = {tool.name: tool for tool in tools}
         
-        system_prompt = f"""You are a helpful assistant that manages employee flight requests in a corporate environment and can search for scheduled flights. Employees submit flight requests, and someone is responsible for booking them.
-
-Current date: {datetime.now().strftime('%B %d, %Y')}
+        # Static so it can be cached; the current date is sent after the cache breakpoint.
+        system_prompt = """You are a helpful assistant that manages employee flight requests in a corporate environment and can search for scheduled flights. Employees submit flight requests, and someone is responsible for booking them.
 
 You have access to specialized tools:
 1. airport_knowledge_base: Use this to retrieve airport information from the knowledge base when users ask about airport names or airports in specific cities.
 2. employee_flight_requests: Use this to get the list of employee flight requests and their booking status.
 3. flight_search: Use this to search for scheduled flights using Aviation Stack API when users want to find available flights.
+4. employee_flight_booking: Use this to attach a found flight to a pending employee flight request or cancel a booking.
 
 Guidelines:
 - Always use the appropriate tool when users ask about airports, flights, or employee flight requests
@@ -416,7 +1381,7 @@ Guidelines:
 Employee-specific queries:
 - If you think the user is asking about a specific employee, ask for confirmation first
 - If confirmed, use the employee_flight_requests tool with the employee's name to check their flight request status
-- If the employee has pending flight requests, you can optionally use airport_knowledge_base to get information about airports for their route
+- If the employee has pending flight requests, their listing already includes the candidate IATA codes for the route and a ready-to-use flight search query; use those directly with flight_search and only use airport_knowledge_base when no IATA codes are listed
 - If the employee has booked flight requests, inform the user about the booking details
 - If the employee has no flight requests (pending or booked), inform the user accordingly
 
@@ -424,8 +1389,11 @@ Tool Usage Rules:
 - For pending flight requests: use employee_flight_requests tool with "pending" in the query
 - For booked flight requests: use employee_flight_requests tool with "booked" in the query  
 - For specific employee requests: use employee_flight_requests tool with the employee's name in the query
+- For counting questions (e.g. "how many requests are pending per destination this month"): use employee_flight_requests tool with "how many" and "per <status|route|departure|destination|month|employee>" in the query; it returns a compact table of counts, do not fetch and count the full lists yourself
+- For booking a flight on a request: first use employee_flight_requests to get the request id and version, then use employee_flight_booking with them; if it reports a conflict, re-check the request and confirm with the user before retrying with the new version
 - For airport information lookups: use airport_knowledge_base tool to get correct airport names or find airports in specific cities
 - For flight searches: use flight_search tool with airport IATA codes and dates (e.g., "search flights from AEP on 2025-11-20")
+- When a question needs several independent lookups (e.g. an employee's request and airports in two cities), call all of those tools in the same turn instead of one per turn; they run in parallel. Only wait for a result first when the next call depends on it
 
 Flight Search Guidelines:
 - When users ask about finding flights, use the flight_search tool
@@ -446,11 +1414,13 @@ External Messages:
 Remember: Your tools will provide detailed streaming output directly to the user, so focus on interpreting and summarizing the results clearly.
 """
 
+        cached_tools = cache_tool_definitions(tools)
         self.agent_graph = create_react_agent(
-            model=self.model,
-            tools=tools,
+            model=self.model.bind_tools(cached_tools, parallel_tool_calls=True),
+            tools=ToolNode(cached_tools, awrap_tool_call=self.tool_call_limiter),
             checkpointer=self.memory,
-            prompt=system_prompt
+            prompt=cached_prompt(system_prompt, lambda: f"Current date: {datetime.now().strftime('%B %d, %Y')}"),
+            pre_model_hook=self.history_compactor
         )
         
         available_agents = self.agent_registry.list_available_agents()
@@ -458,6 +1428,14 @@ Remember: Your tools will provide detailed streaming output directly to the user
         print("🧠 Using Anthropic Claude as the reasoning engine")
         print(f"📡 HTTP endpoint available at: http://localhost:{HTTP_SERVER_PORT}{FLIGHTS_ENDPOINT_PATH}")
     
+    def thread_lock(self, thread_id: str) -> asyncio.Lock:
+        """Lock serializing the messages processed for one conversation thread."""
+        lock = self._thread_locks.get(thread_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._thread_locks[thread_id] = lock
+        return lock
+    
     async def process_external_message(self, external_msg: InternalMessage, thread_id: str | None = None) -> str:
         """Process an external message and add it to agent memory."""
         if not self.agent_graph:
@@ -474,13 +1452,10 @@ Remember: Your tools will provide detailed streaming output directly to the user
             messages = [("user", f"Source: {external_msg.source}\nResults: {user_message}")]
             
             print("🤖 Processing external message...")
-            last_message = ""
-            async for chunk in self.agent_graph.astream(
-                {"messages": messages},
-                config=config
-            ):
-                print(chunk)
-                last_message = chunk
+            # Several external messages can be processed at once, so replies are printed whole instead of
+            # interleaving their tokens.
+            async with self.llm_semaphore:
+                last_message = await self.run_graph(messages, config, stream_tokens=False)
             
             if isinstance(last_message, dict):
                 for chunk_type, chunk_data in last_message.items():
@@ -497,23 +1472,105 @@ Remember: Your tools will provide detailed streaming output directly to the user
             print(error_msg)
             return error_msg
     
+    async def run_graph(self, messages: List[Any], config: Dict[str, Any], stream_tokens: bool) -> Any:
+        """Run the graph on new messages, printing its output as it is produced.
+        
+        With stream_tokens the reply is printed token by token and its final text is returned. Otherwise each graph
+        step is printed once it completes and the last step's update is returned. Tool progress events are printed
+        in both modes.
+        """
+        if not stream_tokens:
+            last_update = ""
+            async for mode, chunk in self.agent_graph.astream(
+                {"messages": messages},
+                config=config,
+                stream_mode=["updates", "custom"]
+            ):
+                if mode == "custom":
+                    render_tool_progress(chunk)
+                else:
+                    print(chunk)
+                    last_update = chunk
+            return last_update
+        
+        reply = ""
+        async for mode, chunk in self.agent_graph.astream(
+            {"messages": messages},
+            config=config,
+            stream_mode=["messages", "custom"]
+        ):
+            if mode == "custom":
+                render_tool_progress(chunk)
+                continue
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != "agent" or not isinstance(message, AIMessageChunk):
+                continue
+            for tool_call_chunk in message.tool_call_chunks:
+                if tool_call_chunk.get("name"):
+                    print(f"\n🔧 Calling {tool_call_chunk['name']}...", flush=True)
+                    # Only the text after the last tool call is the reply.
+                    reply = ""
+            text = message_text(message)
+            if text:
+                print(text, end="", flush=True)
+                reply += text
+        print()
+        return reply
+    
+    async def route(self, user_input: str, thread_id: str) -> Optional[str]:
+        """Answer a well-formed command by calling its tool directly; None when the LLM should handle the input.
+        
+        The exchange is added to the thread's history so follow-up questions to the LLM have it in context.
+        """
+        routed = self.intent_router.match(user_input)
+        if routed is None:
+            return None
+        intent, query, match = routed
+        started = time.perf_counter()
+        text = tool_result_text(await self.tools[intent.tool_name].ainvoke({"query": query}))
+        if text is None:
+            self.intent_router.fallbacks += 1
+            return None
+        
+        reply = intent.render(match, text)
+        await self.agent_graph.aupdate_state(
+            {"configurable": {"thread_id": thread_id}},
+            {"messages": [HumanMessage(content=user_input), AIMessage(content=reply)]},
+            as_node="agent"
+        )
+        self.intent_router.record(intent, time.perf_counter() - started)
+        print(f"⚡ {intent.name} (answered without the LLM)\n{reply}")
+        return reply
+    
+    def print_context_usage(self, thread_id: str):
+        """Print the token counts of the last model call: conversation size before and after compaction, and prompt cache use."""
+        call = self.history_compactor.last_calls.get(thread_id)
+        if call:
+            print(f"🧮 Context: {call['tokens_after']} of {call['tokens_before']} tokens sent "
+                  f"({call['references']} messages referenced, {call['dropped']} dropped)")
+        cache = self.prompt_cache_usage.last_calls.get(thread_id)
+        if cache:
+            print(f"💾 Prompt cache: {cache['cache_read_tokens']} tokens read, {cache['cache_write_tokens']} written "
+                  f"of {cache['input_tokens']} input tokens")
+    
     async def chat(self, user_input: str, thread_id: str = "default") -> str:
         """Process user input and return response."""
         if not self.agent_graph:
             return "❌ Agent not initialized. Please run initialize() first."
         
         try:
+            if INTENT_ROUTER_ENABLED:
+                reply = await self.route(user_input, thread_id)
+                if reply is not None:
+                    return reply
+            
             config = {"configurable": {"thread_id": thread_id}}
             
             messages = [("user", user_input)]
             
-            last_message = ""
-            async for chunk in self.agent_graph.astream(
-                {"messages": messages},
-                config=config
-            ):
-                print(chunk)
-                last_message = chunk
+            async with self.llm_semaphore:
+                last_message = await self.run_graph(messages, config, stream_tokens=STREAM_TOKENS)
+            self.print_context_usage(thread_id)
             
             return last_message if last_message else "Response completed - check the output above."
             
@@ -521,17 +1578,124 @@ Remember: Your tools will provide detailed streaming output directly to the user
             return f"❌ Error processing request: {str(e)}"
 
 
-def run_http_server(agent: ReactChatAgent):
-    """Run the HTTP server in a separate thread."""
-    uvicorn.run(
+def create_http_server(agent: ReactChatAgent) -> uvicorn.Server:
+    """Create the HTTP server, to be served as a task on the chat agent's event loop."""
+    config = uvicorn.Config(
         agent.app, 
         host="0.0.0.0", 
         port=HTTP_SERVER_PORT,
         log_level="warning"
     )
+    return uvicorn.Server(config)
+
+
+async def read_console_lines(lines: asyncio.Queue):
+    """Put each line typed on stdin into the queue as soon as it is entered (None on end of input)."""
+    loop = asyncio.get_running_loop()
+    fd = sys.stdin.fileno()
+    pending = b""
+    
+    def on_readable():
+        nonlocal pending
+        data = os.read(fd, 65536)
+        if not data:
+            loop.remove_reader(fd)
+            if pending:
+                lines.put_nowait(pending.decode(errors="replace"))
+            lines.put_nowait(None)
+            return
+        *complete, pending = (pending + data).split(b"\n")
+        for line in complete:
+            lines.put_nowait(line.decode(errors="replace") + "\n")
+    
+    try:
+        loop.add_reader(fd, on_readable)
+    except (NotImplementedError, OSError, ValueError):
+        # stdin is not pollable here (e.g. a regular file, or an event loop on Windows): read it from a daemon thread.
+        def read_blocking():
+            for line in sys.stdin:
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+        
+        threading.Thread(target=read_blocking, name="console-reader", daemon=True).start()
+        await asyncio.Future()
+    else:
+        try:
+            await asyncio.Future()
+        finally:
+            loop.remove_reader(fd)
+
+
+def show_prompt():
+    print("\n👤 You: ", end="", flush=True)
+
+
+async def external_message_worker(agent: ReactChatAgent):
+    """Process push-delivered messages the moment they are queued."""
+    while True:
+        external_msg = await agent.external_message_queue.get()
+        # The thread lock is requested right after get() returns, with no await in between, so messages for the same
+        # thread queue up on its lock in the order they were dequeued and are processed in that order.
+        lock = agent.thread_lock(external_msg.thread_id)
+        agent.external_messages_in_progress += 1
+        try:
+            async with lock:
+                await agent.process_external_message(external_msg)
+        finally:
+            agent.external_messages_in_progress -= 1
+            agent.external_message_queue.task_done()
+        show_prompt()
+
+
+async def pump_external_messages(agent: ReactChatAgent, workers: int = EXTERNAL_MESSAGE_WORKERS):
+    """Run a pool of workers over the external message queue; messages for different threads are processed concurrently."""
+    await asyncio.gather(*(external_message_worker(agent) for _ in range(max(1, workers))))
+
+
+async def console_loop(agent: ReactChatAgent):
+    """Read user input and chat until the user quits or stdin is closed."""
+    thread_id = "console_session_" + str(uuid4())[:8]
+    lines: asyncio.Queue = asyncio.Queue()
+    reader_task = asyncio.create_task(read_console_lines(lines), name="console-reader")
+    
+    try:
+        while True:
+            show_prompt()
+            line = await lines.get()
+            if line is None:
+                print("\n👋 Goodbye!")
+                return
+            
+            user_input = line.strip()
+            if user_input.lower() in ['quit', 'exit', 'bye']:
+                print("👋 Goodbye!")
+                return
+            
+            if user_input:
+                try:
+                    print("🤖 LLM: ...", end="\n", flush=True)
+                    response = await agent.chat(user_input, thread_id)
+                    
+                    if isinstance(response, dict):
+                        for chunk_type, chunk_data in response.items():
+                            if isinstance(chunk_data, dict) and 'messages' in chunk_data:
+                                for message in chunk_data['messages']:
+                                    if hasattr(message, 'content'):
+                                        print(f"\n**** 🤖 Agent pretty print *****\n{message.content}\n" + "*" * 31)
+                                        break
+                except Exception as e:
+                    print(f"\n❌ Error: {e}")
+    finally:
+        reader_task.cancel()
+        await asyncio.gather(reader_task, return_exceptions=True)
+
 
 async def main():
-    """Main CLI loop for the chat agent with HTTP endpoint integration."""
+    """Main CLI loop for the chat agent with HTTP endpoint integration.
+
+    The HTTP server, the console and the processing of push-delivered messages all run
+    as tasks on one event loop, so results are handled as soon as they arrive.
+    """
     print("🚀 Starting LangGraph ReAct Chat Agent with A2A Integration")
     print("🧠 Powered by Anthropic Claude")
     print("📡 HTTP API Server Enabled")
@@ -539,14 +1703,14 @@ async def main():
     
     logging.basicConfig(level=logging.WARNING)
     
-    async with httpx.AsyncClient() as httpx_client:
-        agent = ReactChatAgent()
-        await agent.initialize(httpx_client)
+    agent = ReactChatAgent()
+    try:
+        await agent.initialize()
         
         print(f"🌐 Starting HTTP server on port {HTTP_SERVER_PORT}...")
-        http_thread = threading.Thread(target=run_http_server, args=(agent,))
-        http_thread.daemon = True
-        http_thread.start()
+        http_server = create_http_server(agent)
+        server_task = asyncio.create_task(http_server.serve(), name="http-server")
+        pump_task = asyncio.create_task(pump_external_messages(agent), name="external-messages")
         
         print("\n💬 Chat Agent Ready! (Type 'quit' to exit)")
         print("You can ask about:")
@@ -559,64 +1723,28 @@ async def main():
         print("\n📡 HTTP Endpoints available:")
         print(f"  - POST http://localhost:{HTTP_SERVER_PORT}{FLIGHTS_ENDPOINT_PATH}")
         print(f"  - GET  http://localhost:{HTTP_SERVER_PORT}/api/status")
+        print(f"  - DELETE http://localhost:{HTTP_SERVER_PORT}/api/flight-searches/{{task_id}}")
         print("-" * 60)
         
-        thread_id = "console_session_" + str(uuid4())[:8]
-        prompt_shown = False
-        should_exit = False
-        
-        while not should_exit:
-            try:
-                while not agent.external_message_queue.empty():
-                    external_msg = agent.external_message_queue.get()
-                    await agent.process_external_message(external_msg)
-                    prompt_shown = False
-                
-                if not prompt_shown:
-                    print("\n👤 You: ", end="", flush=True)
-                    prompt_shown = True
-                
-                if sys.stdin in select.select([sys.stdin], [], [], 0.1)[0]:
-                    user_input = input().strip()
-                    prompt_shown = False
-                    
-                    if user_input.lower() in ['quit', 'exit', 'bye']:
-                        try:
-                            loop = asyncio.get_event_loop()
-                            if loop.is_closed():
-                                print("⚠️  Event loop is closed - cleaning up gracefully...")
-                            else:
-                                print("✅ Event loop is healthy")
-                        except RuntimeError:
-                            print("ℹ️  No event loop available in current context")
-                        
-                        print("👋 Goodbye!")
-                        should_exit = True
-                    
-                    if user_input:
-                        print("🤖 LLM: ...", end="\n", flush=True)
-                        response = await agent.chat(user_input, thread_id)
-                        
-                        if isinstance(response, dict):
-                            for chunk_type, chunk_data in response.items():
-                                if isinstance(chunk_data, dict) and 'messages' in chunk_data:
-                                    for message in chunk_data['messages']:
-                                        if hasattr(message, 'content'):
-                                            print(f"\n**** 🤖 Agent pretty print *****\n{message.content}\n" + "*" * 31)
-                                            break
-                
-            except KeyboardInterrupt:
-                print("\n👋 Goodbye!")
-                should_exit = True
-            except Exception as e:
-                if "Event loop is closed" in str(e) or "RuntimeError" in str(type(e).__name__):
-                    print(f"\n⚠️  Event loop issue detected: {e}")
-                    print("ℹ️  This is usually safe to ignore during shutdown")
-                else:
-                    print(f"\n❌ Error: {e}")
-
-        sys.exit(0)
+        console_task = asyncio.create_task(console_loop(agent), name="console")
+        try:
+            # The server stops on its own if it cannot bind its port or receives a signal.
+            await asyncio.wait({console_task, server_task}, return_when=asyncio.FIRST_COMPLETED)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("\n👋 Goodbye!")
+        finally:
+            http_server.should_exit = True
+            for task in (console_task, pump_task):
+                task.cancel()
+            await asyncio.gather(console_task, pump_task, server_task, return_exceptions=True)
+    finally:
+        await agent.search_supervisor.aclose()
+        await agent.agent_registry.aclose()
+        agent.memory.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,336 @@
+"""
+Bounded LangGraph checkpointer shared by the chat agent and the flight search agent.
+
+MemorySaver keeps every checkpoint of every thread forever, and both agents start a
+new thread per task or per push notification. BoundedMemorySaver keeps only the last
+few checkpoints of each thread, drops the blobs and pending writes nothing refers to
+any more, and evicts threads that have been idle for too long, so memory stays flat.
+
+With a db_path, threads are also snapshotted to sqlite in batches by a background
+thread, and a thread that is not in memory (evicted, or from before a restart) is
+loaded back from sqlite on first use.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver with per-thread checkpoint pruning, idle-thread eviction and optional sqlite persistence.
+
+    Args:
+        keep_last: checkpoints kept per thread and namespace (older ones are pruned)
+        idle_ttl_seconds: evict threads not used for this long from memory (None disables)
+        db_path: sqlite file to persist threads to (memory only when None)
+        flush_interval: seconds between batched writes to sqlite
+        retention_seconds: delete persisted threads not updated for this long (None keeps them)
+    """
+
+    def __init__(
+        self,
+        keep_last: int = 3,
+        idle_ttl_seconds: Optional[float] = 86400,
+        db_path: Optional[str] = None,
+        flush_interval: float = 1.0,
+        retention_seconds: Optional[float] = 7 * 86400,
+    ):
+        super().__init__()
+        if keep_last < 1:
+            raise ValueError('keep_last must be at least 1')
+        self.keep_last = keep_last
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.retention_seconds = retention_seconds
+
+        self._lock = threading.RLock()
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+        self._channel_versions: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._thread_blobs: Dict[str, Set[tuple]] = defaultdict(set)
+        self._thread_writes: Dict[str, Set[tuple]] = defaultdict(set)
+
+        self._dirty: Set[str] = set()
+        self._evicted_snapshots: Dict[str, bytes] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._db_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+        self.pruned_count = 0
+        self.evicted_count = 0
+        self.loaded_count = 0
+        self.flushed_count = 0
+
+    # Checkpointer interface
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            self._ensure_loaded(thread_id)
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(self, config: Optional[RunnableConfig], **kwargs: Any) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config:
+                self._ensure_loaded(config["configurable"]["thread_id"])
+            return iter(list(super().list(config, **kwargs)))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            self._ensure_loaded(thread_id)
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+
+            self._channel_versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            self._thread_blobs[thread_id].update(
+                (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+            )
+            self._prune(thread_id, checkpoint_ns)
+            self._touch(thread_id)
+            self._mark_dirty(thread_id)
+            self._evict_idle()
+            return next_config
+
+    def put_writes(self, config: RunnableConfig, writes, task_id: str, task_path: str = "") -> None:
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            super().put_writes(config, writes, task_id, task_path)
+            self._thread_writes[thread_id].add(
+                (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            )
+            self._mark_dirty(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop_from_memory(thread_id)
+            self._dirty.discard(thread_id)
+            self._evicted_snapshots.pop(thread_id, None)
+        if self.db_path:
+            self._execute('DELETE FROM checkpoints WHERE thread_id = ?', (thread_id,))
+
+    # Pruning and eviction
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _versions_of(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Dict[str, Any]:
+        key = (thread_id, checkpoint_ns, checkpoint_id)
+        if key not in self._channel_versions:
+            serialized = self.storage[thread_id][checkpoint_ns][checkpoint_id][0]
+            self._channel_versions[key] = dict(self.serde.loads_typed(serialized)["channel_versions"])
+        return self._channel_versions[key]
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Keep the newest keep_last checkpoints and drop writes and blobs only older ones referred to."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_last:
+            return
+        for checkpoint_id in sorted(checkpoints)[:-self.keep_last]:
+            del checkpoints[checkpoint_id]
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._thread_writes[thread_id].discard(write_key)
+            self._channel_versions.pop(write_key, None)
+            self.pruned_count += 1
+
+        live = {
+            (channel, version)
+            for checkpoint_id in checkpoints
+            for channel, version in self._versions_of(thread_id, checkpoint_ns, checkpoint_id).items()
+        }
+        thread_blobs = self._thread_blobs[thread_id]
+        for blob_key in [key for key in thread_blobs if key[1] == checkpoint_ns and (key[2], key[3]) not in live]:
+            self.blobs.pop(blob_key, None)
+            thread_blobs.discard(blob_key)
+
+    def _evict_idle(self) -> None:
+        if self.idle_ttl_seconds is None:
+            return
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            if last_access >= deadline:
+                break
+            if thread_id in self._dirty:
+                # Keep what has not been written yet for the next flush.
+                self._evicted_snapshots[thread_id] = self._snapshot(thread_id)
+                self._dirty.discard(thread_id)
+            self._drop_from_memory(thread_id)
+            self.evicted_count += 1
+
+    def _drop_from_memory(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for write_key in self._thread_writes.pop(thread_id, ()):
+            self.writes.pop(write_key, None)
+        for blob_key in self._thread_blobs.pop(thread_id, ()):
+            self.blobs.pop(blob_key, None)
+        for key in [key for key in self._channel_versions if key[0] == thread_id]:
+            del self._channel_versions[key]
+        self._last_access.pop(thread_id, None)
+
+    # Persistence
+
+    def _mark_dirty(self, thread_id: str) -> None:
+        if not self.db_path:
+            return
+        self._dirty.add(thread_id)
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='checkpoint-flush', daemon=True)
+            self._flusher.start()
+
+    def _snapshot(self, thread_id: str) -> bytes:
+        return pickle.dumps({
+            'storage': {ns: dict(checkpoints) for ns, checkpoints in self.storage.get(thread_id, {}).items()},
+            'writes': {key: dict(self.writes[key]) for key in self._thread_writes.get(thread_id, ()) if key in self.writes},
+            'blobs': {key: self.blobs[key] for key in self._thread_blobs.get(thread_id, ()) if key in self.blobs},
+        })
+
+    def _ensure_loaded(self, thread_id: str) -> None:
+        """Load a thread that is not in memory from sqlite."""
+        if not self.db_path or self.storage.get(thread_id):
+            return
+        data = self._evicted_snapshots.pop(thread_id, None)
+        if data is None:
+            row = self._fetchone('SELECT data FROM checkpoints WHERE thread_id = ?', (thread_id,))
+            if row is None:
+                return
+            data = row[0]
+        else:
+            # Still unwritten, keep it scheduled.
+            self._dirty.add(thread_id)
+        snapshot = pickle.loads(data)
+        for checkpoint_ns, checkpoints in snapshot['storage'].items():
+            self.storage[thread_id][checkpoint_ns].update(checkpoints)
+        for write_key, writes in snapshot['writes'].items():
+            self.writes[write_key] = writes
+            self._thread_writes[thread_id].add(write_key)
+        for blob_key, blob in snapshot['blobs'].items():
+            self.blobs[blob_key] = blob
+            self._thread_blobs[thread_id].add(blob_key)
+        self.loaded_count += 1
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f'Failed to persist checkpoints: {e}')
+
+    def flush(self) -> None:
+        """Write every changed thread to sqlite in a single transaction."""
+        if not self.db_path:
+            return
+        with self._lock:
+            now = time.time()
+            rows = [(thread_id, self._snapshot(thread_id), now) for thread_id in self._dirty]
+            rows += [(thread_id, data, now) for thread_id, data in self._evicted_snapshots.items()]
+            self._dirty.clear()
+            self._evicted_snapshots.clear()
+        if not rows:
+            return
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO checkpoints (thread_id, data, updated_at) VALUES (?, ?, ?)', rows
+                    )
+            self.flushed_count += len(rows)
+        except Exception:
+            with self._lock:
+                for thread_id, data, _ in rows:
+                    if thread_id not in self._dirty:
+                        self._evicted_snapshots.setdefault(thread_id, data)
+            raise
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database lazily, and again after a fork, so worker processes never share a connection."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn_pid = os.getpid()
+            with self._conn:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS checkpoints ('
+                    'thread_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)'
+                )
+                if self.retention_seconds is not None:
+                    self._conn.execute(
+                        'DELETE FROM checkpoints WHERE updated_at < ?', (time.time() - self.retention_seconds,)
+                    )
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._db_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params: tuple) -> Optional[tuple]:
+        with self._db_lock:
+            return self._connection().execute(sql, params).fetchone()
+
+    def close(self) -> None:
+        """Stop the background flusher and write any pending changes."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return memory footprint and pruning, eviction and persistence counters."""
+        with self._lock:
+            stats = {
+                'threads': len(self._last_access),
+                'checkpoints': sum(len(checkpoints) for namespaces in self.storage.values() for checkpoints in namespaces.values()),
+                'blobs': len(self.blobs),
+                'pending_writes': len(self.writes),
+                'pruned': self.pruned_count,
+                'evicted': self.evicted_count,
+            }
+            if self.db_path:
+                stats.update(
+                    loaded=self.loaded_count,
+                    flushed=self.flushed_count,
+                    unflushed=len(self._dirty) + len(self._evicted_snapshots),
+                )
+            return stats
+
+
+def create_checkpointer() -> BoundedMemorySaver:
+    """Build the checkpointer configured by environment variables.
+
+    CHECKPOINT_KEEP_LAST: checkpoints kept per thread (default 3)
+    CHECKPOINT_IDLE_TTL_SECONDS: evict threads idle for this long from memory (default 86400, 0 disables)
+    CHECKPOINT_DB_PATH: sqlite file to persist threads to (memory only when unset)
+    CHECKPOINT_RETENTION_SECONDS: delete persisted threads not updated for this long (default 604800, 0 disables)
+    """
+    return BoundedMemorySaver(
+        keep_last=int(os.getenv('CHECKPOINT_KEEP_LAST', '3')),
+        idle_ttl_seconds=float(os.getenv('CHECKPOINT_IDLE_TTL_SECONDS', '86400')) or None,
+        db_path=os.getenv('CHECKPOINT_DB_PATH') or None,
+        retention_seconds=float(os.getenv('CHECKPOINT_RETENTION_SECONDS', str(7 * 86400))) or None,
+    )
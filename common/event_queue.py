@@ -0,0 +1,234 @@
+"""
+Bounded event queues for A2A streaming.
+
+The SDK's EventQueue holds up to 1024 events and, once a slow SSE consumer lets it
+fill up, always makes the producer wait. BoundedEventQueue makes the capacity
+configurable (for the queue and the queues tapped from it) and applies an overflow
+policy once it is full:
+
+- block: the producer waits until the consumer catches up
+- drop_intermediate: non-final status updates are dropped, everything else waits
+- coalesce: a non-final status update replaces the newest queued status update of
+  the same task (or is dropped if there is none), everything else waits
+
+Overflow counters and queue depths are reported by BoundedQueueManager.stats().
+
+A producer waits at most block_timeout for room for an event that is not final: a
+consumer that has gone away (e.g. a disconnected SSE client) must not stall the agent
+forever, so the event is dropped and counted as timed out instead. Final events carry
+the result and are never dropped; their producer keeps waiting until the queue is closed.
+"""
+import asyncio
+import logging
+import os
+from enum import Enum
+from typing import Dict, List
+
+from a2a.server.events import Event, EventQueue, InMemoryQueueManager
+from a2a.types import Message, Task, TaskState, TaskStatusUpdateEvent
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected}
+
+
+class OverflowPolicy(str, Enum):
+    block = 'block'
+    drop_intermediate = 'drop_intermediate'
+    coalesce = 'coalesce'
+
+
+class QueueCounters:
+    """Overflow counters shared by every queue of a queue manager."""
+
+    def __init__(self):
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.timed_out = 0
+        self.high_watermark = 0
+
+
+def is_intermediate(event: Event) -> bool:
+    """Whether the event is a non-final status update that a later one supersedes."""
+    return isinstance(event, TaskStatusUpdateEvent) and not event.final
+
+
+def is_final(event: Event) -> bool:
+    """Whether the event ends the stream: a final status update, a message or a finished task."""
+    if isinstance(event, TaskStatusUpdateEvent):
+        return event.final
+    if isinstance(event, Task):
+        return event.status.state in TERMINAL_STATES
+    return isinstance(event, Message)
+
+
+class StatusSlot:
+    """Queue entry of a non-final status update, which coalesce can overwrite while it is queued."""
+
+    def __init__(self, event: TaskStatusUpdateEvent):
+        self.event = event
+
+
+class BoundedEventQueue(EventQueue):
+    """EventQueue with a maximum size and an overflow policy.
+
+    Non-final status updates are queued in a StatusSlot, and the newest queued slot of
+    each task is remembered so coalesce can overwrite its event; dequeue_event returns
+    the event of the slot.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.block,
+        counters: QueueCounters | None = None,
+        block_timeout: float = 30.0,
+    ):
+        super().__init__()
+        if capacity <= 0:
+            raise ValueError('capacity must be greater than 0')
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.counters = counters or QueueCounters()
+        self.queue = asyncio.Queue(maxsize=capacity)
+        self._status_slots: Dict[str, StatusSlot] = {}
+
+    async def enqueue_event(self, event: Event) -> None:
+        """Enqueues an event to this queue and all its children, applying the overflow policy."""
+        async with self._lock:
+            if self._is_closed:
+                logger.warning('Queue is closed. Event will not be enqueued.')
+                return
+
+        if self.queue.full():
+            if self.overflow_policy != OverflowPolicy.block and is_intermediate(event):
+                if self.overflow_policy == OverflowPolicy.coalesce and event.taskId in self._status_slots:
+                    self._status_slots[event.taskId].event = event
+                    self.counters.coalesced += 1
+                else:
+                    self.counters.dropped += 1
+                await self._enqueue_children(event)
+                return
+            self.counters.blocked += 1
+            if not await self._put_waiting(event):
+                return
+        else:
+            await self.queue.put(self._entry(event))
+
+        self.counters.high_watermark = max(self.counters.high_watermark, self.queue.qsize())
+        await self._enqueue_children(event)
+
+    async def _put_waiting(self, event: Event) -> bool:
+        """Wait for room for the event; only events that are not final give up after block_timeout."""
+        while True:
+            entry = self._entry(event)
+            try:
+                await asyncio.wait_for(self.queue.put(entry), self.block_timeout)
+                return True
+            except asyncio.TimeoutError:
+                self._forget(entry)
+                if not is_final(event):
+                    self.counters.timed_out += 1
+                    logger.warning(f'Event queue full for {self.block_timeout}s, dropping {type(event).__name__}')
+                    return False
+                if self.is_closed():
+                    logger.warning(f'Event queue closed while full, final {type(event).__name__} not delivered')
+                    return False
+                logger.warning(f'Event queue full for {self.block_timeout}s, still waiting to deliver final {type(event).__name__}')
+
+    def _entry(self, event: Event) -> Event | StatusSlot:
+        """Queue entry for an event; non-final status updates become the newest slot of their task."""
+        if not is_intermediate(event):
+            return event
+        slot = StatusSlot(event)
+        self._status_slots[event.taskId] = slot
+        return slot
+
+    def _forget(self, entry: Event | StatusSlot) -> None:
+        """Stop tracking a slot that has left (or never reached) the queue."""
+        if isinstance(entry, StatusSlot) and self._status_slots.get(entry.event.taskId) is entry:
+            del self._status_slots[entry.event.taskId]
+
+    async def dequeue_event(self, no_wait: bool = False) -> Event:
+        """Dequeues the next event, reading the latest event of a coalesced status slot."""
+        entry = await super().dequeue_event(no_wait=no_wait)
+        if isinstance(entry, StatusSlot):
+            self._forget(entry)
+            return entry.event
+        return entry
+
+    async def _enqueue_children(self, event: Event) -> None:
+        for child in self._children:
+            await child.enqueue_event(event)
+
+    def tap(self) -> 'BoundedEventQueue':
+        """Taps the event queue to create a new child queue with the same bounds."""
+        queue = BoundedEventQueue(self.capacity, self.overflow_policy, self.counters, self.block_timeout)
+        self._children.append(queue)
+        return queue
+
+    def depth(self) -> int:
+        """Number of events waiting in this queue and its children."""
+        return self.queue.qsize() + sum(child.depth() for child in self._children)
+
+
+class BoundedQueueManager(InMemoryQueueManager):
+    """InMemoryQueueManager that creates BoundedEventQueues and reports their depth."""
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.block,
+        block_timeout: float = 30.0,
+    ):
+        super().__init__()
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.counters = QueueCounters()
+
+    async def create_or_tap(self, task_id: str) -> EventQueue:
+        """Creates a bounded queue for the task if none exists, otherwise taps the existing one."""
+        async with self._lock:
+            if task_id not in self._task_queue:
+                queue = BoundedEventQueue(self.capacity, self.overflow_policy, self.counters, self.block_timeout)
+                self._task_queue[task_id] = queue
+                return queue
+            return self._task_queue[task_id].tap()
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue-depth gauges and overflow counters."""
+        depths: List[int] = [
+            queue.depth() if isinstance(queue, BoundedEventQueue) else queue.queue.qsize()
+            for queue in list(self._task_queue.values())
+        ]
+        return {
+            'queues': len(depths),
+            'capacity': self.capacity,
+            'overflow_policy': self.overflow_policy.value,
+            'depth_total': sum(depths),
+            'depth_max': max(depths, default=0),
+            'high_watermark': self.counters.high_watermark,
+            'dropped': self.counters.dropped,
+            'coalesced': self.counters.coalesced,
+            'blocked': self.counters.blocked,
+            'timed_out': self.counters.timed_out,
+        }
+
+
+def create_queue_manager() -> BoundedQueueManager:
+    """Build the queue manager configured by environment variables.
+
+    EVENT_QUEUE_CAPACITY: maximum buffered events per queue (default 256)
+    EVENT_QUEUE_OVERFLOW: block, drop_intermediate or coalesce (default block)
+    EVENT_QUEUE_BLOCK_TIMEOUT: maximum seconds a producer waits for room for an event
+        that is not final (default 30)
+    """
+    return BoundedQueueManager(
+        capacity=int(os.getenv('EVENT_QUEUE_CAPACITY', '256')),
+        overflow_policy=OverflowPolicy(os.getenv('EVENT_QUEUE_OVERFLOW', OverflowPolicy.block.value)),
+        block_timeout=float(os.getenv('EVENT_QUEUE_BLOCK_TIMEOUT', '30')),
+    )
@@ -0,0 +1,170 @@
+"""
+Execution policies for blocking agent work.
+
+Agent executors run inside the uvicorn event loop, so a synchronous call such as a
+fuzzy match over every airport or a LangGraph invoke stalls every other request and
+SSE stream until it returns. ExecutionPolicy runs such calls in a thread or process
+pool instead, caps how many run at once and records how long calls waited for a slot.
+
+Process pools only accept picklable, module-level functions; an initializer can be
+given to build per-process state (e.g. a loaded knowledge base) once per worker.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionMode(str, Enum):
+    inline = 'inline'
+    thread = 'thread'
+    process = 'process'
+
+
+def _timed_call(func: Callable, args: tuple) -> Tuple[float, Any]:
+    """Run func in the pool and report when it started (wall clock, comparable across processes)."""
+    return time.time(), func(*args)
+
+
+class ExecutionPolicy:
+    """Runs blocking calls off the event loop with a concurrency limit.
+
+    Calls beyond max_concurrency wait for a slot without occupying a pool worker.
+    Queue wait is the time from run() until the call starts in the pool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: ExecutionMode = ExecutionMode.thread,
+        max_workers: int = 4,
+        max_concurrency: Optional[int] = None,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+    ):
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+        self.name = name
+        self.mode = ExecutionMode(mode)
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self._initializer = initializer
+        self._initargs = initargs
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self._waiting = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        """Create the pool on first use, so idle agents do not spawn workers."""
+        if self._executor is None:
+            if self.mode == ExecutionMode.process:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=self._initializer, initargs=self._initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f'{self.name}-exec',
+                    initializer=self._initializer,
+                    initargs=self._initargs,
+                )
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run func(*args) according to the policy and return its result."""
+        submitted_at = time.time()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._active += 1
+        try:
+            if self.mode == ExecutionMode.inline:
+                started_at, result = _timed_call(func, args)
+            else:
+                loop = asyncio.get_running_loop()
+                started_at, result = await loop.run_in_executor(self._get_executor(), _timed_call, func, args)
+        except Exception:
+            self._failed += 1
+            raise
+        else:
+            self._record(started_at - submitted_at, time.time() - started_at)
+            return result
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def _record(self, wait: float, duration: float) -> None:
+        wait = max(wait, 0.0)
+        self._completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._run_total += duration
+        self._run_max = max(self._run_max, duration)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return concurrency gauges and queue-wait and run-time figures (milliseconds)."""
+        completed = self._completed
+        return {
+            'mode': self.mode.value,
+            'max_workers': self.max_workers,
+            'max_concurrency': self.max_concurrency,
+            'active': self._active,
+            'waiting': self._waiting,
+            'completed': completed,
+            'failed': self._failed,
+            'queue_wait_avg_ms': round(self._wait_total / completed * 1000, 1) if completed else 0.0,
+            'queue_wait_max_ms': round(self._wait_max * 1000, 1),
+            'run_avg_ms': round(self._run_total / completed * 1000, 1) if completed else 0.0,
+            'run_max_ms': round(self._run_max * 1000, 1),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool; calls already running are allowed to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def create_execution_policy(
+    name: str,
+    env_prefix: str,
+    default_mode: ExecutionMode = ExecutionMode.thread,
+    supports_process: bool = True,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+) -> ExecutionPolicy:
+    """Build an agent's execution policy configured by environment variables.
+
+    <PREFIX>_EXECUTION_MODE: inline, thread or process (default default_mode)
+    <PREFIX>_EXECUTION_WORKERS: pool size (default 4)
+    <PREFIX>_MAX_CONCURRENCY: calls allowed to run at once (default: the pool size)
+    """
+    mode = ExecutionMode(os.getenv(f'{env_prefix}_EXECUTION_MODE', ExecutionMode(default_mode).value))
+    if mode == ExecutionMode.process and not supports_process:
+        logger.warning(f'{name} cannot run in a process pool, using a thread pool instead')
+        mode = ExecutionMode.thread
+    return ExecutionPolicy(
+        name,
+        mode=mode,
+        max_workers=int(os.getenv(f'{env_prefix}_EXECUTION_WORKERS', '4')),
+        max_concurrency=int(os.getenv(f'{env_prefix}_MAX_CONCURRENCY', '0')) or None,
+        initializer=initializer if mode == ExecutionMode.process else None,
+        initargs=initargs if mode == ExecutionMode.process else (),
+    )
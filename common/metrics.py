@@ -0,0 +1,20 @@
+"""
+GET /metrics endpoint shared by the A2A agents.
+"""
+from typing import Any, Dict
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+
+def add_metrics_route(app: Starlette, sources: Dict[str, Any], path: str = '/metrics') -> None:
+    """Expose the stats() of each source as JSON, keyed by name.
+
+    Sources can be added to the dict after the route is registered.
+    """
+
+    async def metrics(request: Request) -> JSONResponse:
+        return JSONResponse({name: source.stats() for name, source in sources.items()})
+
+    app.add_route(path, metrics, methods=['GET'])
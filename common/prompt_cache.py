@@ -0,0 +1,123 @@
+"""
+Anthropic prompt caching for the LangGraph ReAct agents.
+
+The system prompts and tool schemas are identical on every ReAct step, so they are
+marked with cache breakpoints: Anthropic then reuses the processed prefix (tools,
+then system prompt) instead of re-reading it, which cuts time to first token and
+input cost. Anything that changes between calls, such as the current date, must come
+after the last breakpoint or it would invalidate the cache; cached_prompt appends it
+as a separate block. Prefixes shorter than the model's minimum (1024 tokens for
+Sonnet) are not cached, which is harmless.
+
+PromptCacheUsage is a callback handler that logs and counts the cache read and
+cache write tokens Anthropic reports for every model call.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.tools import BaseTool
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = {'type': 'ephemeral'}
+
+
+def cached_prompt(static_text: str, dynamic_text: Callable[[], str]) -> Callable[[Dict[str, Any]], List[BaseMessage]]:
+    """Build a create_react_agent prompt whose static part ends with a cache breakpoint.
+
+    dynamic_text is called on every model call and sent after the breakpoint.
+    """
+    def prompt(state: Dict[str, Any]) -> List[BaseMessage]:
+        system_message = SystemMessage(content=[
+            {'type': 'text', 'text': static_text, 'cache_control': CACHE_CONTROL},
+            {'type': 'text', 'text': dynamic_text()},
+        ])
+        return [system_message, *state['messages']]
+
+    return prompt
+
+
+def cache_tool_definitions(tools: Sequence[BaseTool]) -> List[BaseTool]:
+    """Return the tools with a cache breakpoint on the last one, so every tool schema is cached."""
+    if not tools:
+        return list(tools)
+    last = tools[-1]
+    extras = {**(last.extras or {}), 'cache_control': CACHE_CONTROL}
+    return [*tools[:-1], last.model_copy(update={'extras': extras})]
+
+
+class PromptCacheUsage(BaseCallbackHandler):
+    """Logs and totals prompt cache usage of every model call it is attached to.
+
+    The figures of the last call of each LangGraph thread are kept in last_calls.
+    """
+
+    def __init__(self, name: str, max_tracked_threads: int = 100):
+        self.name = name
+        self.max_tracked_threads = max_tracked_threads
+        self._lock = threading.Lock()
+        self._run_threads: Dict[UUID, Optional[str]] = {}
+        self.last_calls: Dict[str, Dict[str, int]] = {}
+        self.calls = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None, **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._run_threads[run_id] = (metadata or {}).get('thread_id')
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            thread_id = self._run_threads.pop(run_id, None)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+                if usage:
+                    self._record(usage, thread_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._run_threads.pop(run_id, None)
+
+    def _record(self, usage: Dict[str, Any], thread_id: Optional[str]) -> None:
+        details = usage.get('input_token_details') or {}
+        call = {
+            'input_tokens': usage.get('input_tokens', 0),
+            'cache_read_tokens': details.get('cache_read') or 0,
+            'cache_write_tokens': details.get('cache_creation') or 0,
+        }
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += call['input_tokens']
+            self.cache_read_tokens += call['cache_read_tokens']
+            self.cache_write_tokens += call['cache_write_tokens']
+            if thread_id is not None:
+                self.last_calls.pop(thread_id, None)
+                self.last_calls[thread_id] = call
+                while len(self.last_calls) > self.max_tracked_threads:
+                    del self.last_calls[next(iter(self.last_calls))]
+        logger.info(
+            f'{self.name} prompt cache: {call["cache_read_tokens"]} tokens read, '
+            f'{call["cache_write_tokens"]} written, {call["input_tokens"]} input tokens in total'
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache read and write totals and the share of input tokens served from the cache."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'input_tokens': self.input_tokens,
+                'cache_read_tokens': self.cache_read_tokens,
+                'cache_write_tokens': self.cache_write_tokens,
+                'cache_read_ratio': round(self.cache_read_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            }
@@ -0,0 +1,88 @@
+"""
+Payload of the flight search results pushed to the chat agent's webhook.
+
+The flight search agent ends each task with a message whose DataPart holds a
+compact, versioned payload:
+
+    {"kind": "flight_search_result", "version": 1, "source": "flight_search_agent",
+     "task_id": ..., "context_id": ..., "search_info": {...} | None,
+     "flights": [...], "message": str | None, "error": str | None}
+
+A search that failed is sent the same way, with no flights, the error in "error"
+and the text shown to the user in "message". Payloads from before "error" was
+added carry no such key and are read as successful.
+
+The flights are plain JSON in the part, not a JSON string wrapped in another JSON
+string, so the webhook decodes the notification body once (with orjson when it is
+installed) and reads the payload out of it without validating the whole Task and
+its history. Bump PAYLOAD_VERSION on incompatible changes; the webhook rejects
+versions newer than the one it knows.
+"""
+import json
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+PAYLOAD_KIND = 'flight_search_result'
+PAYLOAD_VERSION = 1
+PAYLOAD_SOURCE = 'flight_search_agent'
+
+
+class PushPayloadError(ValueError):
+    """Raised when a notification does not carry a flight search payload this version can read."""
+
+
+def loads(body: bytes) -> Any:
+    """Decode JSON with orjson if it is installed, else with the standard library."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def build_flight_search_payload(
+    task_id: str, context_id: str, result: str, error: Optional[str] = None
+) -> Dict[str, Any]:
+    """Payload for the flight search result text returned by the agent.
+
+    search_flights_tool returns its results as JSON; anything else (no flights found,
+    a text answer) is sent as the message with no flights. When the search failed,
+    error holds the reason and result the message for the user.
+    """
+    try:
+        data = json.loads(result) if error is None else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not isinstance(data.get('flights'), list):
+        data = {'message': result}
+    return {
+        'kind': PAYLOAD_KIND,
+        'version': PAYLOAD_VERSION,
+        'source': PAYLOAD_SOURCE,
+        'task_id': task_id,
+        'context_id': context_id,
+        'search_info': data.get('search_info'),
+        'flights': data.get('flights', []),
+        'message': data.get('message'),
+        'error': error,
+    }
+
+
+def read_flight_search_payload(notification: Dict[str, Any]) -> Dict[str, Any]:
+    """Flight search payload of a decoded push notification (a Task as JSON).
+
+    Only the message parts of the last history entry are looked at.
+    """
+    history = notification.get('history') or []
+    parts = history[-1].get('parts', []) if history else []
+    for part in parts:
+        data = part.get('data') if part.get('kind') == 'data' else None
+        if isinstance(data, dict) and data.get('kind') == PAYLOAD_KIND:
+            version = data.get('version')
+            if not isinstance(version, int) or version > PAYLOAD_VERSION:
+                raise PushPayloadError(f'Unsupported {PAYLOAD_KIND} payload version {version!r}')
+            return data
+    raise PushPayloadError(f'Notification for task {notification.get("id")} carries no {PAYLOAD_KIND} payload')
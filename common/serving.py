@@ -0,0 +1,173 @@
+"""
+Entry point helpers for running an A2A agent with one or more worker processes.
+
+Each agent's __main__ builds its read-only state (knowledge base, model clients)
+once, then hands serve() an app factory. With --workers N the parent binds the
+listening socket and forks N workers that inherit that state copy-on-write; each
+worker calls the factory to build its own mutable state (task store, push configs,
+HTTP clients) and accepts connections on the shared socket. State that workers must
+agree on lives in sqlite files (see shared_db_path).
+
+Running agents are only known to the worker that started them: tasks/cancel and
+tasks/resubscribe only reach a running task when the request lands on that worker.
+"""
+import argparse
+import contextlib
+import inspect
+import logging
+import os
+import shutil
+import signal
+import tempfile
+from typing import Callable, Iterable, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID_ENV = 'AGENT_WORKER_ID'
+RUN_DIR_ENV = 'AGENT_RUN_DIR'
+
+_created_run_dir: Optional[str] = None
+
+
+def parse_server_args(description: str, default_port: int) -> argparse.Namespace:
+    """Parse --host, --port and --workers (defaults from AGENT_HOST and AGENT_WORKERS)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--host', default=os.getenv('AGENT_HOST', '0.0.0.0'), help='Interface to bind')
+    parser.add_argument('--port', type=int, default=default_port, help='Port to listen on')
+    parser.add_argument(
+        '--workers', type=int, default=int(os.getenv('AGENT_WORKERS', '1')), help='Number of worker processes'
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    return args
+
+
+def worker_id() -> int:
+    """Index of the current worker process (0 when running a single worker)."""
+    return int(os.getenv(WORKER_ID_ENV, '0'))
+
+
+def is_primary_worker() -> bool:
+    """Whether this worker should run once-per-agent jobs such as restoring queued notifications."""
+    return worker_id() == 0
+
+
+def run_dir() -> str:
+    """Directory for this run's shared sqlite files.
+
+    Created on first use and passed to forked workers in AGENT_RUN_DIR, so every
+    worker opens the same files; serve() removes it when the agent stops.
+    """
+    global _created_run_dir
+    path = os.getenv(RUN_DIR_ENV)
+    if not path:
+        path = _created_run_dir = tempfile.mkdtemp(prefix='a2a-agent-')
+        os.environ[RUN_DIR_ENV] = path
+    return path
+
+
+def shared_db_path(env_var: str, filename: str, workers: int) -> Optional[str]:
+    """Path of the sqlite file behind state that worker processes must share.
+
+    Returns the path set in env_var if any. Otherwise, with several workers, a file in
+    this run's directory (see run_dir), so state does not carry over from earlier runs;
+    with a single worker, None.
+    """
+    path = os.getenv(env_var)
+    if path or workers <= 1:
+        return path
+    return os.path.join(run_dir(), filename)
+
+
+def add_lifespan_hooks(app: Starlette, startup: Iterable[Callable] = (), shutdown: Iterable[Callable] = ()) -> None:
+    """Run callables (sync or async) when the app starts and stops.
+
+    Wraps the app's lifespan context, since Starlette no longer offers add_event_handler.
+    Shutdown hooks run in the order given, after any lifespan the app already had.
+    """
+    startup, shutdown = list(startup), list(shutdown)
+    inner_lifespan = app.router.lifespan_context
+
+    async def run_hook(hook: Callable) -> None:
+        result = hook()
+        if inspect.isawaitable(result):
+            await result
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        for hook in startup:
+            await run_hook(hook)
+        try:
+            async with inner_lifespan(app) as state:
+                yield state
+        finally:
+            for hook in shutdown:
+                try:
+                    await run_hook(hook)
+                except Exception:
+                    logger.exception(f'Shutdown hook {getattr(hook, "__qualname__", hook)} failed')
+
+    app.router.lifespan_context = lifespan
+
+
+def serve(app_factory: Callable[[], Starlette], host: str, port: int, workers: int = 1) -> None:
+    """Run the app in this process, or fork workers sharing one listening socket."""
+    if workers > 1 and not hasattr(os, 'fork'):
+        logger.warning('Multiple workers need os.fork, running a single worker instead')
+        workers = 1
+
+    try:
+        if workers == 1:
+            uvicorn.run(app_factory(), host=host, port=port)
+        else:
+            # Created before forking so the workers inherit the same directory.
+            run_dir()
+            _serve_workers(app_factory, host, port, workers)
+    finally:
+        if _created_run_dir:
+            shutil.rmtree(_created_run_dir, ignore_errors=True)
+
+
+def _serve_workers(app_factory: Callable[[], Starlette], host: str, port: int, workers: int) -> None:
+    """Fork the workers and wait for them, forwarding SIGTERM and SIGINT."""
+    sock = uvicorn.Config(app=None, host=host, port=port).bind_socket()
+    children = []
+    for i in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.environ[WORKER_ID_ENV] = str(i)
+            exit_code = 0
+            try:
+                config = uvicorn.Config(app_factory(), host=host, port=port)
+                uvicorn.Server(config).run(sockets=[sock])
+            except BaseException:
+                logger.exception(f'Worker {i} stopped with an error')
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        children.append(pid)
+    print(f'🚀 Serving on {host}:{port} with {workers} worker processes')
+
+    def stop_workers(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_workers)
+    signal.signal(signal.SIGINT, stop_workers)
+
+    while children:
+        pid, status = os.waitpid(-1, 0)
+        if pid in children:
+            children.remove(pid)
+            exit_code = os.waitstatus_to_exitcode(status)
+            if exit_code not in (0, -signal.SIGTERM, -signal.SIGINT):
+                logger.warning(f'Worker process {pid} exited with status {exit_code}')
+    sock.close()
@@ -0,0 +1,323 @@
+"""
+Bounded task stores shared by the A2A agents.
+
+BoundedTaskStore keeps tasks in memory with a TTL and a maximum number of entries,
+evicting the least recently used terminal tasks first. SqliteTaskStore adds a
+sqlite file behind it so tasks survive restarts, with writes batched in the background,
+or written immediately when several worker processes share the file. The sqlite table is
+held to the same TTL and size bound as the cache.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected}
+
+
+def is_terminal(task: Task) -> bool:
+    """Whether the task reached a state it will not leave."""
+    return task.status.state in TERMINAL_STATES
+
+
+class BoundedTaskStore(TaskStore):
+    """In-memory task store with TTL expiry and LRU eviction of terminal tasks.
+
+    Tasks not touched for ttl_seconds are dropped. When more than max_entries tasks are
+    stored, the least recently used terminal tasks are evicted; tasks still running are
+    never evicted to make room.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = 3600, max_entries: Optional[int] = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.tasks: OrderedDict[str, Tuple[Task, float]] = OrderedDict()
+        self.lock = asyncio.Lock()
+        self.expired_count = 0
+        self.evicted_count = 0
+
+    async def save(self, task: Task) -> None:
+        """Saves or updates a task in the store."""
+        async with self.lock:
+            self._put(task)
+
+    async def get(self, task_id: str) -> Task | None:
+        """Retrieves a task from the store by ID."""
+        async with self.lock:
+            return self._get(task_id)
+
+    async def delete(self, task_id: str) -> None:
+        """Deletes a task from the store by ID."""
+        async with self.lock:
+            self.tasks.pop(task_id, None)
+
+    def _put(self, task: Task) -> None:
+        self.tasks[task.id] = (task, time.monotonic())
+        self.tasks.move_to_end(task.id)
+        self._evict()
+
+    def _get(self, task_id: str) -> Task | None:
+        entry = self.tasks.get(task_id)
+        if entry is None:
+            return None
+        task, touched_at = entry
+        if self.ttl_seconds is not None and time.monotonic() - touched_at > self.ttl_seconds:
+            del self.tasks[task_id]
+            self.expired_count += 1
+            return None
+        self.tasks[task_id] = (task, time.monotonic())
+        self.tasks.move_to_end(task_id)
+        return task
+
+    def _evict(self) -> None:
+        """Drop expired tasks, then least recently used terminal tasks over the size limit."""
+        if self.ttl_seconds is not None:
+            deadline = time.monotonic() - self.ttl_seconds
+            while self.tasks:
+                task_id, (_, touched_at) = next(iter(self.tasks.items()))
+                if touched_at >= deadline:
+                    break
+                del self.tasks[task_id]
+                self.expired_count += 1
+
+        if self.max_entries is not None and len(self.tasks) > self.max_entries:
+            excess = len(self.tasks) - self.max_entries
+            for task_id in [task_id for task_id, (task, _) in self.tasks.items() if is_terminal(task)][:excess]:
+                del self.tasks[task_id]
+                self.evicted_count += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return store size and eviction counters."""
+        return {
+            'size': len(self.tasks),
+            'max_entries': self.max_entries,
+            'expired': self.expired_count,
+            'evicted': self.evicted_count,
+        }
+
+
+class SqliteTaskStore(BoundedTaskStore):
+    """Bounded in-memory task store backed by a sqlite file.
+
+    Saves update the in-memory cache immediately and are written to sqlite in batches,
+    every flush_interval seconds or as soon as batch_size tasks are pending. Reads that
+    miss the cache fall back to sqlite, so pre-restart tasks stay available until they
+    are older than the TTL.
+
+    After writes, at most every purge_interval seconds, the table is purged with the
+    cache's bound: rows older than the TTL are deleted, then the oldest terminal rows
+    beyond max_entries.
+
+    With shared=True the file is shared with other worker processes: saves are written
+    immediately and running tasks are always read from sqlite, since another worker may
+    have updated them. Terminal tasks do not change and are still served from memory.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: Optional[float] = 3600,
+        max_entries: Optional[int] = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        shared: bool = False,
+        purge_interval: float = 60,
+    ):
+        super().__init__(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self.db_path = db_path
+        self.shared = shared
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+        self._pending: Dict[str, Task] = {}
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._db_lock = threading.Lock()
+        self.flushed_count = 0
+        self.purged_count = 0
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS tasks ('
+                'id TEXT PRIMARY KEY, state TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks (updated_at)')
+        self._purge()
+
+    async def save(self, task: Task) -> None:
+        """Saves or updates a task in the cache and schedules it for writing."""
+        if self.shared:
+            async with self.lock:
+                self._put(task)
+            await asyncio.to_thread(self._write, [self._to_row(task)])
+            self.flushed_count += 1
+            await self._maybe_purge()
+            return
+
+        async with self.lock:
+            self._put(task)
+            self._pending[task.id] = task
+        self._ensure_flusher()
+        if len(self._pending) >= self.batch_size:
+            self._flush_event.set()
+
+    async def get(self, task_id: str) -> Task | None:
+        """Retrieves a task from the cache, falling back to sqlite."""
+        async with self.lock:
+            task = self._pending.get(task_id) or self._get(task_id)
+        if task is not None and not (self.shared and not is_terminal(task)):
+            return task
+
+        row = await asyncio.to_thread(self._read, task_id)
+        if row is None:
+            return None
+        task = Task.model_validate_json(row)
+        async with self.lock:
+            self._put(task)
+        return task
+
+    async def delete(self, task_id: str) -> None:
+        """Deletes a task from the cache and from sqlite."""
+        async with self.lock:
+            self.tasks.pop(task_id, None)
+            self._pending.pop(task_id, None)
+        await asyncio.to_thread(self._execute, 'DELETE FROM tasks WHERE id = ?', (task_id,))
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_event = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._flush_loop(), name='task-store-flush')
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every pending task to sqlite in a single transaction."""
+        async with self.lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        rows = [self._to_row(task) for task in batch.values()]
+        try:
+            await asyncio.to_thread(self._write, rows)
+            self.flushed_count += len(rows)
+        except Exception as e:
+            logger.error(f'Failed to persist {len(rows)} tasks: {e}')
+            async with self.lock:
+                for task_id, task in batch.items():
+                    self._pending.setdefault(task_id, task)
+            return
+        await self._maybe_purge()
+
+    async def _maybe_purge(self) -> None:
+        """Purge the sqlite table if purge_interval has passed since the last purge."""
+        if time.monotonic() - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = time.monotonic()
+        try:
+            await asyncio.to_thread(self._purge)
+        except Exception as e:
+            logger.error(f'Failed to purge the task store: {e}')
+
+    @staticmethod
+    def _to_row(task: Task) -> tuple:
+        return (task.id, task.status.state.value, task.model_dump_json(exclude_none=True), time.time())
+
+    def _write(self, rows) -> None:
+        with self._db_lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO tasks (id, state, data, updated_at) VALUES (?, ?, ?, ?)', rows)
+
+    def _read(self, task_id: str) -> Optional[str]:
+        with self._db_lock:
+            row = self.conn.execute(
+                'SELECT data, updated_at FROM tasks WHERE id = ?', (task_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds:
+            return None
+        return row[0]
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._db_lock, self.conn:
+            self.conn.execute(sql, params)
+
+    def _purge(self) -> None:
+        """Remove tasks older than the TTL, then the oldest terminal tasks over max_entries, from the sqlite file."""
+        terminal_states = tuple(state.value for state in TERMINAL_STATES)
+        with self._db_lock, self.conn:
+            purged = 0
+            if self.ttl_seconds is not None:
+                purged += self.conn.execute(
+                    'DELETE FROM tasks WHERE updated_at < ?', (time.time() - self.ttl_seconds,)
+                ).rowcount
+            if self.max_entries is not None:
+                excess = self.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    purged += self.conn.execute(
+                        'DELETE FROM tasks WHERE id IN ('
+                        f'SELECT id FROM tasks WHERE state IN ({", ".join("?" * len(terminal_states))}) '
+                        'ORDER BY updated_at LIMIT ?)',
+                        (*terminal_states, excess),
+                    ).rowcount
+        self.purged_count += purged
+
+    async def aclose(self) -> None:
+        """Stop the background flusher and write any pending tasks."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        self._purge()
+
+    def stats(self) -> Dict[str, int]:
+        """Return store size, eviction and persistence counters."""
+        with self._db_lock:
+            persisted = self.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+        return {
+            **super().stats(),
+            'pending_writes': len(self._pending),
+            'persisted': persisted,
+            'flushed': self.flushed_count,
+            'purged': self.purged_count,
+        }
+
+
+def create_task_store(db_path: Optional[str] = None, shared: bool = False) -> BoundedTaskStore:
+    """Build the task store configured by environment variables.
+
+    TASK_STORE_PATH: sqlite file for a persistent store (in-memory only when unset)
+    TASK_STORE_TTL_SECONDS: drop tasks not updated for this long (default 3600, 0 disables)
+    TASK_STORE_MAX_ENTRIES: maximum tasks kept in memory (default 1000, 0 disables)
+
+    Args:
+        db_path: sqlite file to use instead of TASK_STORE_PATH (see common.serving.shared_db_path)
+        shared: whether several worker processes use the file, which makes writes go straight
+            to sqlite instead of being batched
+    """
+    ttl_seconds = float(os.getenv('TASK_STORE_TTL_SECONDS', '3600')) or None
+    max_entries = int(os.getenv('TASK_STORE_MAX_ENTRIES', '1000')) or None
+    db_path = db_path or os.getenv('TASK_STORE_PATH')
+    if db_path:
+        return SqliteTaskStore(db_path, ttl_seconds=ttl_seconds, max_entries=max_entries, shared=shared)
+    return BoundedTaskStore(ttl_seconds=ttl_seconds, max_entries=max_entries)
@@ -1,22 +1,34 @@
 """
 A2A Agent for Employee Flight Request Management and Status Checking.
 """
-import uvicorn
+import os
+import sys
+
+from starlette.applications import Starlette
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.event_queue import create_queue_manager
+from common.metrics import add_metrics_route
+from common.serving import add_lifespan_hooks, parse_server_args, serve, shared_db_path
+from common.task_store import create_task_store
 from agent_executor import (
     EmployeeFlightRequestAgentExecutor,
+    EmployeeFlightRequestDatabase,
 )
 
 if __name__ == '__main__':
 
+    args = parse_server_args('Employee Flight Request Management Agent', default_port=9992)
+
     list_pending_requests_skill = AgentSkill(
         id='list_pending_requests',
         name='List Pending Flight Requests',
@@ -56,10 +68,35 @@ if __name__ == '__main__':
         ],
     )
 
+    aggregate_statistics_skill = AgentSkill(
+        id='aggregate_request_statistics',
+        name='Aggregate Flight Request Statistics',
+        description='Count employee flight requests grouped by status, route, departure, destination, month or employee and return a compact table',
+        tags=['flight', 'requests', 'statistics', 'count', 'how many', 'per', 'breakdown'],
+        examples=[
+            'how many requests are pending per destination this month',
+            'count flight requests by status',
+            'pending requests per month',
+            'stats by route and month for booked requests in 2025-11'
+        ],
+    )
+
+    update_booking_skill = AgentSkill(
+        id='update_flight_booking',
+        name='Update Flight Booking',
+        description='Attach a flight to a pending request or cancel a booking. Expects a JSON command with action, request_id, '
+                    'flight, seat, gate, expected_version (required) and idempotency_key; stale versions are rejected as conflicts',
+        tags=['flight', 'booking', 'book', 'update', 'cancel', 'employee'],
+        examples=[
+            '{"action": "book", "request_id": 4, "flight": "EI155", "seat": "3A", "gate": "B2", "expected_version": 1, "idempotency_key": "4:1:EI155"}',
+            '{"action": "cancel", "request_id": 4, "expected_version": 2}'
+        ],
+    )
+
     public_agent_card = AgentCard(
         name='Employee Flight Request Management Agent',
         description='Agent for managing and checking employee flight requests and bookings',
-        url='http://localhost:9992/',
+        url=f'http://localhost:{args.port}/',
         version='1.0.0',
         defaultInputModes=['text'],
         defaultOutputModes=['text'],
@@ -67,19 +104,40 @@ if __name__ == '__main__':
         skills=[
             list_pending_requests_skill,
             list_booked_requests_skill,
-            check_employee_request_skill
+            check_employee_request_skill,
+            aggregate_statistics_skill,
+            update_booking_skill
         ],
         supportsAuthenticatedExtendedCard=False,
     )
 
-    request_handler = DefaultRequestHandler(
-        agent_executor=EmployeeFlightRequestAgentExecutor(),
-        task_store=InMemoryTaskStore(),
-    )
+    db_path = shared_db_path('EMPLOYEE_DB_PATH', 'employee-flight-requests.db', args.workers)
+    if args.workers > 1 and not os.getenv('EMPLOYEE_DB_PATH'):
+        # Workers share one sqlite file instead of separate in-memory databases; seed it once before forking.
+        EmployeeFlightRequestDatabase(db_path, seed=True).conn.close()
 
-    server = A2AStarletteApplication(
-        agent_card=public_agent_card,
-        http_handler=request_handler,
-    )
+    def create_app() -> Starlette:
+        """Build one worker's app with its own database connection, task store and event queues."""
+        task_store = create_task_store(
+            shared_db_path('TASK_STORE_PATH', 'employee-tasks.db', args.workers), shared=args.workers > 1
+        )
+        queue_manager = create_queue_manager()
+
+        request_handler = DefaultRequestHandler(
+            agent_executor=EmployeeFlightRequestAgentExecutor(db_path),
+            task_store=task_store,
+            queue_manager=queue_manager,
+        )
+
+        server = A2AStarletteApplication(
+            agent_card=public_agent_card,
+            http_handler=request_handler,
+        )
+
+        app = server.build()
+        add_metrics_route(app, {'task_store': task_store, 'event_queues': queue_manager})
+        if hasattr(task_store, 'aclose'):
+            add_lifespan_hooks(app, shutdown=[task_store.aclose])
+        return app
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9992) 
\ No newline at end of file
+    serve(create_app, args.host, args.port, args.workers) 
\ No newline at end of file
@@ -1,123 +1,761 @@
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
 from a2a.types import Task
 from a2a.utils import new_task, new_agent_text_message
+import csv
 import json
-from typing import Dict, List, Optional
+import os
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 
 
+SEED_FLIGHT_REQUESTS = [
+    {
+        "id": 1,
+        "name": "John Smith",
+        "departure": "Madrid",
+        "destination": "London",
+        "date": "2025-09-15",
+        "flight_booking": {"flight": "IB6273", "seat": "12A", "gate": "B15", "purchased": True}
+    },
+    {
+        "id": 2,
+        "name": "Maria Garcia",
+        "departure": "Barcelona",
+        "destination": "Paris",
+        "date": "2025-08-20",
+        "flight_booking": {"flight": "VY2204", "seat": "8C", "gate": "A12", "purchased": True}
+    },
+    {
+        "id": 3,
+        "name": "Robert Johnson",
+        "departure": "New York",
+        "destination": "Los Angeles",
+        "date": "2025-12-01",
+        "flight_booking": None
+    },
+    {
+        "id": 4,
+        "name": "Anna Thompson",
+        "departure": "London",
+        "destination": "Dublin",
+        "date": "2025-10-05",
+        "flight_booking": None
+    },
+    {
+        "id": 5,
+        "name": "Carlos Rodriguez",
+        "departure": "Tokyo",
+        "destination": "Seoul",
+        "date": "2025-11-10",
+        "flight_booking": {"flight": "JL316", "seat": "15F", "gate": "C20", "purchased": True}
+    },
+    {
+        "id": 6,
+        "name": "Sophie Martin",
+        "departure": "Paris",
+        "destination": "Rome",
+        "date": "2025-07-12",
+        "flight_booking": None
+    },
+    {
+        "id": 7,
+        "name": "Michael Brown",
+        "departure": "Rome",
+        "destination": "Athens",
+        "date": "2025-10-15",
+        "flight_booking": {"flight": "AZ610", "seat": "22B", "gate": "D8", "purchased": True}
+    },
+    {
+        "id": 8,
+        "name": "Elena Popov",
+        "departure": "Berlin",
+        "destination": "Amsterdam",
+        "date": "2025-11-18",
+        "flight_booking": None
+    },
+    {
+        "id": 9,
+        "name": "Ahmed Hassan",
+        "departure": "Dubai",
+        "destination": "Mumbai",
+        "date": "2025-12-20",
+        "flight_booking": {"flight": "EK201", "seat": "6A", "gate": "E15", "purchased": True}
+    },
+    {
+        "id": 10,
+        "name": "Lisa Anderson",
+        "departure": "Sydney",
+        "destination": "Melbourne",
+        "date": "2025-08-25",
+        "flight_booking": None
+    }
+]
+
+BOOKING_FIELDS = ("flight", "seat", "gate")
+
+AGGREGATION_DIMENSIONS = {
+    "status": ["status"],
+    "route": ["departure", "destination"],
+    "departure": ["departure"],
+    "destination": ["destination"],
+    "month": ["substr(date, 1, 7)"],
+    "employee": ["name"],
+}
+
+
+def validate_flight_request(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate and normalize a flight request record.
+    
+    Args:
+        record: Raw record with id, name, departure, destination, date and optional flight_booking
+        
+    Returns:
+        Normalized record ready to be stored
+        
+    Raises:
+        ValueError: If a required field is missing or malformed
+    """
+    try:
+        request_id = int(record.get("id"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid id: {record.get('id')!r}")
+    
+    normalized = {"id": request_id}
+    for field in ("name", "departure", "destination", "date"):
+        value = record.get(field)
+        if value is None or not str(value).strip():
+            raise ValueError(f"missing {field} for request {request_id}")
+        normalized[field] = str(value).strip()
+    
+    try:
+        datetime.strptime(normalized["date"], "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"invalid date {normalized['date']!r} for request {request_id}, expected YYYY-MM-DD")
+    
+    booking = record.get("flight_booking")
+    if booking:
+        if not isinstance(booking, dict) or not booking.get("flight"):
+            raise ValueError(f"invalid flight_booking for request {request_id}")
+        normalized["flight_booking"] = {
+            **{field: str(booking.get(field) or "") for field in BOOKING_FIELDS},
+            "purchased": bool(booking.get("purchased", True)),
+        }
+    else:
+        normalized["flight_booking"] = None
+    
+    return normalized
+
+
+AIRPORT_TYPE_RANK = {"large_airport": 0, "medium_airport": 1, "small_airport": 2}
+
+class AirportCodeResolver:
+    """
+    Resolves free-text city names to candidate airport IATA codes.
+    
+    Uses the same airport-codes.csv as the Airport Knowledge Base Agent, loaded lazily on
+    first use and indexed by lowercase municipality. Airports are ranked by type, then by
+    scheduled service (when the CSV has that column), then by yearly passengers from
+    airport-passengers.csv (main airport first, e.g. LHR before LGW), then by name.
+    
+    The airports CSV is downloaded separately (see the README); without it nothing is
+    resolved and load_error says why.
+    """
+    
+    def __init__(
+        self,
+        airports_csv_path: Optional[str] = None,
+        max_candidates: int = 3,
+        passengers_csv_path: Optional[str] = None,
+    ):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.airports_csv_path = airports_csv_path or os.path.join(base_dir, 'databases', 'airport-codes.csv')
+        self.passengers_csv_path = passengers_csv_path or os.path.join(base_dir, 'databases', 'airport-passengers.csv')
+        self.max_candidates = max_candidates
+        self.load_error: Optional[str] = None
+        self._codes_by_city: Optional[Dict[str, List[str]]] = None
+    
+    def _load_passengers(self) -> Dict[str, float]:
+        """Yearly passengers (millions) by IATA code, empty if the file is missing."""
+        try:
+            with open(self.passengers_csv_path, newline="", encoding="utf-8") as f:
+                return {row["iata_code"].strip(): float(row["passengers_millions"]) for row in csv.DictReader(f)}
+        except (OSError, KeyError, ValueError):
+            return {}
+    
+    def _load(self) -> Dict[str, List[str]]:
+        """Build the municipality -> IATA codes index from the airports CSV."""
+        candidates: Dict[str, List[Tuple[int, int, float, str, str]]] = {}
+        passengers = self._load_passengers()
+        try:
+            with open(self.airports_csv_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    iata_code = (row.get("iata_code") or "").strip()
+                    municipality = (row.get("municipality") or "").strip().lower()
+                    airport_type = row.get("type") or ""
+                    if not iata_code or not municipality or "airport" not in airport_type:
+                        continue
+                    rank = (
+                        AIRPORT_TYPE_RANK.get(airport_type, len(AIRPORT_TYPE_RANK)),
+                        0 if (row.get("scheduled_service") or "yes").strip().lower() == "yes" else 1,
+                        -passengers.get(iata_code, 0),
+                        row.get("name") or "",
+                    )
+                    candidates.setdefault(municipality, []).append((*rank, iata_code))
+        except OSError as e:
+            self.load_error = str(e)
+        
+        return {
+            city: [airport[-1] for airport in sorted(airports)][:self.max_candidates]
+            for city, airports in candidates.items()
+        }
+    
+    @property
+    def available(self) -> bool:
+        """Whether any airport codes could be loaded."""
+        if self._codes_by_city is None:
+            self._codes_by_city = self._load()
+        return bool(self._codes_by_city)
+    
+    def resolve(self, city: str) -> List[str]:
+        """Return the candidate IATA codes for a city, best match first."""
+        if not self.available:
+            return []
+        return self._codes_by_city.get(city.strip().lower(), [])
+
+
 class EmployeeFlightRequestDatabase:
-    """In-memory database for employee flight request management."""
-    
-    def __init__(self):
-        self.flight_requests = [
-            {
-                "id": 1,
-                "name": "John Smith",
-                "departure": "Madrid",
-                "destination": "London",
-                "date": "2025-09-15",
-                "flight_booking": {"flight": "IB6273", "seat": "12A", "gate": "B15", "purchased": True}
-            },
-            {
-                "id": 2,
-                "name": "Maria Garcia",
-                "departure": "Barcelona",
-                "destination": "Paris",
-                "date": "2025-08-20",
-                "flight_booking": {"flight": "VY2204", "seat": "8C", "gate": "A12", "purchased": True}
-            },
-            {
-                "id": 3,
-                "name": "Robert Johnson",
-                "departure": "New York",
-                "destination": "Los Angeles",
-                "date": "2025-12-01",
-                "flight_booking": None
-            },
-            {
-                "id": 4,
-                "name": "Anna Thompson",
-                "departure": "London",
-                "destination": "Dublin",
-                "date": "2025-10-05",
-                "flight_booking": None
-            },
-            {
-                "id": 5,
-                "name": "Carlos Rodriguez",
-                "departure": "Tokyo",
-                "destination": "Seoul",
-                "date": "2025-11-10",
-                "flight_booking": {"flight": "JL316", "seat": "15F", "gate": "C20", "purchased": True}
-            },
-            {
-                "id": 6,
-                "name": "Sophie Martin",
-                "departure": "Paris",
-                "destination": "Rome",
-                "date": "2025-07-12",
-                "flight_booking": None
-            },
-            {
-                "id": 7,
-                "name": "Michael Brown",
-                "departure": "Rome",
-                "destination": "Athens",
-                "date": "2025-10-15",
-                "flight_booking": {"flight": "AZ610", "seat": "22B", "gate": "D8", "purchased": True}
-            },
-            {
-                "id": 8,
-                "name": "Elena Popov",
-                "departure": "Berlin",
-                "destination": "Amsterdam",
-                "date": "2025-11-18",
-                "flight_booking": None
-            },
-            {
-                "id": 9,
-                "name": "Ahmed Hassan",
-                "departure": "Dubai",
-                "destination": "Mumbai",
-                "date": "2025-12-20",
-                "flight_booking": {"flight": "EK201", "seat": "6A", "gate": "E15", "purchased": True}
-            },
-            {
-                "id": 10,
-                "name": "Lisa Anderson",
-                "departure": "Sydney",
-                "destination": "Melbourne",
-                "date": "2025-08-25",
-                "flight_booking": None
-            }
+    """
+    SQLite database for employee flight request management.
+    
+    Uses an in-memory database seeded with sample records by default. Set the
+    EMPLOYEE_DB_PATH environment variable (or pass db_path) to keep the data on disk,
+    e.g. to serve records loaded with bulk_io.py.
+    
+    Route IATA codes are resolved when requests are written. A NULL code column means the
+    airport codes were unavailable at the time; an empty one means the city was looked up
+    and has no airport. resolve_missing_route_codes (bulk_io.py resolve-codes) fills in
+    the NULL columns once the airport codes are available.
+    """
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        seed: Optional[bool] = None,
+        resolver: Optional[AirportCodeResolver] = None,
+    ):
+        self.db_path = db_path or os.getenv("EMPLOYEE_DB_PATH") or ":memory:"
+        self.resolver = resolver or AirportCodeResolver()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            # Lets several agent worker processes read while one of them writes.
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        
+        if seed is None:
+            seed = self.db_path == ":memory:"
+        if seed and self.count() == 0:
+            self.upsert_many(SEED_FLIGHT_REQUESTS)
+    
+    def _create_schema(self) -> None:
+        """Create the flight requests table and its indexes if they do not exist."""
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS flight_requests (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    departure TEXT NOT NULL,
+                    destination TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    flight_booking TEXT,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    departure_iata TEXT,
+                    destination_iata TEXT
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS booking_idempotency (
+                    idempotency_key TEXT PRIMARY KEY,
+                    request_id INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(flight_requests)")}
+            if "version" not in columns:
+                self.conn.execute("ALTER TABLE flight_requests ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            for column in ("departure_iata", "destination_iata"):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE flight_requests ADD COLUMN {column} TEXT")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_flight_requests_name ON flight_requests (name COLLATE NOCASE)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_flight_requests_status ON flight_requests (status, id)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_flight_requests_status_month ON flight_requests (status, substr(date, 1, 7))"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_flight_requests_route ON flight_requests (departure, destination)"
+            )
+    
+    @staticmethod
+    def _row_to_request(row: sqlite3.Row) -> Dict:
+        """Convert a database row to the flight request dictionary used by the agent."""
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "departure": row["departure"],
+            "destination": row["destination"],
+            "date": row["date"],
+            "flight_booking": json.loads(row["flight_booking"]) if row["flight_booking"] else None,
+            "version": row["version"],
+            "departure_iata": row["departure_iata"].split(",") if row["departure_iata"] else [],
+            "destination_iata": row["destination_iata"].split(",") if row["destination_iata"] else []
+        }
+    
+    def count(self) -> int:
+        """Return the number of stored flight requests."""
+        return self.conn.execute("SELECT COUNT(*) FROM flight_requests").fetchone()[0]
+    
+    def upsert_many(self, requests: Iterable[Dict]) -> int:
+        """
+        Insert or update a batch of validated flight requests in a single transaction.
+        
+        A record without a flight_booking keeps the booking already stored for the request, so
+        re-importing HR extracts does not undo bookings made through update_booking. Bookings are
+        cancelled with update_booking only. Records identical to the stored row are left untouched, so
+        re-importing an unchanged file does not bump versions and fail pending bookings.
+        
+        Args:
+            requests: Records already normalized by validate_flight_request
+            
+        Returns:
+            Number of records written
+        """
+        rows = [
+            (
+                request["id"],
+                request["name"],
+                request["departure"],
+                request["destination"],
+                request["date"],
+                "pending" if request["flight_booking"] is None else "booked",
+                json.dumps(request["flight_booking"]) if request["flight_booking"] else None,
+                self._route_codes(request["departure"]),
+                self._route_codes(request["destination"]),
+            )
+            for request in requests
         ]
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO flight_requests (id, name, departure, destination, date, status, flight_booking,
+                                             departure_iata, destination_iata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = excluded.name,
+                    departure = excluded.departure,
+                    destination = excluded.destination,
+                    date = excluded.date,
+                    status = CASE WHEN excluded.flight_booking IS NULL THEN flight_requests.status
+                                  ELSE excluded.status END,
+                    flight_booking = COALESCE(excluded.flight_booking, flight_requests.flight_booking),
+                    departure_iata = COALESCE(excluded.departure_iata, CASE WHEN excluded.departure = flight_requests.departure
+                                                                           THEN flight_requests.departure_iata END),
+                    destination_iata = COALESCE(excluded.destination_iata, CASE WHEN excluded.destination = flight_requests.destination
+                                                                               THEN flight_requests.destination_iata END),
+                    version = flight_requests.version + 1
+                WHERE excluded.name IS NOT flight_requests.name
+                   OR excluded.departure IS NOT flight_requests.departure
+                   OR excluded.destination IS NOT flight_requests.destination
+                   OR excluded.date IS NOT flight_requests.date
+                   OR (excluded.departure_iata IS NOT NULL AND excluded.departure_iata IS NOT flight_requests.departure_iata)
+                   OR (excluded.destination_iata IS NOT NULL AND excluded.destination_iata IS NOT flight_requests.destination_iata)
+                   OR (excluded.flight_booking IS NOT NULL
+                       AND (excluded.flight_booking IS NOT flight_requests.flight_booking
+                            OR excluded.status IS NOT flight_requests.status))
+                """,
+                rows,
+            )
+        return len(rows)
+    
+    def _route_codes(self, city: str) -> Optional[str]:
+        """Comma-separated IATA candidates for a city: empty if it has none, None if the airport codes are unavailable."""
+        if not self.resolver.available:
+            return None
+        return ",".join(self.resolver.resolve(city))
+    
+    def resolve_missing_route_codes(self, batch_size: int = 1000, retry_unresolved: bool = False) -> int:
+        """
+        Resolve IATA candidates for stored requests that have not been looked up yet.
+        
+        Needed for databases written before route resolution existed or while the airport
+        codes were unavailable. Cities without an airport are marked as looked up, so they
+        are not scanned again unless retry_unresolved is set (e.g. after updating the
+        airport codes). Does not change the request version.
+        
+        Returns:
+            Number of requests that got codes for their departure or destination
+        """
+        if not self.resolver.available:
+            return 0
+        
+        missing = "departure_iata IS NULL OR destination_iata IS NULL"
+        if retry_unresolved:
+            missing += " OR departure_iata = '' OR destination_iata = ''"
+        resolved = 0
+        last_id = None
+        while True:
+            rows = self.conn.execute(
+                f"SELECT id, departure, destination, departure_iata, destination_iata FROM flight_requests "
+                f"WHERE ({missing}) AND (? IS NULL OR id > ?) ORDER BY id LIMIT ?",
+                (last_id, last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            
+            updates = [
+                (self._route_codes(row["departure"]), self._route_codes(row["destination"]), row["id"])
+                for row in rows
+            ]
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE flight_requests SET departure_iata = ?, destination_iata = ? WHERE id = ?", updates
+                )
+            resolved += sum(
+                1 for row, (departure_iata, destination_iata, _) in zip(rows, updates)
+                if (departure_iata and not row["departure_iata"]) or (destination_iata and not row["destination_iata"])
+            )
+        return resolved
+    
+    def iter_requests(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream every flight request ordered by id, fetching rows in batches."""
+        cursor = self.conn.execute("SELECT * FROM flight_requests ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._row_to_request(row)
     
     def get_pending_requests(self) -> List[Dict]:
         """Get flight requests that are not yet booked."""
-        return [request for request in self.flight_requests if request["flight_booking"] is None]
+        rows = self.conn.execute("SELECT * FROM flight_requests WHERE status = 'pending' ORDER BY id")
+        return [self._row_to_request(row) for row in rows]
     
     def get_booked_requests(self) -> List[Dict]:
         """Get flight requests that are already booked."""
-        return [request for request in self.flight_requests if request["flight_booking"] is not None]
+        rows = self.conn.execute("SELECT * FROM flight_requests WHERE status = 'booked' ORDER BY id")
+        return [self._row_to_request(row) for row in rows]
+    
+    def aggregate_requests(
+        self,
+        group_by: List[str],
+        status: Optional[str] = None,
+        month: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Count flight requests grouped by one or more dimensions.
+        
+        Args:
+            group_by: Dimensions from AGGREGATION_DIMENSIONS (status, route, departure, destination, month, employee)
+            status: Optional status filter ('pending' or 'booked')
+            month: Optional month filter in YYYY-MM format
+            
+        Returns:
+            List of dicts with one key per dimension plus 'count', largest groups first
+        """
+        columns = []
+        for dimension in group_by:
+            if dimension not in AGGREGATION_DIMENSIONS:
+                raise ValueError(f"unknown dimension {dimension!r}")
+            columns.extend(AGGREGATION_DIMENSIONS[dimension])
+        
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if month:
+            conditions.append("substr(date, 1, 7) = ?")
+            params.append(month)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        if not columns:
+            count = self.conn.execute(f"SELECT COUNT(*) FROM flight_requests {where}", params).fetchone()[0]
+            return [{"count": count}]
+        
+        select = ", ".join(f"{column} AS c{i}" for i, column in enumerate(columns))
+        group = ", ".join(columns)
+        rows = self.conn.execute(
+            f"SELECT {select}, COUNT(*) AS count FROM flight_requests {where} "
+            f"GROUP BY {group} ORDER BY count DESC, {group}",
+            params,
+        )
+        
+        results = []
+        for row in rows:
+            values = list(row)
+            result = {}
+            for dimension in group_by:
+                width = len(AGGREGATION_DIMENSIONS[dimension])
+                result[dimension] = " → ".join(str(value) for value in values[:width])
+                values = values[width:]
+            result["count"] = row["count"]
+            results.append(result)
+        return results
+    
+    def apply_updates(self, updates: List[Dict]) -> List[Dict]:
+        """
+        Apply a batch of booking updates in a single transaction.
+        
+        Each update is a compare-and-swap on the request version, so concurrent writers
+        never overwrite each other. The status partition, indexes and idempotency record
+        change together with the booking or not at all.
+        
+        Args:
+            updates: Dicts with request_id, action ('book' or 'cancel'), flight_booking,
+                     expected_version (required) and optional idempotency_key
+            
+        Returns:
+            One result dict per update, in the same order, with a status of 'updated', 'conflict',
+            'not_found' or 'key_reused' (an idempotency key already used for another request), plus
+            'replayed' for repeated idempotency keys
+        """
+        with self.conn:
+            return [self._apply_update(update) for update in updates]
+    
+    def _apply_update(self, update: Dict) -> Dict:
+        """Apply one booking update inside the caller's transaction."""
+        request_id = update["request_id"]
+        idempotency_key = update.get("idempotency_key")
+        
+        if idempotency_key:
+            row = self.conn.execute(
+                "SELECT request_id, result FROM booking_idempotency WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            if row and row["request_id"] != request_id:
+                return {"status": "key_reused", "request_id": request_id, "other_request_id": row["request_id"]}
+            if row:
+                return {**json.loads(row["result"]), "replayed": True}
+        
+        row = self.conn.execute("SELECT * FROM flight_requests WHERE id = ?", (request_id,)).fetchone()
+        if not row:
+            return {"status": "not_found", "request_id": request_id}
+        
+        if row["version"] != update["expected_version"]:
+            return {"status": "conflict", "request_id": request_id, "current_version": row["version"],
+                    "request": self._row_to_request(row)}
+        
+        booking = update.get("flight_booking") if update["action"] == "book" else None
+        cursor = self.conn.execute(
+            "UPDATE flight_requests SET flight_booking = ?, status = ?, version = version + 1 "
+            "WHERE id = ? AND version = ?",
+            (
+                json.dumps(booking) if booking else None,
+                "booked" if booking else "pending",
+                request_id,
+                row["version"],
+            ),
+        )
+        if cursor.rowcount == 0:
+            current = self.conn.execute("SELECT * FROM flight_requests WHERE id = ?", (request_id,)).fetchone()
+            return {"status": "conflict", "request_id": request_id, "current_version": current["version"],
+                    "request": self._row_to_request(current)}
+        
+        updated = self.conn.execute("SELECT * FROM flight_requests WHERE id = ?", (request_id,)).fetchone()
+        result = {"status": "updated", "request_id": request_id, "request": self._row_to_request(updated)}
+        
+        if idempotency_key:
+            self.conn.execute(
+                "INSERT INTO booking_idempotency (idempotency_key, request_id, result, created_at) VALUES (?, ?, ?, ?)",
+                (idempotency_key, request_id, json.dumps(result), datetime.now().isoformat()),
+            )
+        return result
+    
+    def find_request_by_id(self, request_id: int) -> Optional[Dict]:
+        """Find a flight request by its id."""
+        row = self.conn.execute("SELECT * FROM flight_requests WHERE id = ?", (request_id,)).fetchone()
+        return self._row_to_request(row) if row else None
     
     def find_request_by_name(self, name: str) -> Optional[Dict]:
         """Find a flight request by employee name."""
-        for request in self.flight_requests:
-            if request["name"].lower() == name.lower():
-                return request
-        return None
+        row = self.conn.execute(
+            "SELECT * FROM flight_requests WHERE name = ? COLLATE NOCASE ORDER BY id LIMIT 1",
+            (name.strip(),)
+        ).fetchone()
+        return self._row_to_request(row) if row else None
+
+
+class BookingWriter:
+    """
+    Batches booking updates from concurrent operators into shared transactions.
+    
+    Updates for the same request are serialized with a per-request lock, so there is no
+    global write lock; updates for different requests that arrive within max_delay are
+    committed together in one transaction. Transactions are committed one at a time on a
+    writer thread, so the event loop never waits on sqlite.
+    """
+    
+    def __init__(self, db: EmployeeFlightRequestDatabase, max_batch_size: int = 100, max_delay: float = 0.005):
+        self.db = db
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="booking-writer")
+        self._commits: Set[asyncio.Task] = set()
+    
+    async def submit(self, update: Dict) -> Dict:
+        """Queue an update for the next batch and wait for its result."""
+        lock = self._locks.get(update["request_id"])
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[update["request_id"]] = lock
+        
+        async with lock:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending.append((update, future))
+            
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_delay, self._flush)
+            
+            return await future
+    
+    def _flush(self) -> None:
+        """Start committing every pending update in one transaction."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        commit = asyncio.get_running_loop().create_task(self._commit(batch))
+        self._commits.add(commit)
+        commit.add_done_callback(self._commits.discard)
+    
+    async def _commit(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        """Apply the batch on the writer thread and resolve its futures."""
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.db.apply_updates, [update for update, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+DIMENSION_SYNONYMS = {
+    "status": "status",
+    "route": "route",
+    "departure": "departure",
+    "origin": "departure",
+    "destination": "destination",
+    "city": "destination",
+    "cities": "destination",
+    "month": "month",
+    "employee": "employee",
+    "person": "employee",
+    "name": "employee",
+}
+
+# Whole words only: substring matching sent "account", "country" or "check Count Basie's request" to the statistics
+# path. "count" must be followed by what is counted and "per" by a dimension, since both also occur in names.
+STATISTICS_PATTERN = re.compile(
+    r"\b(?:how many|statistics|stats|breakdown|number of|group(?:ed)? by)\b"
+    r"|\bcount(?: of| the| all)?(?: \w+)? (?:requests|bookings|flights)\b"
+    r"|\bcount by\b"
+    r"|\bper (?:" + "|".join(DIMENSION_SYNONYMS) + r")"
+)
+
+
+def parse_statistics_query(query: str) -> Dict[str, Any]:
+    """
+    Extract group-by dimensions and filters from a natural language statistics query.
+    
+    Args:
+        query: Query such as 'how many requests are pending per destination this month'
+        
+    Returns:
+        Dict with group_by, status and month keys for EmployeeFlightRequestDatabase.aggregate_requests
+    """
+    query_lower = query.lower()
+    
+    group_by = []
+    for match in re.finditer(r"\b(?:per|by|each)\s+([\w\s,]+)", query_lower):
+        for word in re.split(r"[\s,]+", match.group(1).strip()):
+            if word == "and":
+                continue
+            dimension = DIMENSION_SYNONYMS.get(word) or DIMENSION_SYNONYMS.get(word[:-1]) or DIMENSION_SYNONYMS.get(word[:-2])
+            if not dimension:
+                break
+            if dimension not in group_by:
+                group_by.append(dimension)
+    
+    status = None
+    if "status" not in group_by:
+        if "pending" in query_lower or "not booked" in query_lower:
+            status = "pending"
+        elif "booked" in query_lower or "confirmed" in query_lower:
+            status = "booked"
+    
+    month = None
+    explicit_month = re.search(r"\b(\d{4}-\d{2})\b", query_lower)
+    today = datetime.now()
+    if explicit_month:
+        month = explicit_month.group(1)
+    elif "this month" in query_lower:
+        month = today.strftime("%Y-%m")
+    elif "next month" in query_lower:
+        month = f"{today.year + 1}-01" if today.month == 12 else f"{today.year}-{today.month + 1:02d}"
+    elif "last month" in query_lower:
+        month = f"{today.year - 1}-12" if today.month == 1 else f"{today.year}-{today.month - 1:02d}"
+    
+    if not group_by:
+        group_by = ["status"] if status is None else []
+    
+    return {"group_by": group_by, "status": status, "month": month}
 
 
 class EmployeeFlightRequestAgent:
     """Agent specialized in employee flight request management and status checking."""
     
-    def __init__(self):
-        """Initialize the agent with in-memory flight request database."""
-        self.db = EmployeeFlightRequestDatabase()
-        print(f"✅ Initialized flight request database with {len(self.db.flight_requests)} records")
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize the agent with the flight request database.
+
+        Args:
+            db_path: SQLite file to use instead of EMPLOYEE_DB_PATH
+        """
+        self.db = EmployeeFlightRequestDatabase(db_path)
+        self.booking_writer = BookingWriter(self.db)
+        print(f"✅ Initialized flight request database with {self.db.count()} records ({self.db.db_path})")
     
     async def invoke(self, query: str = None) -> str:
         """
@@ -131,9 +769,16 @@ class EmployeeFlightRequestAgent:
         Returns:
             String with operation results
         """
+        if query.strip().startswith("{"):
+            result = await self.update_booking(query)
+            return result
+        
         query_lower = query.lower()
         
-        if "pending" in query_lower or "left" in query_lower or "available" in query_lower or "not booked" in query_lower:
+        if STATISTICS_PATTERN.search(query_lower):
+            result = await self.aggregate_statistics(query)
+            return result
+        elif "pending" in query_lower or "left" in query_lower or "available" in query_lower or "not booked" in query_lower:
             result = await self.list_pending_requests()
             return result
         elif "booked" in query_lower or "taken" in query_lower or "purchased" in query_lower or "confirmed" in query_lower:
@@ -143,6 +788,109 @@ class EmployeeFlightRequestAgent:
             result = await self.check_employee_request(query)
             return result
     
+    async def update_booking(self, query: str) -> str:
+        """
+        Attach a flight to a request (or cancel its booking) with optimistic concurrency.
+        
+        Args:
+            query: JSON command, e.g. {"action": "book", "request_id": 4, "flight": "EI155",
+                   "seat": "3A", "gate": "B2", "expected_version": 1, "idempotency_key": "..."}
+            
+        Returns:
+            String with the update result, or the current version if the request changed meanwhile
+        """
+        try:
+            command = json.loads(query)
+            action = command.get("action", "book")
+            if action not in ("book", "cancel"):
+                raise ValueError(f"unknown action {action!r}, expected 'book' or 'cancel'")
+            if command.get("expected_version") is None:
+                raise ValueError("expected_version is required, check the request for its current version")
+            
+            update = {
+                "request_id": int(command["request_id"]),
+                "action": action,
+                "expected_version": int(command["expected_version"]),
+                "idempotency_key": command.get("idempotency_key"),
+            }
+            if action == "book":
+                if not command.get("flight"):
+                    raise ValueError("flight is required to book a request")
+                update["flight_booking"] = {
+                    **{field: str(command.get(field) or "") for field in BOOKING_FIELDS},
+                    "purchased": bool(command.get("purchased", True)),
+                }
+        except (KeyError, TypeError, ValueError) as e:
+            return f"❌ Invalid booking update: {e}"
+        
+        result = await self.booking_writer.submit(update)
+        
+        if result["status"] == "not_found":
+            return f"❌ No flight request found with id {update['request_id']}"
+        if result["status"] == "key_reused":
+            return f"❌ idempotency_key {update['idempotency_key']!r} was already used for request " \
+                   f"#{result['other_request_id']}; use a new key for request #{update['request_id']}"
+        
+        request = result["request"]
+        if result["status"] == "conflict":
+            return f"⚠️ Request #{request['id']} for {request['name']} was modified by someone else " \
+                   f"(current version {result['current_version']}, expected {update['expected_version']}).\n" \
+                   f"Check the request again and retry with expected_version={result['current_version']}."
+        
+        replayed = " (already applied, idempotent replay)" if result.get("replayed") else ""
+        if request["flight_booking"] is None:
+            return f"✅ Booking cancelled for {request['name']} (request #{request['id']}, version {request['version']}){replayed}\n" \
+                   f"🛫 Route: {request['departure']} → {request['destination']}\n" \
+                   f"📅 Date: {request['date']}"
+        
+        booking_info = request["flight_booking"]
+        return f"✅ {request['name']} is now booked (request #{request['id']}, version {request['version']}){replayed}\n" \
+               f"🛫 Route: {request['departure']} → {request['destination']}\n" \
+               f"📅 Date: {request['date']}\n" \
+               f"✈️ Flight: {booking_info['flight']}\n" \
+               f"💺 Seat: {booking_info['seat']}\n" \
+               f"🚪 Gate: {booking_info['gate']}"
+    
+    async def aggregate_statistics(self, query: str) -> str:
+        """
+        Answer counting questions with a compact table of grouped request counts.
+        
+        Args:
+            query: Statistics query, e.g. 'how many requests are pending per destination this month'
+            
+        Returns:
+            String with one row per group instead of every matching record
+        """
+        params = parse_statistics_query(query)
+        rows = self.db.aggregate_requests(**params)
+        
+        filters = [f"{key}={params[key]}" for key in ("status", "month") if params[key]]
+        title = f"📊 FLIGHT REQUEST STATISTICS ({', '.join(filters) if filters else 'all requests'})"
+        
+        if not params["group_by"]:
+            return f"{title}\nTotal: {rows[0]['count']}"
+        
+        if not rows:
+            return f"{title}\nNo matching flight requests."
+        
+        header = " | ".join(params["group_by"] + ["requests"])
+        result_lines = [title, "", header]
+        for row in rows:
+            result_lines.append(" | ".join([row[dimension] for dimension in params["group_by"]] + [str(row["count"])]))
+        result_lines.extend(["", f"Total: {sum(row['count'] for row in rows)}"])
+        
+        return "\n".join(result_lines)
+    
+    @staticmethod
+    def _format_route_codes(request: Dict, indent: str = "") -> List[str]:
+        """Format the precomputed IATA pair of a request as ready-to-search lines."""
+        if not request["departure_iata"]:
+            return []
+        
+        lines = [f"{indent}✈️ IATA: {'/'.join(request['departure_iata'])} → {'/'.join(request['destination_iata']) or '?'}"]
+        lines.append(f"{indent}🔎 Search: 'search flights from {request['departure_iata'][0]} on {request['date']}'")
+        return lines
+    
     async def list_pending_requests(self) -> str:
         """
         List all flight requests that are not yet booked.
@@ -160,8 +908,10 @@ class EmployeeFlightRequestAgent:
         for request in pending_requests:
             result_lines.extend([
                 f"  • {request['name']}",
+                f"    🆔 Request: #{request['id']} (version {request['version']})",
                 f"    🛫 Route: {request['departure']} → {request['destination']}",
                 f"    📅 Date: {request['date']}",
+                *self._format_route_codes(request, indent="    "),
                 "    📋 Status: Awaiting booking",
                 ""
             ])
@@ -186,6 +936,7 @@ class EmployeeFlightRequestAgent:
             booking_info = request['flight_booking']
             result_lines.extend([
                 f"  • {request['name']}",
+                f"    🆔 Request: #{request['id']} (version {request['version']})",
                 f"    🛫 Route: {request['departure']} → {request['destination']}",
                 f"    📅 Date: {request['date']}",
                 f"    ✈️ Flight: {booking_info['flight']}",
@@ -212,12 +963,17 @@ class EmployeeFlightRequestAgent:
             return f"❌ No flight request found for '{query}'"
         
         if request["flight_booking"] is None:
-            return f"⏳ {request['name']} has a pending flight request that is not booked yet.\n" \
-                   f"🛫 Route: {request['departure']} → {request['destination']}\n" \
-                   f"📅 Date: {request['date']}"
+            return "\n".join([
+                f"⏳ {request['name']} has a pending flight request that is not booked yet.",
+                f"🆔 Request: #{request['id']} (version {request['version']})",
+                f"🛫 Route: {request['departure']} → {request['destination']}",
+                f"📅 Date: {request['date']}",
+                *self._format_route_codes(request),
+            ])
         else:
             booking_info = request["flight_booking"]
             return f"✅ {request['name']} has a booked flight!\n" \
+                   f"🆔 Request: #{request['id']} (version {request['version']})\n" \
                    f"🛫 Route: {request['departure']} → {request['destination']}\n" \
                    f"📅 Date: {request['date']}\n" \
                    f"✈️ Flight: {booking_info['flight']}\n" \
@@ -228,8 +984,8 @@ class EmployeeFlightRequestAgent:
 class EmployeeFlightRequestAgentExecutor(AgentExecutor):
     """Employee flight request management agent executor."""
 
-    def __init__(self):
-        self.agent = EmployeeFlightRequestAgent()
+    def __init__(self, db_path: Optional[str] = None):
+        self.agent = EmployeeFlightRequestAgent(db_path)
 
     async def execute(
         self,
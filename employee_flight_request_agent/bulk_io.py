@@ -0,0 +1,198 @@
+"""
+Bulk import/export of employee flight requests (CSV or JSONL).
+
+Records are streamed from/to disk and written in batched transactions, so memory
+use stays constant regardless of the extract size.
+
+Run from the employee_flight_request_agent/ directory:
+    python bulk_io.py import hr_extract.csv --db employee_requests.db
+    python bulk_io.py export backup.jsonl --db employee_requests.db
+    python bulk_io.py resolve-codes --db employee_requests.db
+
+Route IATA codes are resolved as records are imported when databases/airport-codes.csv is
+present. resolve-codes fills them in for records written before the file was added, and
+with --retry-unresolved also looks up again the cities that had no airport.
+
+Start the agent with EMPLOYEE_DB_PATH pointing to the same database file to serve the imported records.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agent_executor import BOOKING_FIELDS, AirportCodeResolver, EmployeeFlightRequestDatabase, validate_flight_request
+
+CSV_COLUMNS = ["id", "name", "departure", "destination", "date", *BOOKING_FIELDS, "purchased"]
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+
+def detect_format(path: str, file_format: Optional[str] = None) -> str:
+    """Return 'csv' or 'jsonl' from the explicit format or the file extension."""
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def _csv_row_to_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """Map a flat CSV row to the nested flight request structure."""
+    record: Dict[str, Any] = {field: row.get(field) for field in ("id", "name", "departure", "destination", "date")}
+    if (row.get("flight") or "").strip():
+        purchased = (row.get("purchased") or "true").strip().lower()
+        record["flight_booking"] = {
+            **{field: (row.get(field) or "").strip() for field in BOOKING_FIELDS},
+            "purchased": purchased in ("1", "true", "yes", "y"),
+        }
+    else:
+        record["flight_booking"] = None
+    return record
+
+
+def read_rows(path: str, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """Stream (line_number, row) tuples from a CSV or JSONL file: a CSV row dict, or a JSONL line still to be parsed."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            yield from enumerate(csv.DictReader(f), start=2)
+        else:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if line:
+                    yield line_number, line
+
+
+def parse_row(row: Any, file_format: str) -> Dict[str, Any]:
+    """Turn a row from read_rows into a raw flight request record, raising ValueError if it is not one."""
+    if file_format == "csv":
+        return _csv_row_to_record(row)
+    try:
+        record = json.loads(row)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e.msg} at column {e.colno})") from None
+    if not isinstance(record, dict):
+        raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+    return record
+
+
+def import_requests(
+    db: EmployeeFlightRequestDatabase,
+    path: str,
+    file_format: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Validate and upsert flight requests from a file in batched transactions.
+
+    Args:
+        db: Target database
+        path: CSV or JSONL file to import
+        file_format: 'csv' or 'jsonl' (detected from the extension when omitted)
+        batch_size: Number of records per transaction
+
+    Returns:
+        Dict with read, upserted and rejected counts plus the first validation errors
+    """
+    file_format = detect_format(path, file_format)
+    report: Dict[str, Any] = {"read": 0, "upserted": 0, "rejected": 0, "errors": []}
+    batch: List[Dict[str, Any]] = []
+
+    for line_number, row in read_rows(path, file_format):
+        report["read"] += 1
+        try:
+            batch.append(validate_flight_request(parse_row(row, file_format)))
+        except ValueError as e:
+            report["rejected"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append(f"line {line_number}: {e}")
+            continue
+
+        if len(batch) >= batch_size:
+            report["upserted"] += db.upsert_many(batch)
+            batch = []
+
+    if batch:
+        report["upserted"] += db.upsert_many(batch)
+
+    return report
+
+
+def export_requests(
+    db: EmployeeFlightRequestDatabase,
+    path: str,
+    file_format: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Stream every flight request from the database into a CSV or JSONL file.
+
+    Returns:
+        Number of records exported
+    """
+    file_format = detect_format(path, file_format)
+    exported = 0
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS) if file_format == "csv" else None
+        if writer:
+            writer.writeheader()
+
+        for request in db.iter_requests(batch_size):
+            if writer:
+                booking = request["flight_booking"] or {}
+                writer.writerow({
+                    **{field: request[field] for field in ("id", "name", "departure", "destination", "date")},
+                    **{field: booking.get(field, "") for field in BOOKING_FIELDS},
+                    "purchased": booking.get("purchased", "") if booking else "",
+                })
+            else:
+                f.write(json.dumps(request) + "\n")
+            exported += 1
+
+    return exported
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import/export of employee flight requests")
+    parser.add_argument("command", choices=["import", "export", "resolve-codes"])
+    parser.add_argument("path", nargs="?", help="CSV or JSONL file (import and export)")
+    parser.add_argument("--db", default=os.getenv("EMPLOYEE_DB_PATH"), help="SQLite database file (default: EMPLOYEE_DB_PATH)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="File format (default: detected from extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Records per transaction")
+    parser.add_argument("--airports", help="Airport codes CSV (default: databases/airport-codes.csv)")
+    parser.add_argument("--retry-unresolved", action="store_true",
+                        help="resolve-codes: also look up again the cities that had no airport")
+    args = parser.parse_args(argv)
+
+    if not args.db:
+        parser.error("--db or EMPLOYEE_DB_PATH is required")
+    if args.command != "resolve-codes" and not args.path:
+        parser.error(f"a file is required to {args.command}")
+
+    db = EmployeeFlightRequestDatabase(db_path=args.db, seed=False, resolver=AirportCodeResolver(args.airports))
+
+    if args.command == "resolve-codes":
+        if not db.resolver.available:
+            print(f"❌ Airport codes not available: {db.resolver.load_error or db.resolver.airports_csv_path}")
+            return 1
+        resolved = db.resolve_missing_route_codes(args.batch_size, retry_unresolved=args.retry_unresolved)
+        print(f"✅ Resolved route codes for {resolved} records in {args.db}")
+        return 0
+
+    if args.command == "import":
+        report = import_requests(db, args.path, args.format, args.batch_size)
+        print(f"✅ Imported {report['upserted']} of {report['read']} records into {args.db} ({report['rejected']} rejected)")
+        for error in report["errors"]:
+            print(f"  ⚠️  {error}")
+        return 1 if report["rejected"] else 0
+
+    exported = export_requests(db, args.path, args.format, args.batch_size)
+    print(f"✅ Exported {exported} records from {args.db} to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
 """
 A2A Agent for Flight Search functionality with Push Notification capabilities.
 """
+import os
+import sys
+
 import httpx
-import uvicorn
+from starlette.applications import Starlette
 from uuid import uuid4
 
 from a2a.server.apps import A2AStarletteApplication
 from custom_request_handler import CustomRequestHandler
-from a2a.server.tasks import InMemoryTaskStore, InMemoryPushNotifier
+from push_config_store import SqlitePushNotifier
+from push_dispatcher import PushNotificationDispatcher
+from a2a.server.tasks import InMemoryPushNotifier
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -16,12 +21,21 @@ from a2a.types import (
     TaskStatus,
     TaskState,
 )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.event_queue import create_queue_manager
+from common.metrics import add_metrics_route
+from common.serving import add_lifespan_hooks, is_primary_worker, parse_server_args, serve, shared_db_path
+from common.task_store import create_task_store
 from agent_executor import (
     FlightSearchAgentExecutor,
 )
 
 if __name__ == '__main__':
 
+    args = parse_server_args('Flight Search Agent', default_port=9993)
+
     flight_search_skill = AgentSkill(
         id='flight_search',
         name='Flight Search',
@@ -39,7 +53,7 @@ if __name__ == '__main__':
     public_agent_card = AgentCard(
         name='Flight Search Agent',
         description='Real-time flight search agent with push notification capabilities for aviation data',
-        url='http://localhost:9993/',
+        url=f'http://localhost:{args.port}/',
         version='1.0.0',
         defaultInputModes=['text'],
         defaultOutputModes=['text'],
@@ -56,15 +70,69 @@ if __name__ == '__main__':
         )
     )
 
-    request_handler = CustomRequestHandler(
-        agent_executor=FlightSearchAgentExecutor(),
-        task_store=InMemoryTaskStore(),
-        push_notifier=InMemoryPushNotifier(httpx_client=httpx.AsyncClient())
-    )
+    # Built before forking so every worker shares the model client and graph.
+    agent_executor = FlightSearchAgentExecutor()
 
-    server = A2AStarletteApplication(
-        agent_card=public_agent_card,
-        http_handler=request_handler,
-    )
+    def create_app() -> Starlette:
+        """Build one worker's app with its own HTTP client, push dispatcher, task store and event queues."""
+        httpx_client = httpx.AsyncClient()
+        push_config_db_path = shared_db_path('PUSH_CONFIG_DB_PATH', 'flight-search-push.db', args.workers)
+        if push_config_db_path:
+            push_notifier = SqlitePushNotifier(
+                httpx_client=httpx_client, db_path=push_config_db_path, shared=args.workers > 1
+            )
+        else:
+            push_notifier = InMemoryPushNotifier(httpx_client=httpx_client)
+        push_dispatcher = PushNotificationDispatcher(
+            push_notifier=push_notifier,
+            httpx_client=httpx_client,
+            max_queue_size=int(os.getenv('PUSH_QUEUE_SIZE', '1000')),
+            workers=int(os.getenv('PUSH_WORKERS', '4')),
+            max_retries=int(os.getenv('PUSH_MAX_RETRIES', '3')),
+            filter_ttl=float(os.getenv('TASK_STORE_TTL_SECONDS', '3600')) or None,
+        )
+
+        task_store = create_task_store(
+            shared_db_path('TASK_STORE_PATH', 'flight-search-tasks.db', args.workers), shared=args.workers > 1
+        )
+        queue_manager = create_queue_manager()
+
+        request_handler = CustomRequestHandler(
+            agent_executor=agent_executor,
+            task_store=task_store,
+            queue_manager=queue_manager,
+            push_notifier=push_notifier,
+            push_dispatcher=push_dispatcher,
+        )
+
+        server = A2AStarletteApplication(
+            agent_card=public_agent_card,
+            http_handler=request_handler,
+        )
+
+        app = server.build()
+        metrics_sources = {
+            'push_notifications': push_dispatcher,
+            'task_store': task_store,
+            'event_queues': queue_manager,
+            'execution': agent_executor.execution_policy,
+            'checkpointer': agent_executor.agent.memory,
+            'prompt_cache': agent_executor.agent.prompt_cache_usage,
+        }
+        if isinstance(push_notifier, SqlitePushNotifier):
+            metrics_sources['push_configs'] = push_notifier
+        add_metrics_route(app, metrics_sources)
+        # Undelivered notifications are re-sent by one worker only.
+        startup_hooks = [push_dispatcher.restore] if is_primary_worker() else []
+        shutdown_hooks = [
+            push_dispatcher.aclose,
+            agent_executor.execution_policy.shutdown,
+            agent_executor.agent.memory.close,
+            httpx_client.aclose,
+        ]
+        if hasattr(task_store, 'aclose'):
+            shutdown_hooks.append(task_store.aclose)
+        add_lifespan_hooks(app, startup=startup_hooks, shutdown=shutdown_hooks)
+        return app
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9993) 
\ No newline at end of file
+    serve(create_app, args.host, args.port, args.workers) 
\ No newline at end of file
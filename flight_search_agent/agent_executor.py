@@ -12,13 +12,17 @@ from dotenv import load_dotenv
 from langchain_anthropic import ChatAnthropic
 from langchain_core.tools import tool
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.utils import new_agent_text_message, new_task
-from a2a.types import Part, TextPart, TaskState, Task, Message, Role, TaskStatus
+from a2a.types import DataPart, Part, TextPart, TaskState, Task, Message, Role, TaskStatus
+
+from common.checkpointer import create_checkpointer
+from common.execution import ExecutionMode, ExecutionPolicy, create_execution_policy
+from common.prompt_cache import PromptCacheUsage, cache_tool_definitions, cached_prompt
+from common.push_payload import build_flight_search_payload
 
 load_dotenv()
 
@@ -236,20 +240,27 @@ def search_flights_tool(iata_code: str, date: str, flight_type: str = "departure
 class FlightSearchAgent:
     """ReAct agent specialized in flight search with push notification capabilities."""
     
-    def __init__(self):
-        """Initialize the ReAct agent with tools."""
+    def __init__(self, execution_policy: ExecutionPolicy = None):
+        """Initialize the ReAct agent with tools.
+
+        Args:
+            execution_policy: Where the blocking graph invocation runs (inline in the event loop by default)
+        """
+        self.execution_policy = execution_policy or ExecutionPolicy('flight-search', mode=ExecutionMode.inline)
         self.tools = [search_flights_tool]
         
+        self.prompt_cache_usage = PromptCacheUsage('flight-search')
         self.model = ChatAnthropic(
             model="claude-3-5-sonnet-20241022",
-            temperature=0
+            temperature=0,
+            callbacks=[self.prompt_cache_usage]
         )
         
-        self.memory = MemorySaver()
+        # Every task runs in its own thread, so old threads are pruned and evicted.
+        self.memory = create_checkpointer()
         
-        system_prompt = f"""You are a Flight Search Agent specialized in finding flights using real-time aviation data.
-
-Current date: {datetime.now().strftime('%B %d, %Y')}
+        # Static so it can be cached; the current date is sent after the cache breakpoint.
+        system_prompt = """You are a Flight Search Agent specialized in finding flights using real-time aviation data.
 
 Your capabilities:
 1. Search for flights using the search_flights_tool with airport IATA codes and dates
@@ -277,9 +288,9 @@ For flight searches, focus on:
 """
         self.agent_graph = create_react_agent(
             model=self.model,
-            tools=self.tools,
+            tools=cache_tool_definitions(self.tools),
             checkpointer=self.memory,
-            prompt=system_prompt
+            prompt=cached_prompt(system_prompt, lambda: f"Current date: {datetime.now().strftime('%B %d, %Y')}")
         )
         
         print("✅ Initialized Flight Search ReAct Agent with Aviation Stack API")
@@ -304,9 +315,10 @@ For flight searches, focus on:
             
             last_message = ""
 
-            response = self.agent_graph.invoke(
+            response = await self.execution_policy.run(
+                self.agent_graph.invoke,
                 {"messages": messages},
-                config=config
+                config
             )
             print("✅ Flight search completed!")
 
@@ -314,13 +326,8 @@ For flight searches, focus on:
             
             final_response = last_message if last_message else "Flight search completed - check the results above."
             
-            push_notification_payload = {
-                "flights": final_response,
-                "source": "flight_search_agent",
-                "metadata": {"task_id": task_id, "context_id": context_id}
-            }
-            
-            part = TextPart(text=json.dumps(push_notification_payload))
+            # Structured data, so the webhook decodes the notification once instead of unwrapping JSON strings.
+            part = DataPart(data=build_flight_search_payload(task_id, context_id, final_response))
             message = Message(
                 role=Role.agent,
                 parts=[part],
@@ -333,7 +340,10 @@ For flight searches, focus on:
         except Exception as e:
             error_msg = f"❌ Error occurred during flight search: {str(e)}"
             
-            part = TextPart(text=error_msg)
+            # Errors go in the same payload, so the webhook can tell the user the search failed.
+            part = DataPart(data=build_flight_search_payload(
+                task_id, context_id, error_msg, error=str(e) or type(e).__name__
+            ))
             message = Message(
                 role=Role.agent,
                 parts=[part],
@@ -345,10 +355,19 @@ For flight searches, focus on:
 
 
 class FlightSearchAgentExecutor(AgentExecutor):
-    """Flight search agent executor with ReAct capabilities."""
+    """Flight search agent executor with ReAct capabilities.
 
-    def __init__(self):
-        self.agent = FlightSearchAgent()
+    The graph invocation, which blocks on the model and the Aviation Stack API, runs in
+    the thread pool configured by FLIGHT_SEARCH_EXECUTION_WORKERS and
+    FLIGHT_SEARCH_MAX_CONCURRENCY. The graph and its memory cannot be shared with
+    another process, so a process pool is not supported.
+    """
+
+    def __init__(self, execution_policy: ExecutionPolicy = None):
+        self.execution_policy = execution_policy or create_execution_policy(
+            'flight-search', 'FLIGHT_SEARCH', supports_process=False
+        )
+        self.agent = FlightSearchAgent(execution_policy=self.execution_policy)
 
     async def execute(
         self,
@@ -371,7 +390,10 @@ class FlightSearchAgentExecutor(AgentExecutor):
         message = await self.agent.invoke(context.current_task.id, context.current_task.contextId, query)
 
         await updater.update_status(TaskState.working, message)
-        await updater.update_status(TaskState.completed)
+        if message.parts[0].root.data.get("error"):
+            await updater.update_status(TaskState.failed)
+        else:
+            await updater.update_status(TaskState.completed)
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
@@ -17,6 +17,7 @@ from a2a.types import (
 from a2a.utils.errors import ServerError
 
 from a2a.server.request_handlers import DefaultRequestHandler
+from push_dispatcher import PushNotificationDispatcher, PushNotificationFilter
 
 
 logger = logging.getLogger(__name__)
@@ -27,8 +28,20 @@ class CustomRequestHandler(DefaultRequestHandler):
     
     This handler maintains all default functionality while providing
     custom implementation for the streaming message send method.
+
+    When a push_dispatcher is given, push notifications are handed to it
+    instead of being sent inline, so streaming never waits on the webhook.
     """
 
+    def __init__(
+        self,
+        *args,
+        push_dispatcher: PushNotificationDispatcher | None = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._push_dispatcher = push_dispatcher
+
     async def on_message_send_stream(
         self,
         params: MessageSendParams,
@@ -82,6 +95,9 @@ class CustomRequestHandler(DefaultRequestHandler):
         )
 
         task_id = cast('str', request_context.task_id)
+        notification_filter = PushNotificationFilter.from_metadata(params.metadata)
+        if self._push_dispatcher:
+            self._push_dispatcher.set_filter(task_id, notification_filter)
         queue = await self._queue_manager.create_or_tap(task_id)
         producer_task = asyncio.create_task(
             self._run_event_stream(
@@ -119,7 +135,14 @@ class CustomRequestHandler(DefaultRequestHandler):
                 if self._push_notifier and task_id:
                     latest_task = await result_aggregator.current_result
                     if isinstance(latest_task, Task):
-                        await self._push_notifier.send_notification(latest_task)
+                        if self._push_dispatcher:
+                            await self._push_dispatcher.submit(latest_task)
+                        elif not notification_filter:
+                            await self._push_notifier.send_notification(latest_task)
+                        elif notification_filter.accepts(latest_task):
+                            await self._push_notifier.send_notification(
+                                notification_filter.apply(latest_task)
+                            )
                 yield event
         except Exception as e:
             print(f"❌ {e}")
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from a2a.server.tasks import InMemoryPushNotifier
+from a2a.types import PushNotificationConfig, Task
+
+
+logger = logging.getLogger(__name__)
+
+
+class SqlitePushNotifier(InMemoryPushNotifier):
+    """Push notifier whose configs and undelivered notifications are kept in sqlite.
+
+    Configs are read through an in-memory cache, and set_info skips the write when the
+    config for a task has not changed, which is the common case since the streaming
+    handler sets it again for every Task event. Final notifications that have not been
+    delivered yet are kept in a pending table so they can be sent after a restart.
+
+    With shared=True the file is shared with other worker processes and get_info always
+    reads sqlite, since another worker may have changed the config.
+    """
+
+    def __init__(
+        self,
+        httpx_client: httpx.AsyncClient,
+        db_path: str,
+        pending_ttl_seconds: float = 86400,
+        shared: bool = False,
+    ):
+        super().__init__(httpx_client=httpx_client)
+        self.db_path = db_path
+        self.shared = shared
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self._cache: Dict[str, PushNotificationConfig] = {}
+        self._cache_lock = asyncio.Lock()
+        self._db_lock = threading.Lock()
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.skipped_writes = 0
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS push_configs ('
+                'task_id TEXT PRIMARY KEY, config TEXT NOT NULL, updated_at REAL NOT NULL)'
+            )
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS pending_notifications ('
+                'task_id TEXT PRIMARY KEY, task TEXT NOT NULL, enqueued_at REAL NOT NULL)'
+            )
+
+    async def set_info(self, task_id: str, notification_config: PushNotificationConfig) -> None:
+        async with self._cache_lock:
+            if self._cache.get(task_id) == notification_config:
+                self.skipped_writes += 1
+                return
+            self._cache[task_id] = notification_config
+        await asyncio.to_thread(
+            self._execute,
+            'INSERT OR REPLACE INTO push_configs (task_id, config, updated_at) VALUES (?, ?, ?)',
+            (task_id, notification_config.model_dump_json(exclude_none=True), time.time()),
+        )
+
+    async def get_info(self, task_id: str) -> PushNotificationConfig | None:
+        if not self.shared:
+            async with self._cache_lock:
+                config = self._cache.get(task_id)
+            if config is not None:
+                self.cache_hits += 1
+                return config
+
+        self.cache_misses += 1
+        row = await asyncio.to_thread(self._fetchone, 'SELECT config FROM push_configs WHERE task_id = ?', (task_id,))
+        if row is None:
+            return None
+        config = PushNotificationConfig.model_validate_json(row[0])
+        async with self._cache_lock:
+            self._cache[task_id] = config
+        return config
+
+    async def delete_info(self, task_id: str) -> None:
+        async with self._cache_lock:
+            self._cache.pop(task_id, None)
+        await asyncio.to_thread(self._execute, 'DELETE FROM push_configs WHERE task_id = ?', (task_id,))
+
+    async def save_pending(self, task: Task) -> None:
+        """Keep a notification until it has been delivered."""
+        await asyncio.to_thread(
+            self._execute,
+            'INSERT OR REPLACE INTO pending_notifications (task_id, task, enqueued_at) VALUES (?, ?, ?)',
+            (task.id, task.model_dump_json(exclude_none=True), time.time()),
+        )
+
+    async def delete_pending(self, task_id: str) -> None:
+        """Forget a notification once it has been delivered."""
+        await asyncio.to_thread(self._execute, 'DELETE FROM pending_notifications WHERE task_id = ?', (task_id,))
+
+    async def load_pending(self) -> List[Task]:
+        """Return notifications left undelivered by a previous run, dropping expired ones and old configs."""
+        cutoff = time.time() - self.pending_ttl_seconds
+        await asyncio.to_thread(self._execute, 'DELETE FROM pending_notifications WHERE enqueued_at < ?', (cutoff,))
+        await asyncio.to_thread(self._execute, 'DELETE FROM push_configs WHERE updated_at < ?', (cutoff,))
+        rows = await asyncio.to_thread(self._fetchall, 'SELECT task FROM pending_notifications ORDER BY enqueued_at', ())
+        return [Task.model_validate_json(row[0]) for row in rows]
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._db_lock, self.conn:
+            self.conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params: tuple) -> Optional[tuple]:
+        with self._db_lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: tuple) -> List[tuple]:
+        with self._db_lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache and persistence counters."""
+        with self._db_lock:
+            configs = self.conn.execute('SELECT COUNT(*) FROM push_configs').fetchone()[0]
+            pending = self.conn.execute('SELECT COUNT(*) FROM pending_notifications').fetchone()[0]
+        return {
+            'cached_configs': len(self._cache),
+            'persisted_configs': configs,
+            'pending_notifications': pending,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'skipped_writes': self.skipped_writes,
+        }
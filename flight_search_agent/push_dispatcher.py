@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from a2a.server.tasks import PushNotifier
+from a2a.types import Task, TaskState
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected}
+
+PUSH_FILTER_METADATA_KEY = 'pushNotificationFilter'
+HISTORY_MODES = ('full', 'last', 'none')
+
+
+class PushNotificationFilter:
+    """Per-subscription policy for which task states are pushed and how much history they carry.
+
+    PushNotificationConfig has no metadata field, so subscribers send the policy in the
+    message/stream request metadata under 'pushNotificationFilter', e.g.
+    {"states": ["completed", "failed"], "history": "last"}.
+    """
+
+    def __init__(self, states: Optional[Set[TaskState]] = None, history: str = 'full'):
+        if history not in HISTORY_MODES:
+            raise ValueError(f'history must be one of {HISTORY_MODES}, got {history!r}')
+        self.states = states
+        self.history = history
+
+    @classmethod
+    def from_metadata(cls, metadata: Optional[Dict[str, Any]]) -> Optional['PushNotificationFilter']:
+        """Build a filter from request metadata, or return None if the request has none."""
+        config = (metadata or {}).get(PUSH_FILTER_METADATA_KEY)
+        if not config:
+            return None
+        try:
+            states = {TaskState(state) for state in config['states']} if config.get('states') else None
+            return cls(states=states, history=config.get('history', 'full'))
+        except (TypeError, ValueError) as e:
+            logger.warning(f'Ignoring invalid push notification filter {config!r}: {e}')
+            return None
+
+    def accepts(self, task: Task) -> bool:
+        """Whether this task state should be pushed at all."""
+        return self.states is None or task.status.state in self.states
+
+    def apply(self, task: Task) -> Task:
+        """Return the task trimmed to the history the subscriber asked for."""
+        if self.history == 'full' or not task.history:
+            return task
+        return task.model_copy(update={'history': task.history[-1:] if self.history == 'last' else None})
+
+
+class PushNotificationDispatcher:
+    """Sends push notifications from a bounded queue with a pool of workers.
+
+    Streaming handlers only enqueue the latest task state and keep yielding events;
+    the webhook POSTs happen in the background. States queued for a task that has not
+    been sent yet are coalesced so only the most recent one is delivered, and at most
+    one notification per task is in flight so the webhook never sees states out of order.
+    Failed deliveries are retried with exponential backoff.
+
+    submit() never waits for room in the queue: intermediate states are dropped when it
+    is full, while terminal states (and newer states of a task whose previous state was
+    in flight) go to an overflow list that the workers move into the queue as it drains.
+
+    If the push notifier can persist pending notifications (save_pending, delete_pending
+    and load_pending, as SqlitePushNotifier does), terminal states of tasks with a push
+    config are kept until they are delivered and restore() re-queues them after a restart.
+
+    Once a terminal state has been delivered nothing more is sent for the task, so its
+    push config is deleted from the notifier.
+
+    Notification filters are dropped when their task reaches a terminal state, or once no
+    state has been submitted for the task in filter_ttl seconds, so filters of tasks that
+    never finish do not pile up.
+    """
+
+    def __init__(
+        self,
+        push_notifier: PushNotifier,
+        httpx_client: httpx.AsyncClient,
+        max_queue_size: int = 1000,
+        workers: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        filter_ttl: Optional[float] = 3600,
+    ):
+        self._push_notifier = push_notifier
+        self._client = httpx_client
+        self._outbox = push_notifier if hasattr(push_notifier, 'save_pending') else None
+        self.max_queue_size = max_queue_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.filter_ttl = filter_ttl
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._overflow: deque = deque()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._latest: Dict[str, Task] = {}
+        self._enqueued_at: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        self._filters: OrderedDict[str, Tuple[PushNotificationFilter, float]] = OrderedDict()
+
+        self._delivered = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._overflowed = 0
+        self._retries = 0
+        self._failed = 0
+        self._filtered = 0
+        self._filters_expired = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = 0.0
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool on first use, inside the running event loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._worker(), name=f'push-dispatcher-{i}')
+                for i in range(self.workers)
+            ]
+
+    def set_filter(self, task_id: str, notification_filter: Optional[PushNotificationFilter]) -> None:
+        """Attach the subscriber's notification filter to a task."""
+        self._expire_filters()
+        if notification_filter:
+            self._filters[task_id] = (notification_filter, time.monotonic())
+            self._filters.move_to_end(task_id)
+        else:
+            self._filters.pop(task_id, None)
+
+    def _get_filter(self, task: Task) -> Optional[PushNotificationFilter]:
+        """Return the task's filter, refreshing its TTL, or forgetting it if the task has finished."""
+        self._expire_filters()
+        if task.status.state in TERMINAL_STATES:
+            entry = self._filters.pop(task.id, None)
+        else:
+            entry = self._filters.get(task.id)
+            if entry is not None:
+                entry = self._filters[task.id] = (entry[0], time.monotonic())
+                self._filters.move_to_end(task.id)
+        return entry[0] if entry else None
+
+    def _expire_filters(self) -> None:
+        """Drop filters of tasks that had no state submitted for filter_ttl seconds."""
+        if self.filter_ttl is None:
+            return
+        deadline = time.monotonic() - self.filter_ttl
+        while self._filters:
+            task_id, (_, touched_at) = next(iter(self._filters.items()))
+            if touched_at >= deadline:
+                break
+            del self._filters[task_id]
+            self._filters_expired += 1
+
+    async def submit(self, task: Task) -> bool:
+        """Queue the latest state of a task for delivery.
+
+        Intermediate states are dropped when the queue is full; terminal states go to
+        the overflow list instead, since they carry the result the subscriber is waiting for.
+
+        Returns:
+            False if the notification was dropped, True otherwise
+        """
+        notification_filter = self._get_filter(task)
+        if notification_filter and not notification_filter.accepts(task):
+            self._filtered += 1
+            return True
+
+        self._ensure_workers()
+        task = notification_filter.apply(task) if notification_filter else task.model_copy()
+        if self._outbox and task.status.state in TERMINAL_STATES and await self._push_notifier.get_info(task.id):
+            await self._outbox.save_pending(task)
+
+        if task.id in self._latest or task.id in self._in_flight:
+            if task.id in self._latest:
+                self._coalesced += 1
+            else:
+                self._enqueued_at[task.id] = time.monotonic()
+            self._latest[task.id] = task
+            return True
+
+        try:
+            self._queue.put_nowait(task.id)
+        except asyncio.QueueFull:
+            if task.status.state not in TERMINAL_STATES:
+                self._dropped += 1
+                logger.warning(
+                    f'Push notification queue full ({self.max_queue_size}), dropped {task.status.state} update for task {task.id}'
+                )
+                return False
+            self._overflow.append(task.id)
+            self._overflowed += 1
+
+        self._latest[task.id] = task
+        self._enqueued_at[task.id] = time.monotonic()
+        return True
+
+    async def _worker(self) -> None:
+        """Deliver queued notifications until cancelled."""
+        while True:
+            task_id = await self._queue.get()
+            if self._overflow:
+                # get() just made room; the queue only overflows while it is full.
+                self._queue.put_nowait(self._overflow.popleft())
+            task = self._latest.pop(task_id, None)
+            enqueued_at = self._enqueued_at.pop(task_id, time.monotonic())
+            try:
+                if task:
+                    self._in_flight.add(task_id)
+                    await self._deliver(task, enqueued_at)
+            except Exception as e:
+                logger.error(f'Unexpected error dispatching push notification for task {task_id}: {e}')
+            finally:
+                self._in_flight.discard(task_id)
+                if task_id in self._latest:
+                    # A newer state arrived while this one was being sent.
+                    try:
+                        self._queue.put_nowait(task_id)
+                    except asyncio.QueueFull:
+                        self._overflow.append(task_id)
+                        self._overflowed += 1
+                self._queue.task_done()
+
+    async def _deliver(self, task: Task, enqueued_at: float) -> None:
+        """POST one notification, retrying with exponential backoff."""
+        push_info = await self._push_notifier.get_info(task.id)
+        if not push_info:
+            if self._outbox and task.status.state in TERMINAL_STATES:
+                # The config was deleted after the notification was persisted; there is nowhere to send it.
+                await self._outbox.delete_pending(task.id)
+            return
+
+        headers = {'X-A2A-Notification-Token': push_info.token} if push_info.token else None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client.post(
+                    push_info.url,
+                    json=task.model_dump(mode='json', exclude_none=True),
+                    headers=headers,
+                )
+                response.raise_for_status()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._failed += 1
+                    logger.error(f'Push notification for task {task.id} failed after {attempt + 1} attempts: {e}')
+                    return
+                self._retries += 1
+                await asyncio.sleep(min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            else:
+                latency = time.monotonic() - enqueued_at
+                self._delivered += 1
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                self._latency_last = latency
+                logger.info(f'Push notification for task {task.id} ({task.status.state}) delivered in {latency * 1000:.1f} ms')
+                if task.status.state in TERMINAL_STATES:
+                    if self._outbox:
+                        await self._outbox.delete_pending(task.id)
+                    await self._push_notifier.delete_info(task.id)
+                return
+
+    async def restore(self) -> int:
+        """Re-queue notifications left undelivered by a previous run.
+
+        Returns:
+            Number of notifications re-queued
+        """
+        if not self._outbox:
+            return 0
+        pending = await self._outbox.load_pending()
+        for task in pending:
+            await self.submit(task)
+        if pending:
+            logger.info(f'Re-queued {len(pending)} undelivered push notifications')
+        return len(pending)
+
+    def stats(self) -> Dict[str, float]:
+        """Return delivery counters and latency figures (milliseconds)."""
+        return {
+            'queued': (self._queue.qsize() if self._queue else 0) + len(self._overflow),
+            'in_flight': len(self._in_flight),
+            'delivered': self._delivered,
+            'dropped': self._dropped,
+            'coalesced': self._coalesced,
+            'overflowed': self._overflowed,
+            'retries': self._retries,
+            'failed': self._failed,
+            'filtered': self._filtered,
+            'filters': len(self._filters),
+            'filters_expired': self._filters_expired,
+            'latency_avg_ms': round(self._latency_total / self._delivered * 1000, 1) if self._delivered else 0.0,
+            'latency_max_ms': round(self._latency_max * 1000, 1),
+            'latency_last_ms': round(self._latency_last * 1000, 1),
+        }
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """Give queued notifications a chance to be sent, then stop the workers."""
+        if self._queue is not None and self._worker_tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f'Stopping push dispatcher with {self._queue.qsize()} notifications still queued')
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
@@ -25,9 +25,27 @@ echo "✈️  Starting Flight Search Agent (Port 9993)..."
 (cd "$SCRIPT_DIR/flight_search_agent" && uv run . --host 0.0.0.0) &
 FLIGHT_PID=$!
 
+# Poll each agent card until the agent answers, instead of sleeping for a fixed time
+wait_for_agent() {
+    local name=$1
+    local port=$2
+    local deadline=$((SECONDS + ${AGENT_STARTUP_TIMEOUT:-60}))
+    until curl -sf -o /dev/null "http://localhost:$port/.well-known/agent.json"; do
+        if [ $SECONDS -ge $deadline ]; then
+            echo "  ⚠️  $name is not responding on port $port yet (the chat agent will pick it up once it is)"
+            return 1
+        fi
+        sleep 0.2
+    done
+    echo "  ✓ $name is ready (port $port)"
+}
+
 echo ""
-echo "⏳ Waiting 5 seconds for all agents to initialize..."
-sleep 5
+echo "⏳ Waiting for the agents to respond..."
+wait_for_agent "Employee Flight Request Agent" 9992 &
+wait_for_agent "Airport Knowledge Base Agent" 9991 &
+wait_for_agent "Flight Search Agent" 9993 &
+wait
 
 echo "💬 Starting Chat Agent (Port 9990)..."
 echo "============================================================"
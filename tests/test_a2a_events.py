@@ -0,0 +1,69 @@
+"""
+Test file for the chat agent's A2A event accessors
+Run from dev_post/ directory as: python -m tests.test_a2a_events
+"""
+from a2a.types import (
+    Artifact,
+    JSONRPCError,
+    JSONRPCErrorResponse,
+    Message,
+    Part,
+    Role,
+    SendMessageResponse,
+    SendMessageSuccessResponse,
+    SendStreamingMessageResponse,
+    SendStreamingMessageSuccessResponse,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+from chat_agent import a2a_event, a2a_event_state, a2a_event_text, a2a_response_text, tool_result_text
+
+
+def text_message(text: str) -> Message:
+    return Message(role=Role.agent, parts=[Part(root=TextPart(text=text))], messageId="m1")
+
+
+def chunk(event) -> SendStreamingMessageResponse:
+    return SendStreamingMessageResponse(root=SendStreamingMessageSuccessResponse(id="1", result=event))
+
+
+def test_a2a_event_accessors():
+    """Test state and text of every event kind, including events without a status message."""
+
+    print("🧪 Testing A2A event accessors...")
+
+    submitted = Task(id="t1", contextId="c1", status=TaskStatus(state=TaskState.submitted))
+    working = TaskStatusUpdateEvent(taskId="t1", contextId="c1", final=False,
+                                    status=TaskStatus(state=TaskState.working, message=text_message("📚 Searching...")))
+    artifact = TaskArtifactUpdateEvent(taskId="t1", contextId="c1",
+                                       artifact=Artifact(artifactId="a1", parts=[Part(root=TextPart(text="Madrid: MAD"))]))
+    reply = text_message("Request #4: pending")
+
+    events = [a2a_event(chunk(event)) for event in (submitted, working, artifact, reply)]
+    assert [a2a_event_state(event) for event in events] == [TaskState.submitted, TaskState.working, None, None]
+    assert [a2a_event_text(event) for event in events] == ["", "📚 Searching...", "Madrid: MAD", "Request #4: pending"]
+    print("✅ Task, status, artifact and message events read without dumping")
+
+    response = SendMessageResponse(root=SendMessageSuccessResponse(id="1", result=reply))
+    assert a2a_response_text(response, "employee agent") == "Request #4: pending"
+    assert tool_result_text(response) == "Request #4: pending"
+
+    error = SendMessageResponse(root=JSONRPCErrorResponse(id="1", error=JSONRPCError(code=-32603, message="boom")))
+    assert a2a_event(error) is None
+    assert a2a_response_text(error, "employee agent") == "❌ Error from employee agent: boom"
+    assert tool_result_text(error) is None
+
+    failed = Task(id="t2", contextId="c1", status=TaskStatus(state=TaskState.failed, message=text_message("no data")))
+    failed_response = SendMessageResponse(root=SendMessageSuccessResponse(id="1", result=failed))
+    assert a2a_response_text(failed_response, "employee agent") == "❌ employee agent failed: no data"
+    print("✅ Error and failed responses become tool error messages")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_a2a_events")
+    test_a2a_event_accessors()
@@ -0,0 +1,125 @@
+"""
+Test file for the chat agent's A2A agent registry
+Run from dev_post/ directory as: python -m tests.test_agent_registry
+"""
+import asyncio
+import time
+
+import httpx
+
+from chat_agent import A2AAgentRegistry
+
+
+class StubAgents:
+    """Serves agent cards for the agents marked up; the others refuse connections or answer slowly."""
+
+    def __init__(self):
+        self.up = {}
+        self.slow = set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        port = request.url.port
+        if port in self.slow:
+            await asyncio.sleep(1)
+        if port not in self.up:
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(200, json={
+            "name": f"Agent {port}",
+            "description": "Stub agent",
+            "url": f"http://localhost:{port}/",
+            "version": self.up[port],
+            "capabilities": {},
+            "defaultInputModes": ["text"],
+            "defaultOutputModes": ["text"],
+            "skills": [],
+        })
+
+
+def stub_registry(agents: StubAgents) -> A2AAgentRegistry:
+    registry = A2AAgentRegistry()
+    for agent_info in registry.agents.values():
+        agent_info["http_client"] = httpx.AsyncClient(transport=httpx.MockTransport(agents))
+    return registry
+
+
+async def wait_for_status(registry: A2AAgentRegistry, agent_id: str, status: str, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while registry.agent_statuses()[agent_id]["status"] != status:
+        assert time.monotonic() < deadline, f"{agent_id} should be {status}"
+        await asyncio.sleep(0.01)
+
+
+async def test_discovery_and_rediscovery():
+    """Test that the health checks pick up agents that start late, restart with a new card, or go away."""
+
+    print("🧪 Testing agent discovery and health checks...")
+
+    agents = StubAgents()
+    agents.up = {9991: "1.0.0", 9992: "1.0.0"}
+    registry = stub_registry(agents)
+
+    await registry.initialize_agents()
+    assert registry.list_available_agents() == ["airport_knowledge_base", "employee_flight_requests"]
+    assert registry.agent_statuses()["flight_search"]["status"] == "down"
+    assert all(status["last_checked"] for status in registry.agent_statuses().values())
+    employee_client = registry.get_agent("employee_flight_requests")["client"]
+
+    registry.start_health_checks(interval=0.02)
+    agents.up[9993] = "1.0.0"
+    await wait_for_status(registry, "flight_search", "up")
+    assert registry.get_agent("flight_search")["client"] is not None, "An agent that starts late should be picked up"
+    assert registry.get_agent("employee_flight_requests")["client"] is employee_client, \
+        "An unchanged card should keep its client"
+
+    agents.up[9992] = "2.0.0"
+    deadline = time.monotonic() + 2
+    while registry.get_agent("employee_flight_requests")["client"] is employee_client:
+        assert time.monotonic() < deadline, "A changed card should get a new client"
+        await asyncio.sleep(0.01)
+    assert registry.get_agent("employee_flight_requests")["card"].version == "2.0.0"
+
+    del agents.up[9991]
+    await wait_for_status(registry, "airport_knowledge_base", "down")
+    assert "airport_knowledge_base" not in registry.list_available_agents()
+
+    await registry.aclose()
+    assert registry._health_task is None
+    assert all(info["http_client"] is None and info["client"] is None for info in registry.agents.values())
+
+    print("✅ Agents discovered, refreshed and marked down as expected")
+
+
+async def test_per_agent_timeouts():
+    """Test that each agent's discovery timeout and unary/streaming timeout profile are applied."""
+
+    print("\n🧪 Testing per-agent timeouts...")
+
+    agents = StubAgents()
+    agents.up = {9991: "1.0.0", 9992: "1.0.0", 9993: "1.0.0"}
+    agents.slow = {9993}
+    registry = stub_registry(agents)
+    for agent_info in registry.agents.values():
+        agent_info["http"]["discovery_timeout"] = 0.1
+
+    start = time.monotonic()
+    await registry.initialize_agents()
+    assert time.monotonic() - start < 0.5, "A slow agent should not hold up discovery past its timeout"
+    assert registry.list_available_agents() == ["airport_knowledge_base", "employee_flight_requests"]
+
+    employee = registry.get_agent("employee_flight_requests")
+    flight_search = registry.get_agent("flight_search")
+    assert registry.http_kwargs(employee)["timeout"] == httpx.Timeout(15.0, connect=5.0)
+    assert registry.http_kwargs(employee, streaming=True)["timeout"] == httpx.Timeout(300.0, connect=5.0)
+    assert registry.http_kwargs(flight_search, streaming=True)["timeout"] == httpx.Timeout(600.0, connect=5.0)
+    assert registry.http_kwargs(flight_search)["timeout"] == httpx.Timeout(30.0, connect=5.0)
+    assert flight_search["http"]["max_connections"] == 50 and employee["http"]["max_connections"] == 10
+
+    await registry.aclose()
+
+    print("✅ Per-agent timeouts applied as expected")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_agent_registry")
+    asyncio.run(test_discovery_and_rediscovery())
+    asyncio.run(test_per_agent_timeouts())
@@ -0,0 +1,63 @@
+"""
+Test file for the chat agent's background task supervisor
+Run from dev_post/ directory as: python -m tests.test_background_tasks
+"""
+import asyncio
+
+from chat_agent import BackgroundTaskSupervisor, SupervisorFullError
+
+
+async def test_background_task_supervisor():
+    """Test the in-flight limit, queueing, rejection, deadlines, cancellation and push correlation."""
+
+    print("🧪 Testing BackgroundTaskSupervisor...")
+
+    supervisor = BackgroundTaskSupervisor("search", max_in_flight=2, max_queued=1, deadline=0.2)
+    running = []
+
+    def work(seconds: float, fail: bool = False):
+        async def search(job):
+            running.append(job.job_id)
+            assert len(supervisor.jobs) <= 3
+            job.remote_id = f"remote-{job.job_id}"
+            await asyncio.sleep(seconds)
+            if fail:
+                raise RuntimeError("agent unavailable")
+        return search
+
+    supervisor.submit("a", "fast", work(0.05))
+    supervisor.submit("b", "slow", work(1))
+    queued = supervisor.submit("c", "failing", work(0.01, fail=True))
+    try:
+        supervisor.submit("d", "rejected", work(0))
+        raise AssertionError("A full queue should reject new jobs")
+    except SupervisorFullError:
+        pass
+
+    await asyncio.sleep(0.01)
+    assert queued.state == "queued" and running == ["a", "b"], "Only max_in_flight jobs should run at once"
+    print("✅ Limited to 2 running jobs, 1 queued, 1 rejected")
+
+    assert supervisor.notify("remote-a", "working").job_id == "a", "Pushes should be matched by the remote task id"
+    await asyncio.sleep(0.3)
+    outcomes = {job.job_id: job.state for job in supervisor.finished}
+    assert outcomes == {"a": "completed", "b": "timed_out", "c": "failed"}, outcomes
+    assert not supervisor.jobs, "Finished jobs should no longer be tracked as in progress"
+    print(f"✅ Outcomes: {outcomes}")
+
+    supervisor.submit("e", "cancelled", work(10))
+    await asyncio.sleep(0.01)
+    assert supervisor.cancel("remote-e") and not supervisor.cancel("unknown")
+    supervisor.submit("f", "closed", work(10))
+    await supervisor.aclose()
+    await asyncio.sleep(0)
+
+    stats = supervisor.stats()
+    assert (stats["cancelled"], stats["rejected"], stats["running"]) == (2, 1, 0)
+    assert stats["recent"][-1]["notified_state"] == "working"
+    print(f"✅ Stats: { {key: value for key, value in stats.items() if key not in ('in_progress', 'recent')} }")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_background_tasks")
+    asyncio.run(test_background_task_supervisor())
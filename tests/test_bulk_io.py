@@ -0,0 +1,132 @@
+"""
+Test file for the employee flight request bulk import/export
+Run from dev_post/ directory as: python -m tests.test_bulk_io
+"""
+import json
+import os
+import sys
+import tempfile
+
+# bulk_io is a script run from its agent directory, where it imports agent_executor directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "employee_flight_request_agent"))
+
+from agent_executor import AirportCodeResolver, validate_flight_request
+from bulk_io import EmployeeFlightRequestDatabase, export_requests, import_requests, main
+
+
+def request(request_id: int, **fields):
+    return {"id": request_id, "name": f"Employee {request_id}", "departure": "Madrid", "destination": "Rome",
+            "date": "2025-11-02", **fields}
+
+
+def test_import_rejects_bad_lines():
+    """Test that bad lines are rejected with their own line numbers and the rest of the file is still imported."""
+
+    print("🧪 Testing JSONL import with bad lines...")
+
+    path = os.path.join(tempfile.mkdtemp(), "requests.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(request(1)) + "\n")
+        f.write('{"id": 2, "name": \n')
+        f.write("[1, 2]\n")
+        f.write("\n")
+        f.write(json.dumps(request(4)) + "\n")
+        f.write(json.dumps(request(5, date="11/02/2025")) + "\n")
+        f.write(json.dumps(request(6, flight_booking={"flight": "AZ59", "seat": "12A", "gate": "B3"})) + "\n")
+
+    db = EmployeeFlightRequestDatabase(db_path=":memory:", seed=False)
+    report = import_requests(db, path, batch_size=2)
+
+    assert (report["read"], report["upserted"], report["rejected"]) == (6, 3, 3), report
+    assert [error.split(":")[0] for error in report["errors"]] == ["line 2", "line 3", "line 6"], report["errors"]
+    assert "invalid JSON" in report["errors"][0] and "expected a JSON object" in report["errors"][1]
+    assert db.count() == 3
+    print(f"✅ Report: {report}")
+
+
+def test_export_round_trip():
+    """Test that CSV and JSONL exports import back into identical records."""
+
+    print("\n🧪 Testing export/import round trip...")
+
+    db = EmployeeFlightRequestDatabase(db_path=":memory:")
+    directory = tempfile.mkdtemp()
+    for file_name in ("backup.jsonl", "backup.csv"):
+        path = os.path.join(directory, file_name)
+        exported = export_requests(db, path, batch_size=3)
+        assert exported == db.count()
+
+        restored = EmployeeFlightRequestDatabase(db_path=":memory:", seed=False)
+        report = import_requests(restored, path)
+        assert report["upserted"] == exported and not report["rejected"], report
+        fields = ("id", "name", "departure", "destination", "date", "flight_booking")
+        assert [{field: r[field] for field in fields} for r in restored.iter_requests()] == \
+               [{field: r[field] for field in fields} for r in db.iter_requests()]
+        print(f"✅ {file_name}: {exported} records round-tripped")
+
+
+def test_reimport_keeps_versions():
+    """Test that re-importing an identical file leaves versions alone and only changed records are bumped."""
+
+    print("\n🧪 Testing re-import of an unchanged file...")
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "requests.jsonl")
+    records = [request(1), request(2, flight_booking={"flight": "AZ59", "seat": "12A", "gate": "B3"}), request(3)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+
+    db = EmployeeFlightRequestDatabase(db_path=":memory:", seed=False)
+    import_requests(db, path)
+    booked = db.apply_updates([{"request_id": 3, "action": "book", "expected_version": 1,
+                                "flight_booking": {"flight": "AZ61", "seat": "4C", "gate": "A1", "purchased": True}}])
+    assert booked[0]["status"] == "updated", booked
+    versions = {r["id"]: r["version"] for r in db.iter_requests()}
+    assert versions == {1: 1, 2: 1, 3: 2}, versions
+
+    report = import_requests(db, path)
+    assert report["upserted"] == 3 and not report["rejected"], report
+    assert {r["id"]: r["version"] for r in db.iter_requests()} == versions, "An identical re-import should not bump versions"
+    assert db.find_request_by_id(3)["flight_booking"]["flight"] == "AZ61"
+
+    records[0]["date"] = "2025-11-03"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+    import_requests(db, path)
+    assert {r["id"]: r["version"] for r in db.iter_requests()} == {1: 2, 2: 1, 3: 2}, "Only the changed record should be bumped"
+
+    print("✅ Versions only bumped for changed records")
+
+
+def test_resolve_codes_command():
+    """Test that the resolve-codes command needs the airport codes and backfills the records written without them."""
+
+    print("\n🧪 Testing the resolve-codes command...")
+
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "requests.db")
+    missing_csv = os.path.join(directory, "missing.csv")
+    db = EmployeeFlightRequestDatabase(db_path=db_path, seed=False, resolver=AirportCodeResolver(missing_csv))
+    db.upsert_many([validate_flight_request(request(1, departure="London"))])
+    assert db.find_request_by_id(1)["departure_iata"] == []
+    db.conn.close()
+
+    airports_csv = os.path.join(directory, "airport-codes.csv")
+    with open(airports_csv, "w", encoding="utf-8") as f:
+        f.write("iata_code,municipality,type,name\nLHR,London,large_airport,London Heathrow Airport\n")
+    assert main(["resolve-codes", "--db", db_path, "--airports", missing_csv]) == 1, \
+        "resolve-codes should fail without the airport codes"
+    assert main(["resolve-codes", "--db", db_path, "--airports", airports_csv]) == 0
+
+    request_1 = EmployeeFlightRequestDatabase(db_path=db_path, seed=False).find_request_by_id(1)
+    assert request_1["departure_iata"] == ["LHR"] and request_1["destination_iata"] == [] and request_1["version"] == 1
+
+    print("✅ Route codes resolved on request")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_bulk_io")
+    test_import_rejects_bad_lines()
+    test_export_round_trip()
+    test_reimport_keeps_versions()
+    test_resolve_codes_command()
@@ -0,0 +1,87 @@
+"""
+Test file for the bounded LangGraph checkpointer shared by the chat and flight search agents
+Run from dev_post/ directory as: python -m tests.test_checkpointer
+"""
+import operator
+import os
+import tempfile
+from typing import Annotated, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from common.checkpointer import BoundedMemorySaver
+
+
+class CounterState(TypedDict):
+    items: Annotated[list, operator.add]
+
+
+def build_graph(checkpointer: BoundedMemorySaver):
+    graph = StateGraph(CounterState)
+    graph.add_node("count", lambda state: {"items": [len(state["items"])]})
+    graph.add_edge(START, "count")
+    graph.add_edge("count", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_pruning_and_eviction():
+    """Test that old checkpoints and idle threads are dropped without losing the latest state."""
+
+    print("🧪 Testing checkpoint pruning and idle eviction...")
+
+    saver = BoundedMemorySaver(keep_last=2, idle_ttl_seconds=None)
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "conversation"}}
+    for i in range(20):
+        result = graph.invoke({"items": [i]}, config)
+
+    assert len(result["items"]) == 40, "The latest state should keep the whole conversation"
+    stats = saver.stats()
+    assert stats["checkpoints"] == 2
+    assert stats["pruned"] > 0
+    print(f"✅ Pruned: {stats}")
+
+    saver = BoundedMemorySaver(idle_ttl_seconds=0.0001)
+    graph = build_graph(saver)
+    for i in range(50):
+        graph.invoke({"items": [i]}, {"configurable": {"thread_id": f"task-{i}"}})
+
+    stats = saver.stats()
+    assert stats["threads"] <= 2, "Idle threads should be evicted"
+    assert stats["evicted"] >= 48
+    print(f"✅ Evicted: {stats}")
+
+
+def test_sqlite_persistence():
+    """Test that threads survive a restart and come back after eviction."""
+
+    print("\n🧪 Testing sqlite-backed checkpointer...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "checkpoints.db")
+    saver = BoundedMemorySaver(keep_last=2, db_path=db_path)
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "conversation"}}
+    for i in range(3):
+        graph.invoke({"items": [i]}, config)
+    saver.close()
+
+    restarted = BoundedMemorySaver(keep_last=2, idle_ttl_seconds=0.0001, db_path=db_path)
+    graph = build_graph(restarted)
+    result = graph.invoke({"items": [3]}, config)
+    assert len(result["items"]) == 8, "The conversation should continue after a restart"
+
+    graph.invoke({"items": [0]}, {"configurable": {"thread_id": "other"}})
+    result = graph.invoke({"items": [4]}, config)
+    assert len(result["items"]) == 10, "An evicted thread should be loaded back"
+    restarted.close()
+
+    stats = restarted.stats()
+    assert stats["loaded"] >= 2
+    assert stats["unflushed"] == 0
+    print(f"✅ Persisted: {stats}")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_checkpointer")
+    test_pruning_and_eviction()
+    test_sqlite_persistence()
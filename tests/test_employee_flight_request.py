@@ -4,8 +4,20 @@ Test script for the employee flight request agent
 Run from dev_post/ directory as: python -m tests.test_employee_flight_request
 """
 import asyncio
+import csv
+import json
+import os
+import tempfile
 
-from employee_flight_request_agent.agent_executor import EmployeeFlightRequestAgentExecutor
+from employee_flight_request_agent.agent_executor import (
+    STATISTICS_PATTERN,
+    AirportCodeResolver,
+    EmployeeFlightRequestAgent,
+    EmployeeFlightRequestAgentExecutor,
+    EmployeeFlightRequestDatabase,
+    parse_statistics_query,
+    validate_flight_request,
+)
 
 
 async def test_employee_flight_request_agent():
@@ -26,6 +38,211 @@ async def test_employee_flight_request_agent():
         print(f"❌ Error initializing agent: {e}")
 
 
+def test_database_upsert():
+    """Test validation and batched upserts against the SQLite database."""
+
+    print("\n🧪 Testing Employee Flight Request Database upserts...")
+
+    db = EmployeeFlightRequestDatabase(db_path=":memory:", seed=False)
+    records = [
+        validate_flight_request({"id": 1, "name": "Jane Doe", "departure": "Madrid", "destination": "Rome", "date": "2025-11-02"}),
+        validate_flight_request({"id": 2, "name": "Tom Lee", "departure": "Paris", "destination": "Oslo", "date": "2025-11-03",
+                                 "flight_booking": {"flight": "AF1174", "seat": "3C", "gate": "K40"}}),
+    ]
+    db.upsert_many(records)
+    db.upsert_many([{**records[0], "destination": "Lisbon"}])
+
+    assert db.count() == 2
+    assert db.find_request_by_name("jane doe")["destination"] == "Lisbon"
+    assert [request["id"] for request in db.get_booked_requests()] == [2]
+
+    try:
+        validate_flight_request({"id": 3, "name": "No Date", "departure": "Madrid", "destination": "Rome", "date": "11/02/2025"})
+        print("❌ Invalid date was accepted")
+    except ValueError as e:
+        print(f"✅ Invalid record rejected: {e}")
+
+    print("✅ Database upserts working as expected!")
+
+
+def test_aggregate_statistics():
+    """Test grouped counts over the seeded sample records."""
+
+    print("\n🧪 Testing aggregated flight request statistics...")
+
+    db = EmployeeFlightRequestDatabase(db_path=":memory:")
+
+    params = parse_statistics_query("how many requests per status")
+    assert params == {"group_by": ["status"], "status": None, "month": None}
+    assert {row["status"]: row["count"] for row in db.aggregate_requests(**params)} == {"booked": 5, "pending": 5}
+
+    params = parse_statistics_query("how many pending requests per destination in 2025-11")
+    rows = db.aggregate_requests(**params)
+    assert rows == [{"destination": "Amsterdam", "count": 1}]
+
+    for row in db.aggregate_requests(group_by=["route", "month"], status="booked"):
+        print(f"  {row['route']} | {row['month']} | {row['count']}")
+
+    print("✅ Aggregated statistics working as expected!")
+
+
+def test_statistics_routing():
+    """Test that only statistics questions, matched on whole words, take the statistics path."""
+
+    print("\n🧪 Testing statistics query routing...")
+
+    for query in ("how many requests per status", "count flight requests by status", "count pending requests",
+                  "breakdown per destination", "number of bookings"):
+        assert STATISTICS_PATTERN.search(query.lower()), f"'{query}' should be a statistics query"
+    for query in ("check Count Basie flight request", "account team flight request", "country manager request",
+                  "Per Olsen flight request", "pending flight requests"):
+        assert not STATISTICS_PATTERN.search(query.lower()), f"'{query}' should not be a statistics query"
+
+    print("✅ Statistics queries routed as expected!")
+
+
+def write_passengers_csv(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("iata_code,passengers_millions\nLHR,79\nLGW,41\nLCY,3\n")
+
+
+def write_airports_csv(path, with_scheduled_service=True):
+    """Write a small airports CSV, and the passengers CSV; London has two large airports that sort the wrong way by name."""
+    write_passengers_csv(os.path.join(os.path.dirname(path), "airport-passengers.csv"))
+    fields = ["iata_code", "municipality", "type", "name"] + (["scheduled_service"] if with_scheduled_service else [])
+    rows = [
+        {"iata_code": "LGW", "municipality": "London", "type": "large_airport", "name": "London Gatwick Airport", "scheduled_service": "yes"},
+        {"iata_code": "LHR", "municipality": "London", "type": "large_airport", "name": "London Heathrow Airport", "scheduled_service": "yes"},
+        {"iata_code": "LCY", "municipality": "London", "type": "medium_airport", "name": "London City Airport", "scheduled_service": "yes"},
+        {"iata_code": "BQH", "municipality": "London", "type": "medium_airport", "name": "Biggin Hill Airport", "scheduled_service": "no"},
+        {"iata_code": "MAD", "municipality": "Madrid", "type": "large_airport", "name": "Adolfo Suárez Madrid–Barajas Airport", "scheduled_service": "yes"},
+        {"iata_code": "", "municipality": "Madrid", "type": "heliport", "name": "Madrid Heliport", "scheduled_service": "no"},
+    ]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_airport_code_resolver():
+    """Test that the main airport of a city comes first, with and without the scheduled_service column."""
+
+    print("\n🧪 Testing airport code resolution...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "airport-codes.csv")
+        passengers = os.path.join(tmp_dir, "airport-passengers.csv")
+
+        write_airports_csv(path)
+        assert AirportCodeResolver(path, passengers_csv_path=passengers).resolve("london") == ["LHR", "LGW", "LCY"]
+        assert AirportCodeResolver(path, max_candidates=5, passengers_csv_path=passengers).resolve(" London ") == \
+            ["LHR", "LGW", "LCY", "BQH"]
+        assert AirportCodeResolver(path, passengers_csv_path=passengers).resolve("Madrid") == ["MAD"]
+        assert AirportCodeResolver(path, passengers_csv_path=passengers).resolve("Atlantis") == []
+        assert AirportCodeResolver(path, passengers_csv_path=os.path.join(tmp_dir, "missing.csv")).resolve("London") == \
+            ["LGW", "LHR", "LCY"], "Without passenger figures, airports of the same type are ranked by name"
+
+        write_airports_csv(path, with_scheduled_service=False)
+        assert AirportCodeResolver(path, passengers_csv_path=passengers).resolve("London") == ["LHR", "LGW", "LCY"]
+
+        missing = AirportCodeResolver(os.path.join(tmp_dir, "missing.csv"))
+        assert not missing.available and missing.resolve("London") == []
+        assert "missing.csv" in missing.load_error
+
+    print("✅ Airport codes resolved as expected!")
+
+
+def test_resolve_missing_route_codes():
+    """Test that codes are backfilled for requests stored while the airport codes were unavailable, once per city."""
+
+    print("\n🧪 Testing route code backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "airport-codes.csv")
+        write_airports_csv(path)
+
+        db = EmployeeFlightRequestDatabase(db_path=":memory:", seed=False,
+                                           resolver=AirportCodeResolver(os.path.join(tmp_dir, "missing.csv")))
+        db.upsert_many([
+            validate_flight_request({"id": 1, "name": "Jane Doe", "departure": "London", "destination": "Madrid", "date": "2025-11-02"}),
+            validate_flight_request({"id": 2, "name": "Tom Lee", "departure": "Atlantis", "destination": "Oz", "date": "2025-11-03"}),
+        ])
+        assert db.find_request_by_id(1)["departure_iata"] == []
+        assert db.resolve_missing_route_codes() == 0, "Nothing can be resolved without airport codes"
+
+        db.resolver = AirportCodeResolver(path, passengers_csv_path=os.path.join(tmp_dir, "airport-passengers.csv"))
+        assert db.resolve_missing_route_codes(batch_size=1) == 1
+        request = db.find_request_by_id(1)
+        assert request["departure_iata"] == ["LHR", "LGW", "LCY"]
+        assert request["destination_iata"] == ["MAD"]
+        assert request["version"] == 1, "Backfilling codes must not change the version"
+        assert db.find_request_by_id(2)["departure_iata"] == []
+        unchecked = db.conn.execute(
+            "SELECT COUNT(*) FROM flight_requests WHERE departure_iata IS NULL OR destination_iata IS NULL"
+        ).fetchone()[0]
+        assert unchecked == 0, "Cities without an airport should be marked as looked up, not scanned again"
+        assert db.resolve_missing_route_codes() == 0
+
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            f.write("ATL,Atlantis,large_airport,Atlantis International Airport,yes\n")
+        db.resolver = AirportCodeResolver(path)
+        assert db.resolve_missing_route_codes() == 0
+        assert db.resolve_missing_route_codes(retry_unresolved=True) == 1
+        assert db.find_request_by_id(2)["departure_iata"] == ["ATL"]
+
+        db.resolver = AirportCodeResolver(os.path.join(tmp_dir, "missing.csv"))
+        db.upsert_many([
+            validate_flight_request({"id": 1, "name": "Jane Doe", "departure": "London", "destination": "Madrid", "date": "2025-11-02"}),
+        ])
+        request = db.find_request_by_id(1)
+        assert request["departure_iata"] == ["LHR", "LGW", "LCY"] and request["version"] == 1, \
+            "Re-importing without the airport codes should keep the resolved codes"
+
+    print("✅ Route codes backfilled as expected!")
+
+
+async def test_concurrent_bookings():
+    """Test that concurrent bookings on the same request produce exactly one winner."""
+
+    print("\n🧪 Testing concurrent booking updates...")
+
+    agent = EmployeeFlightRequestAgent()
+
+    commands = [
+        json.dumps({"action": "book", "request_id": 4, "flight": f"EI15{i}", "expected_version": 1, "idempotency_key": f"op-{i}"})
+        for i in range(5)
+    ]
+    results = await asyncio.gather(*[agent.invoke(command) for command in commands])
+
+    assert sum(result.startswith("✅") for result in results) == 1
+    assert sum("modified by someone else" in result for result in results) == 4
+    assert agent.db.find_request_by_id(4)["version"] == 2
+
+    winner = commands[[result.startswith("✅") for result in results].index(True)]
+    assert "idempotent replay" in await agent.invoke(winner)
+
+    reused_key = json.loads(winner)
+    reused_key.update({"request_id": 3, "expected_version": 1})
+    assert "already used for request #4" in await agent.invoke(json.dumps(reused_key))
+    assert agent.db.find_request_by_id(3)["flight_booking"] is None, "A reused key must not replay onto another request"
+
+    no_version = await agent.invoke(json.dumps({"action": "book", "request_id": 3, "flight": "AA100"}))
+    assert "expected_version is required" in no_version
+
+    request = agent.db.find_request_by_id(4)
+    agent.db.upsert_many([validate_flight_request({**request, "flight_booking": None})])
+    assert agent.db.find_request_by_id(4)["flight_booking"] == request["flight_booking"], \
+        "Re-importing a request without a booking should keep the booking"
+
+    print("✅ Concurrent booking updates working as expected!")
+
+
 if __name__ == "__main__":
     print("💡 Run from dev_post/ directory as: python -m tests.test_employee_flight_request")
-    asyncio.run(test_employee_flight_request_agent()) 
\ No newline at end of file
+    asyncio.run(test_employee_flight_request_agent())
+    test_database_upsert()
+    test_aggregate_statistics()
+    test_statistics_routing()
+    test_airport_code_resolver()
+    test_resolve_missing_route_codes()
+    asyncio.run(test_concurrent_bookings()) 
\ No newline at end of file
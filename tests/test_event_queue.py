@@ -0,0 +1,124 @@
+"""
+Test file for the bounded streaming event queues shared by the A2A agents
+Run from dev_post/ directory as: python -m tests.test_event_queue
+"""
+import asyncio
+
+from a2a.types import Message, Part, Role, TaskState, TaskStatus, TaskStatusUpdateEvent, TextPart
+
+from common.event_queue import BoundedEventQueue, BoundedQueueManager, OverflowPolicy
+
+
+def status_update(task_id: str, text: str, final: bool = False) -> TaskStatusUpdateEvent:
+    state = TaskState.completed if final else TaskState.working
+    message = Message(role=Role.agent, parts=[Part(root=TextPart(text=text))], messageId=text)
+    return TaskStatusUpdateEvent(taskId=task_id, contextId="test-context", final=final,
+                                 status=TaskStatus(state=state, message=message))
+
+
+def text_of(event: TaskStatusUpdateEvent) -> str:
+    return event.status.message.parts[0].root.text
+
+
+async def drain(queue: BoundedEventQueue) -> list:
+    events = []
+    while not queue.queue.empty():
+        events.append(await queue.dequeue_event(no_wait=True))
+        queue.task_done()
+    return events
+
+
+async def test_overflow_policies():
+    """Test that a full queue drops or coalesces intermediate status updates and keeps final ones."""
+
+    print("🧪 Testing event queue overflow policies...")
+
+    queue = BoundedEventQueue(capacity=3, overflow_policy=OverflowPolicy.coalesce)
+    for text in ("a1", "b1", "a2", "a3", "b2", "c1"):
+        await queue.enqueue_event(status_update(text[0], text))
+    assert [text_of(event) for event in await drain(queue)] == ["a1", "b2", "a3"], \
+        "Each update should replace the newest queued update of its task, and be dropped if there is none"
+    assert queue.counters.coalesced == 2 and queue.counters.dropped == 1
+
+    await queue.enqueue_event(status_update("a", "a4"))
+    await queue.enqueue_event(status_update("a", "a5"))
+    assert [text_of(event) for event in await drain(queue)] == ["a4", "a5"], \
+        "Slots that have been dequeued should not be coalesced into"
+
+    queue = BoundedEventQueue(capacity=2, overflow_policy=OverflowPolicy.drop_intermediate)
+    for text in ("a1", "a2", "a3"):
+        await queue.enqueue_event(status_update("a", text))
+    final = asyncio.create_task(queue.enqueue_event(status_update("a", "done", final=True)))
+    await asyncio.sleep(0.01)
+    assert not final.done(), "Final events should wait for room"
+    await queue.dequeue_event()
+    queue.task_done()
+    await final
+    assert [text_of(event) for event in await drain(queue)] == ["a2", "done"]
+    assert queue.counters.dropped == 1 and queue.counters.blocked == 1
+
+    print("✅ Overflow policies applied as expected")
+
+
+async def test_block_timeout():
+    """Test that only events that are not final give up after block_timeout, and nothing is enqueued once closed."""
+
+    print("\n🧪 Testing event queue block timeout...")
+
+    queue = BoundedEventQueue(capacity=1, block_timeout=0.05)
+    await queue.enqueue_event(status_update("a", "a1"))
+
+    await queue.enqueue_event(status_update("a", "a2"))
+    assert queue.counters.timed_out == 1, "An intermediate event should be dropped after block_timeout"
+
+    final = asyncio.create_task(queue.enqueue_event(status_update("a", "done", final=True)))
+    await asyncio.sleep(0.2)
+    assert not final.done() and queue.counters.timed_out == 1, "A final event should never time out"
+    await queue.dequeue_event()
+    queue.task_done()
+    await final
+    assert text_of(await queue.dequeue_event(no_wait=True)) == "done"
+    queue.task_done()
+
+    await queue.close()
+    await queue.enqueue_event(status_update("a", "late"))
+    assert queue.queue.empty(), "A closed queue should not take events"
+
+    queue = BoundedEventQueue(capacity=1, block_timeout=0.05)
+    await queue.enqueue_event(status_update("a", "a1"))
+    final = asyncio.create_task(queue.enqueue_event(status_update("a", "done", final=True)))
+    await asyncio.sleep(0.01)
+    closing = asyncio.create_task(queue.close())
+    await asyncio.wait_for(final, 1)
+    assert queue.queue.qsize() == 1, "A final event should stop waiting once the queue is closed"
+    await drain(queue)
+    await closing
+
+    print("✅ Block timeout applied as expected")
+
+
+async def test_queue_manager():
+    """Test that tapped queues share the bounds and counters of the manager."""
+
+    print("\n🧪 Testing BoundedQueueManager...")
+
+    manager = BoundedQueueManager(capacity=2, overflow_policy=OverflowPolicy.coalesce)
+    queue = await manager.create_or_tap("a")
+    tapped = await manager.create_or_tap("a")
+    assert isinstance(tapped, BoundedEventQueue) and tapped.capacity == 2
+
+    for text in ("a1", "a2", "a3"):
+        await queue.enqueue_event(status_update("a", text))
+    assert [text_of(event) for event in await drain(tapped)] == ["a1", "a3"]
+
+    stats = manager.stats()
+    assert stats["coalesced"] == 2 and stats["depth_total"] == 2 and stats["high_watermark"] == 2
+
+    print(f"✅ BoundedQueueManager stats: {stats}")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_event_queue")
+    asyncio.run(test_overflow_policies())
+    asyncio.run(test_block_timeout())
+    asyncio.run(test_queue_manager())
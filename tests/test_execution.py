@@ -0,0 +1,59 @@
+"""
+Test file for the execution policies shared by the A2A agents
+Run from dev_post/ directory as: python -m tests.test_execution
+"""
+import asyncio
+import time
+
+from common.execution import ExecutionMode, ExecutionPolicy
+
+
+def blocking_square(value: int) -> int:
+    time.sleep(0.1)
+    return value * value
+
+
+async def test_thread_policy():
+    """Test that blocking calls leave the event loop free and respect the concurrency limit."""
+
+    print("🧪 Testing thread pool ExecutionPolicy...")
+
+    policy = ExecutionPolicy("test", mode=ExecutionMode.thread, max_workers=4, max_concurrency=2)
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    results = await asyncio.gather(*(policy.run(blocking_square, i) for i in range(4)))
+    heartbeat_task.cancel()
+
+    assert results == [0, 1, 4, 9]
+    assert ticks > 10, "The event loop should keep running while the calls block"
+    stats = policy.stats()
+    assert stats["completed"] == 4
+    assert stats["queue_wait_max_ms"] >= 50, "Calls over the concurrency limit should wait for a slot"
+    policy.shutdown()
+
+    print(f"✅ Thread pool stats: {stats}")
+
+
+async def test_process_policy():
+    """Test that module-level functions run in a process pool."""
+
+    print("\n🧪 Testing process pool ExecutionPolicy...")
+
+    policy = ExecutionPolicy("test", mode=ExecutionMode.process, max_workers=2)
+    assert await policy.run(blocking_square, 7) == 49
+    policy.shutdown()
+
+    print(f"✅ Process pool stats: {policy.stats()}")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_execution")
+    asyncio.run(test_thread_policy())
+    asyncio.run(test_process_policy())
@@ -7,6 +7,8 @@ import requests
 import json
 from datetime import datetime
 
+from common.push_payload import PAYLOAD_KIND, PAYLOAD_VERSION
+
 CHAT_AGENT_URL = "http://localhost:9990"
 FLIGHTS_ENDPOINT = "/api/flights-findings"
 
@@ -62,9 +64,29 @@ def test_flight_findings():
         print(f"📡 Sending data to: {CHAT_AGENT_URL}{FLIGHTS_ENDPOINT}")
         print(f"📊 Flight data: {len(flight_data['flights'])} flights for {flight_data['airport_name']}")
         
+        # Push notifications carry the completed task, with the results in the last message's DataPart.
+        payload = {
+            "kind": PAYLOAD_KIND,
+            "version": PAYLOAD_VERSION,
+            "source": flight_data["source"],
+            "task_id": "test-task",
+            "context_id": "test-context",
+            "search_info": {"iata_code": flight_data["airport_code"], "date": flight_data["date"]},
+            "flights": flight_data["flights"],
+            "message": None,
+        }
+        notification = {
+            "kind": "task",
+            "id": "test-task",
+            "contextId": "test-context",
+            "status": {"state": "completed"},
+            "history": [{"kind": "message", "role": "agent", "messageId": "test-message",
+                         "parts": [{"kind": "data", "data": payload}]}],
+        }
+        
         response = requests.post(
             f"{CHAT_AGENT_URL}{FLIGHTS_ENDPOINT}",
-            json=flight_data,
+            json=notification,
             headers={"Content-Type": "application/json"}
         )
         
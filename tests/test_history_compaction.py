@@ -0,0 +1,54 @@
+"""
+Test file for the chat agent's conversation history compaction
+Run from dev_post/ directory as: python -m tests.test_history_compaction
+"""
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from chat_agent import HistoryCompactor
+
+
+def flight_turn(i: int):
+    """One earlier turn: a flight search whose tool result is a large JSON dump."""
+    return [
+        HumanMessage(content=f"search flights from AEP on 2025-11-{i:02d}"),
+        AIMessage(content="", tool_calls=[{"name": "flight_search", "args": {"query": "AEP"}, "id": f"call_{i}"}]),
+        ToolMessage(content='{"flight": "AR1300", "airline": "Aerolineas"} ' * 300, name="flight_search",
+                    tool_call_id=f"call_{i}"),
+        AIMessage(content=f"Here are the flights for day {i}."),
+    ]
+
+
+def test_history_compaction():
+    """Test that bulky earlier results become references, old turns are dropped and the current turn is kept."""
+
+    print("🧪 Testing HistoryCompactor...")
+
+    compactor = HistoryCompactor(token_budget=1000, reference_tokens=200)
+    messages = [message for i in range(1, 31) for message in flight_turn(i)]
+    current_turn = [HumanMessage(content="which of those flights leaves first?")]
+    config = {"configurable": {"thread_id": "default"}}
+
+    result = compactor({"messages": messages + current_turn}, config)
+    sent = result["llm_input_messages"]
+
+    assert sent[-1] is current_turn[0], "The current turn should be sent as is"
+    assert isinstance(sent[0], HumanMessage), "Trimmed history should start on a user message"
+    tool_results = [message for message in sent if isinstance(message, ToolMessage)]
+    assert tool_results and all(message.content.startswith("[Earlier flight_search result omitted") for message in tool_results)
+    assert all(message.tool_call_id.startswith("call_") for message in tool_results)
+
+    call = compactor.last_calls["default"]
+    assert call["tokens_after"] <= 1000 < call["tokens_before"]
+    assert call["references"] == 30
+    assert call["dropped"] > 0
+    print(f"✅ Compacted: {call}")
+
+    current_turn = flight_turn(31)
+    result = compactor({"messages": current_turn}, config)
+    assert result["llm_input_messages"] == current_turn, "Results of the current turn should not be compacted"
+    print(f"✅ Stats: {compactor.stats()['model_calls']} model calls")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_history_compaction")
+    test_history_compaction()
@@ -0,0 +1,129 @@
+"""
+Test file for the chat agent's deterministic intent router
+Run from dev_post/ directory as: python -m tests.test_intent_router
+"""
+import asyncio
+
+from a2a.types import (
+    Message,
+    Part,
+    Role,
+    SendMessageResponse,
+    SendMessageSuccessResponse,
+    SendStreamingMessageResponse,
+    SendStreamingMessageSuccessResponse,
+    TextPart,
+)
+
+from chat_agent import INTENTS, A2AAgentRegistry, AirportKnowledgeTool, IntentRouter, tool_result_text
+from employee_flight_request_agent.agent_executor import EmployeeFlightRequestAgent
+
+
+ROUTED = {
+    "find airports in Madrid": ("airport_lookup", "Madrid"),
+    "what airports are in Tokyo?": ("airport_lookup", "Tokyo"),
+    "Barcelona airport information": ("airport_lookup", "Barcelona"),
+    "check pending flight requests": ("pending_requests", "pending flight requests"),
+    "which flights are confirmed": ("booked_requests", "booked flight requests"),
+    "check John Smith flight request": ("employee_request", "John Smith"),
+    "does Robert Johnson have a flight request": ("employee_request", "Robert Johnson"),
+    "count flight requests by status": ("employee_request_statistics", "count flight requests by status"),
+    "search flights from AEP on 2025-11-20": ("flight_search", "search flights from AEP on 2025-11-20"),
+    "find flights from jfk to lax on 2025-12-01": ("flight_search", "search flights from JFK to LAX on 2025-12-01"),
+}
+
+NOT_ROUTED = [
+    "check the pending flight request for my manager",
+    "book flight EI155 for request 4",
+    "search flights from AEP on 2025-13-40",
+    "find departures from CDG on specific date",
+    "find me a cheap flight to Paris next week",
+]
+
+
+def test_intent_router():
+    """Test that the example commands are routed to the right tool query and everything else goes to the LLM."""
+
+    print("🧪 Testing IntentRouter...")
+
+    router = IntentRouter(INTENTS)
+    for text, (intent_name, query) in ROUTED.items():
+        routed = router.match(text)
+        assert routed is not None, f"'{text}' should be routed"
+        intent, routed_query, _ = routed
+        assert (intent.name, routed_query) == (intent_name, query), f"'{text}' routed to {intent.name}: {routed_query}"
+    print(f"✅ Routed {len(ROUTED)} commands")
+
+    for text in NOT_ROUTED:
+        assert router.match(text) is None, f"'{text}' should fall back to the LLM"
+    assert router.stats()["unmatched"] == len(NOT_ROUTED)
+    print(f"✅ {len(NOT_ROUTED)} inputs left to the LLM")
+
+
+def agent_response(text: str) -> SendMessageResponse:
+    message = Message(role=Role.agent, parts=[Part(root=TextPart(text=text))], messageId="reply")
+    return SendMessageResponse(root=SendMessageSuccessResponse(id="1", result=message))
+
+
+async def test_routed_employee_requests():
+    """Test that routed employee queries are answered by the employee agent, and its ❌ replies fall back to the LLM."""
+
+    print("\n🧪 Testing routed queries against the employee agent...")
+
+    router = IntentRouter(INTENTS)
+    agent = EmployeeFlightRequestAgent()
+    for text, expected in (("check John Smith flight request", "✅ John Smith has a booked flight!"),
+                           ("flight status for Robert Johnson", "⏳ Robert Johnson has a pending flight request"),
+                           ("check pending flight requests", "⏳ PENDING FLIGHT REQUESTS")):
+        _, query, _ = router.match(text)
+        reply = tool_result_text(await agent.invoke(query))
+        assert reply is not None and reply.startswith(expected), f"'{text}' answered: {reply}"
+
+    _, query, _ = router.match("check Jane Nobody flight request")
+    not_found = await agent.invoke(query)
+    assert not_found.startswith("❌") and tool_result_text(not_found) is None
+    assert tool_result_text(agent_response(not_found)) is None, "❌ replies in A2A responses should fall back too"
+    assert tool_result_text(agent_response("  ")) is None
+    assert tool_result_text(agent_response("✅ John Smith has a booked flight!")) == "✅ John Smith has a booked flight!"
+
+    print("✅ Routed employee queries answered by the agent")
+
+
+class RecordingAirportAgent:
+    """A2A client stub that records the text sent to the airport knowledge base agent."""
+
+    def __init__(self):
+        self.queries = []
+
+    async def send_message_streaming(self, request, http_kwargs=None):
+        self.queries.append(request.params.message.parts[0].root.text)
+        reply = Message(role=Role.agent, parts=[Part(root=TextPart(text="Adolfo Suárez Madrid–Barajas Airport (MAD)"))],
+                        messageId="reply")
+        yield SendStreamingMessageResponse(root=SendStreamingMessageSuccessResponse(id="1", result=reply))
+
+
+async def test_routed_airport_query():
+    """Test that a routed airport lookup sends the agent only the place name."""
+
+    print("\n🧪 Testing the query sent for a routed airport lookup...")
+
+    registry = A2AAgentRegistry()
+    agent = RecordingAirportAgent()
+    registry.agents["airport_knowledge_base"]["client"] = agent
+    tool = AirportKnowledgeTool(registry)
+
+    router = IntentRouter(INTENTS)
+    for text in ("find airports in Madrid", "what airports are in Madrid?", "Madrid airport information"):
+        intent, query, _ = router.match(text)
+        reply = tool_result_text(await tool.ainvoke({"query": query}))
+        assert "Madrid–Barajas" in reply
+    assert agent.queries == ["Madrid", "Madrid", "Madrid"], agent.queries
+
+    print("✅ Airport lookups send the place name only")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_intent_router")
+    test_intent_router()
+    asyncio.run(test_routed_employee_requests())
+    asyncio.run(test_routed_airport_query())
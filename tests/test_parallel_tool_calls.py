@@ -0,0 +1,89 @@
+"""
+Test file for the chat agent's per-turn limit on parallel tool calls
+Run from dev_post/ directory as: python -m tests.test_parallel_tool_calls
+"""
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langgraph.prebuilt.tool_node import ToolCallRequest
+
+from chat_agent import ParallelToolCallLimiter
+
+
+def tool_calls(turn: AIMessage):
+    """One ToolCallRequest per tool call of a model turn, as the ToolNode hands them to its interceptor."""
+    return [ToolCallRequest(tool_call=tool_call, tool=None, state={"messages": [turn]}, runtime=None)
+            for tool_call in turn.tool_calls]
+
+
+def model_turn(turn_id: str, queries):
+    return AIMessage(content="", id=turn_id, tool_calls=[
+        {"name": "airport_knowledge_base", "args": {"query": query}, "id": f"{turn_id}-{i}"}
+        for i, query in enumerate(queries)
+    ])
+
+
+class StubTools:
+    """Executes tool calls slowly, failing those whose query is 'fail', and records how many run at once per turn."""
+
+    def __init__(self):
+        self.running = {}
+        self.max_running = {}
+
+    async def execute(self, request: ToolCallRequest) -> str:
+        turn = request.state["messages"][-1].id
+        self.running[turn] = self.running.get(turn, 0) + 1
+        self.max_running[turn] = max(self.max_running.get(turn, 0), self.running[turn])
+        try:
+            await asyncio.sleep(0.02)
+            if request.tool_call["args"]["query"] == "fail":
+                raise RuntimeError("airport knowledge base agent is down")
+            return request.tool_call["args"]["query"]
+        finally:
+            self.running[turn] -= 1
+
+
+async def test_parallel_tool_call_limit():
+    """Test that each turn runs at most max_parallel tool calls at once, independently of other turns."""
+
+    print("🧪 Testing ParallelToolCallLimiter...")
+
+    limiter = ParallelToolCallLimiter(max_parallel=2)
+    tools = StubTools()
+    first = model_turn("turn-1", ["Madrid", "Paris", "Rome", "Oslo", "Lima"])
+    second = model_turn("turn-2", ["Tokyo", "Seoul"])
+
+    results = await asyncio.gather(*(limiter(request, tools.execute) for request in tool_calls(first) + tool_calls(second)))
+
+    assert results == ["Madrid", "Paris", "Rome", "Oslo", "Lima", "Tokyo", "Seoul"]
+    assert tools.max_running == {"turn-1": 2, "turn-2": 2}, "Each turn should get its own max_parallel slots"
+    stats = limiter.stats()
+    assert stats["calls"] == 7 and stats["waited"] == 3 and stats["max_in_flight"] == 4 and stats["in_flight"] == 0
+
+    print(f"✅ Per-turn limit applied: {stats}")
+
+
+async def test_slot_released_on_failure():
+    """Test that a failing tool call gives its slot back, so the other calls of the turn still run."""
+
+    print("\n🧪 Testing slot release on tool failure...")
+
+    limiter = ParallelToolCallLimiter(max_parallel=1)
+    tools = StubTools()
+    turn = model_turn("turn-1", ["fail", "fail", "Madrid"])
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(limiter(request, tools.execute) for request in tool_calls(turn)), return_exceptions=True), 1
+    )
+
+    assert [type(result).__name__ for result in results] == ["RuntimeError", "RuntimeError", "str"]
+    assert results[2] == "Madrid" and tools.max_running == {"turn-1": 1}
+    assert limiter.stats()["in_flight"] == 0
+
+    print("✅ Failed calls released their slots")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_parallel_tool_calls")
+    asyncio.run(test_parallel_tool_call_limit())
+    asyncio.run(test_slot_released_on_failure())
@@ -0,0 +1,258 @@
+"""
+Test file for the flight search agent's push notification dispatcher
+Run from dev_post/ directory as: python -m tests.test_push_dispatcher
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import httpx
+
+from a2a.types import PushNotificationConfig, Task, TaskState, TaskStatus
+
+# push_dispatcher is imported by the flight search agent from its own directory.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flight_search_agent"))
+
+from push_config_store import SqlitePushNotifier
+from push_dispatcher import PushNotificationDispatcher, PushNotificationFilter
+
+
+class StubPushNotifier:
+    """Push notifier that knows a webhook for every task."""
+
+    async def get_info(self, task_id: str):
+        return PushNotificationConfig(url=f"http://webhook.test/{task_id}")
+
+    async def delete_info(self, task_id: str):
+        pass
+
+
+class Webhook:
+    """Records the notifications it receives; fails the first `failures` requests and holds requests while closed."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.received = []
+        self.open = asyncio.Event()
+        self.open.set()
+        self.active = {}
+        self.max_active_per_task = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        task = json.loads(request.content)
+        self.active[task["id"]] = self.active.get(task["id"], 0) + 1
+        self.max_active_per_task = max(self.max_active_per_task, self.active[task["id"]])
+        self.max_active = max(self.max_active, sum(self.active.values()))
+        try:
+            await self.open.wait()
+            await asyncio.sleep(0.01)
+            if self.failures:
+                self.failures -= 1
+                return httpx.Response(500)
+            self.received.append((task["id"], task["status"]["state"]))
+            return httpx.Response(200)
+        finally:
+            self.active[task["id"]] -= 1
+
+
+def new_dispatcher(webhook: Webhook, **kwargs) -> PushNotificationDispatcher:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(webhook))
+    return PushNotificationDispatcher(StubPushNotifier(), client, backoff_base=0, **kwargs)
+
+
+def new_test_task(task_id: str, state: TaskState) -> Task:
+    return Task(id=task_id, contextId="test-context", status=TaskStatus(state=state))
+
+
+async def test_coalescing():
+    """Test that states queued while a task's notification is in flight collapse into the latest one."""
+
+    print("🧪 Testing push notification coalescing...")
+
+    webhook = Webhook()
+    webhook.open.clear()
+    dispatcher = new_dispatcher(webhook)
+
+    await dispatcher.submit(new_test_task("1", TaskState.submitted))
+    await asyncio.sleep(0.01)
+    for state in (TaskState.working, TaskState.working, TaskState.input_required, TaskState.completed):
+        assert await dispatcher.submit(new_test_task("1", state))
+    webhook.open.set()
+    await dispatcher.aclose()
+
+    assert webhook.received == [("1", "submitted"), ("1", "completed")]
+    assert dispatcher.stats()["coalesced"] == 3
+
+    print(f"✅ Coalesced: {dispatcher.stats()}")
+
+
+async def test_one_in_flight_per_task():
+    """Test that each task has at most one notification in flight while different tasks are sent in parallel."""
+
+    print("\n🧪 Testing per-task in-flight limit...")
+
+    webhook = Webhook()
+    dispatcher = new_dispatcher(webhook, workers=4)
+
+    for state in (TaskState.submitted, TaskState.working, TaskState.completed):
+        for task_id in ("1", "2", "3"):
+            await dispatcher.submit(new_test_task(task_id, state))
+            await asyncio.sleep(0.005)
+    await dispatcher.aclose()
+
+    assert webhook.max_active_per_task == 1, "A task should never have two notifications in flight"
+    assert webhook.max_active > 1, "Different tasks should be delivered in parallel"
+    for task_id in ("1", "2", "3"):
+        states = [state for received_id, state in webhook.received if received_id == task_id]
+        assert states[-1] == "completed" and states == sorted(states, key=["submitted", "working", "completed"].index)
+
+    print("✅ One notification in flight per task, states in order")
+
+
+async def test_retries():
+    """Test that failed deliveries are retried and given up on after max_retries."""
+
+    print("\n🧪 Testing push notification retries...")
+
+    webhook = Webhook(failures=2)
+    dispatcher = new_dispatcher(webhook, max_retries=3)
+    await dispatcher.submit(new_test_task("1", TaskState.completed))
+    await dispatcher.aclose()
+    assert webhook.received == [("1", "completed")]
+    assert dispatcher.stats()["retries"] == 2 and dispatcher.stats()["delivered"] == 1
+
+    webhook = Webhook(failures=10)
+    dispatcher = new_dispatcher(webhook, max_retries=2)
+    await dispatcher.submit(new_test_task("1", TaskState.completed))
+    await dispatcher.aclose()
+    assert webhook.received == []
+    assert dispatcher.stats()["failed"] == 1 and dispatcher.stats()["retries"] == 2
+
+    print("✅ Retried and gave up as expected")
+
+
+async def test_full_queue():
+    """Test that a full queue drops intermediate states without blocking, and still delivers terminal ones."""
+
+    print("\n🧪 Testing full push notification queue...")
+
+    webhook = Webhook()
+    webhook.open.clear()
+    dispatcher = new_dispatcher(webhook, max_queue_size=1, workers=1)
+
+    await dispatcher.submit(new_test_task("1", TaskState.working))
+    await asyncio.sleep(0.01)
+    assert await dispatcher.submit(new_test_task("2", TaskState.working))
+    assert not await dispatcher.submit(new_test_task("3", TaskState.working)), "Intermediate states should be dropped"
+    assert await asyncio.wait_for(dispatcher.submit(new_test_task("4", TaskState.completed)), 0.1), \
+        "Terminal states should not wait for room in the queue"
+    assert await asyncio.wait_for(dispatcher.submit(new_test_task("1", TaskState.completed)), 0.1)
+    webhook.open.set()
+    await dispatcher.aclose()
+
+    assert sorted(webhook.received) == [("1", "completed"), ("1", "working"), ("2", "working"), ("4", "completed")]
+    stats = dispatcher.stats()
+    assert stats["dropped"] == 1 and stats["overflowed"] == 2 and stats["queued"] == 0
+
+    print(f"✅ Full queue handled: {stats}")
+
+
+async def test_restore_and_cleanup():
+    """Test that a persisted final notification is sent after a restart and its config and pending row are then deleted."""
+
+    print("\n🧪 Testing persisted push configs...")
+
+    webhook = Webhook()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(webhook))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "push.db")
+
+        before_restart = SqlitePushNotifier(client, db_path)
+        await before_restart.set_info("1", PushNotificationConfig(url="http://webhook.test/1", token="secret"))
+        await before_restart.save_pending(new_test_task("1", TaskState.completed))
+        before_restart.conn.close()
+
+        notifier = SqlitePushNotifier(client, db_path)
+        dispatcher = PushNotificationDispatcher(notifier, client, backoff_base=0)
+        await notifier.set_info("2", PushNotificationConfig(url="http://webhook.test/2"))
+        await dispatcher.submit(new_test_task("2", TaskState.working))
+        assert await dispatcher.restore() == 1
+        await dispatcher.aclose()
+
+        assert sorted(webhook.received) == [("1", "completed"), ("2", "working")]
+        stats = notifier.stats()
+        assert stats["pending_notifications"] == 0
+        assert stats["persisted_configs"] == 1 and stats["cached_configs"] == 1, \
+            "Only the config of the task that has not finished should be kept"
+        assert await notifier.get_info("1") is None
+        notifier.conn.close()
+
+    print(f"✅ Restored and cleaned up: {stats}")
+
+
+async def test_tasks_without_config():
+    """Test that final states of tasks nobody subscribed to are not persisted, and stale pending rows are dropped."""
+
+    print("\n🧪 Testing tasks without a push config...")
+
+    webhook = Webhook()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(webhook))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        notifier = SqlitePushNotifier(client, os.path.join(tmp_dir, "push.db"))
+        dispatcher = PushNotificationDispatcher(notifier, client, backoff_base=0)
+        for task_id in ("1", "2", "3", "4", "5"):
+            await dispatcher.submit(new_test_task(task_id, TaskState.completed))
+        await dispatcher.aclose()
+        assert notifier.stats()["pending_notifications"] == 0, "Tasks without a config should leave no pending rows"
+
+        await notifier.save_pending(new_test_task("6", TaskState.completed))
+        dispatcher = PushNotificationDispatcher(notifier, client, backoff_base=0)
+        assert await dispatcher.restore() == 1
+        await dispatcher.aclose()
+        assert notifier.stats()["pending_notifications"] == 0, "A pending row without a config should be dropped"
+        assert await dispatcher.restore() == 0
+        assert webhook.received == []
+        notifier.conn.close()
+
+    print("✅ Nothing kept for tasks without a push config")
+
+
+async def test_filter_expiry():
+    """Test that filters are dropped when their task finishes or stops sending states for filter_ttl seconds."""
+
+    print("\n🧪 Testing notification filter expiry...")
+
+    webhook = Webhook()
+    dispatcher = new_dispatcher(webhook, filter_ttl=0.1)
+    only_final = PushNotificationFilter(states={TaskState.completed})
+    for task_id in ("done", "canceled-early", "active"):
+        dispatcher.set_filter(task_id, only_final)
+
+    await dispatcher.submit(new_test_task("done", TaskState.completed))
+    assert dispatcher.stats()["filters"] == 2, "A finished task's filter should be dropped"
+
+    for _ in range(3):
+        await asyncio.sleep(0.05)
+        await dispatcher.submit(new_test_task("active", TaskState.working))
+    dispatcher.set_filter("new", only_final)
+    assert dispatcher.stats()["filters"] == 2 and dispatcher.stats()["filters_expired"] == 1, \
+        "Only the filter of the task that stopped sending states should expire"
+    await dispatcher.aclose()
+
+    assert webhook.received == [("done", "completed")] and dispatcher.stats()["filtered"] == 3
+
+    print(f"✅ Filters expired: {dispatcher.stats()}")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_push_dispatcher")
+    asyncio.run(test_coalescing())
+    asyncio.run(test_one_in_flight_per_task())
+    asyncio.run(test_retries())
+    asyncio.run(test_full_queue())
+    asyncio.run(test_restore_and_cleanup())
+    asyncio.run(test_tasks_without_config())
+    asyncio.run(test_filter_expiry())
@@ -0,0 +1,107 @@
+"""
+Test file for the flight search push payload shared by the flight search agent and the chat agent's webhook
+Run from dev_post/ directory as: python -m tests.test_push_payload
+"""
+import json
+import os
+import time
+
+from a2a.types import DataPart, Message, Role, Task, TaskState, TaskStatus
+
+from common.push_payload import (
+    PAYLOAD_VERSION,
+    PushPayloadError,
+    build_flight_search_payload,
+    loads,
+    read_flight_search_payload,
+)
+
+
+SEARCH_RESULT = json.dumps({
+    "search_info": {"iata_code": "AEP", "date": "2025-11-20", "type": "departure", "total_flights": 10},
+    "flights": [{"airline": {"name": "Aerolineas Argentinas", "iata_code": "AR"},
+                 "flight": {"number": str(1300 + i), "iata_number": f"AR{1300 + i}"}} for i in range(10)],
+}, indent=2)
+
+
+def notification(payload, history_size: int = 20, state: TaskState = TaskState.completed) -> bytes:
+    """Body of a push notification, serialized the way the push dispatcher sends it."""
+    history = [Message(role=Role.user, parts=[{"kind": "text", "text": f"message {i}"}], messageId=f"m{i}")
+               for i in range(history_size)]
+    history.append(Message(role=Role.agent, parts=[DataPart(data=payload)], messageId="result"))
+    task = Task(id="t1", contextId="c1", status=TaskStatus(state=state), history=history)
+    return json.dumps(task.model_dump(mode="json", exclude_none=True)).encode()
+
+
+def test_push_payload():
+    """Test that a search result survives the round trip as structured data in one decode."""
+
+    print("🧪 Testing flight search push payload...")
+
+    payload = build_flight_search_payload("t1", "c1", SEARCH_RESULT)
+    assert payload["version"] == PAYLOAD_VERSION and len(payload["flights"]) == 10
+    read = read_flight_search_payload(loads(notification(payload)))
+    assert read == payload, "The webhook should read back exactly what the agent sent"
+    print("✅ Flights read from the DataPart")
+
+    empty = build_flight_search_payload("t2", "c1", "📭 No departure flights found for AEP on 2025-11-20")
+    assert empty["flights"] == [] and empty["message"].startswith("📭")
+
+    assert payload["error"] is None and empty["error"] is None
+    failed = build_flight_search_payload("t3", "c1", "❌ Error occurred during flight search: timed out", error="timed out")
+    assert failed["flights"] == [] and failed["error"] == "timed out" and failed["message"].startswith("❌")
+    assert read_flight_search_payload(loads(notification(failed, state=TaskState.failed))) == failed
+
+    for bad in ({**payload, "version": PAYLOAD_VERSION + 1}, {"kind": "something_else"}):
+        try:
+            read_flight_search_payload(loads(notification(bad)))
+            raise AssertionError("Unknown payloads should be rejected")
+        except PushPayloadError:
+            pass
+    print("✅ Empty results, errors, newer versions and unknown payloads handled")
+
+    body = notification(payload)
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        read_flight_search_payload(loads(body))
+    fast = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        Task.model_validate_json(body)
+    validated = (time.perf_counter() - start) / rounds
+    print(f"✅ Decode: {fast * 1e6:.0f} µs per notification, {validated * 1e6:.0f} µs with Task validation")
+
+
+def test_webhook_reports_errors():
+    """Test that the chat agent's webhook reports failed searches instead of rejecting their notifications."""
+
+    print("\n🧪 Testing flight findings webhook with a failed search...")
+
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+    from fastapi.testclient import TestClient
+
+    from chat_agent import FLIGHTS_ENDPOINT_PATH, ReactChatAgent
+
+    agent = ReactChatAgent()
+    client = TestClient(agent.app)
+
+    failed = build_flight_search_payload("t1", "c1", "❌ Error occurred during flight search: timed out", error="timed out")
+    response = client.post(FLIGHTS_ENDPOINT_PATH, content=notification(failed, state=TaskState.failed))
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "error" and response.json()["error"] == "timed out"
+
+    found = build_flight_search_payload("t1", "c1", SEARCH_RESULT)
+    response = client.post(FLIGHTS_ENDPOINT_PATH, content=notification(found))
+    assert response.json()["flights_count"] == 10 and agent.external_message_queue.qsize() == 1
+
+    response = client.post(FLIGHTS_ENDPOINT_PATH, content=notification({"kind": "something_else"}))
+    assert response.status_code == 400, "Completed tasks without a payload should still be rejected"
+
+    print("✅ Failed search reported, results queued")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_push_payload")
+    test_push_payload()
+    test_webhook_reports_errors()
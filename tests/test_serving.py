@@ -0,0 +1,134 @@
+"""
+Test file for the serving helpers shared by the A2A agents
+Run from dev_post/ directory as: python -m tests.test_serving
+"""
+import contextlib
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from common.serving import RUN_DIR_ENV, add_lifespan_hooks, shared_db_path
+
+
+def test_add_lifespan_hooks():
+    """Test that hooks run around the app's own lifespan and a failing shutdown hook does not skip the others."""
+
+    print("🧪 Testing add_lifespan_hooks...")
+
+    calls = []
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        calls.append("lifespan start")
+        yield
+        calls.append("lifespan stop")
+
+    async def close_store():
+        calls.append("close store")
+
+    def broken_hook():
+        raise RuntimeError("shutdown failed")
+
+    app = Starlette(lifespan=lifespan)
+    add_lifespan_hooks(app, startup=[lambda: calls.append("restore")], shutdown=[close_store, broken_hook])
+    add_lifespan_hooks(app, shutdown=[lambda: calls.append("close client")])
+
+    with TestClient(app):
+        assert calls == ["restore", "lifespan start"]
+    assert calls == ["restore", "lifespan start", "lifespan stop", "close store", "close client"]
+
+    print("✅ Lifespan hooks ran in order")
+
+
+def test_shared_db_path():
+    """Test that sqlite files are only shared across workers, in the configured path or this run's directory."""
+
+    print("\n🧪 Testing shared_db_path...")
+
+    os.environ.pop(RUN_DIR_ENV, None)
+    os.environ["TEST_SHARED_DB_PATH"] = "/data/tasks.db"
+    try:
+        assert shared_db_path("TEST_SHARED_DB_PATH", "tasks.db", 1) == "/data/tasks.db"
+        assert shared_db_path("TEST_SHARED_DB_PATH", "tasks.db", 4) == "/data/tasks.db"
+    finally:
+        del os.environ["TEST_SHARED_DB_PATH"]
+    assert shared_db_path("TEST_SHARED_DB_PATH", "tasks.db", 1) is None
+
+    path = shared_db_path("TEST_SHARED_DB_PATH", "tasks.db", 4)
+    run_dir = os.environ.pop(RUN_DIR_ENV)
+    assert path == os.path.join(run_dir, "tasks.db") and os.path.isdir(run_dir)
+    os.rmdir(run_dir)
+
+    print("✅ Shared paths resolved as expected")
+
+
+SERVER_SCRIPT = textwrap.dedent("""
+    import sys
+
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    from common.serving import serve, shared_db_path, worker_id
+
+    def create_app():
+        path = shared_db_path("TEST_SHARED_DB_PATH", "tasks.db", 2)
+        open(path, "a").close()
+        info = {"worker": worker_id(), "path": path}
+        return Starlette(routes=[Route("/", lambda request: JSONResponse(info))])
+
+    serve(create_app, "127.0.0.1", int(sys.argv[1]), workers=2)
+""")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_workers():
+    """Test that forked workers share one socket and one run directory, which is removed on shutdown."""
+
+    print("\n🧪 Testing serve with two workers...")
+
+    port = free_port()
+    env = {key: value for key, value in os.environ.items() if key != RUN_DIR_ENV}
+    server = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, str(port)], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        responses = []
+        deadline = time.monotonic() + 15
+        while len({response["worker"] for response in responses}) < 2 and time.monotonic() < deadline:
+            try:
+                responses.append(httpx.get(f"http://127.0.0.1:{port}/", headers={"Connection": "close"}).json())
+            except httpx.TransportError:
+                time.sleep(0.1)
+        assert {response["worker"] for response in responses} == {0, 1}, "Both workers should accept connections"
+        paths = {response["path"] for response in responses}
+        assert len(paths) == 1, "Workers should open the same sqlite file"
+        run_dir = os.path.dirname(paths.pop())
+        assert os.path.isdir(run_dir)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        exit_code = server.wait(timeout=15)
+
+    assert exit_code == 0, f"serve should exit cleanly on SIGTERM, got {exit_code}"
+    assert not os.path.exists(run_dir), "The run directory should be removed on shutdown"
+
+    print("✅ Both workers served from one run directory, removed on shutdown")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_serving")
+    test_add_lifespan_hooks()
+    test_shared_db_path()
+    test_serve_workers()
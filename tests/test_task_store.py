@@ -0,0 +1,137 @@
+"""
+Test file for the bounded task stores shared by the A2A agents
+Run from dev_post/ directory as: python -m tests.test_task_store
+"""
+import asyncio
+import os
+import tempfile
+
+from a2a.types import Task, TaskState, TaskStatus
+
+from common.task_store import BoundedTaskStore, SqliteTaskStore, create_task_store
+
+
+def new_test_task(task_id: str, state: TaskState) -> Task:
+    return Task(id=task_id, contextId="test-context", status=TaskStatus(state=state))
+
+
+async def test_bounded_task_store():
+    """Test LRU eviction of terminal tasks and TTL expiry."""
+
+    print("🧪 Testing BoundedTaskStore...")
+
+    store = BoundedTaskStore(ttl_seconds=0.2, max_entries=3)
+    for i in range(5):
+        state = TaskState.completed if i % 2 == 0 else TaskState.working
+        await store.save(new_test_task(str(i), state))
+
+    assert list(store.tasks) == ["1", "3", "4"], "Oldest terminal tasks should be evicted first"
+    assert store.stats()["evicted"] == 2
+
+    await asyncio.sleep(0.3)
+    assert await store.get("1") is None, "Tasks older than the TTL should expire"
+
+    print(f"✅ BoundedTaskStore stats: {store.stats()}")
+
+
+async def test_sqlite_task_store():
+    """Test that tasks evicted from memory or written before a restart are read back from sqlite."""
+
+    print("\n🧪 Testing SqliteTaskStore...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "tasks.db")
+
+        store = SqliteTaskStore(db_path, max_entries=2, batch_size=3, flush_interval=0.05)
+        for i in range(5):
+            await store.save(new_test_task(str(i), TaskState.completed))
+        await store.flush()
+
+        assert store.stats()["persisted"] == 5
+        assert (await store.get("0")).id == "0", "Evicted tasks should be read back from sqlite"
+        await store.aclose()
+
+        restarted = SqliteTaskStore(db_path)
+        assert (await restarted.get("4")).status.state == TaskState.completed
+
+        print(f"✅ SqliteTaskStore stats: {restarted.stats()}")
+
+
+async def test_shared_sqlite_task_store():
+    """Test that worker processes sharing a file see each other's updates to running tasks."""
+
+    print("\n🧪 Testing shared SqliteTaskStore...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "tasks.db")
+
+        worker_a = SqliteTaskStore(db_path, shared=True)
+        worker_b = SqliteTaskStore(db_path, shared=True)
+
+        await worker_a.save(new_test_task("1", TaskState.working))
+        assert (await worker_b.get("1")).status.state == TaskState.working
+
+        await worker_b.save(new_test_task("1", TaskState.completed))
+        assert (await worker_a.get("1")).status.state == TaskState.completed, "Running tasks should be re-read from sqlite"
+
+        print(f"✅ Shared SqliteTaskStore stats: {worker_a.stats()}")
+
+
+async def test_sqlite_purge():
+    """Test that the sqlite table is held to the cache's TTL and size bound as tasks are written."""
+
+    print("\n🧪 Testing SqliteTaskStore purge...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SqliteTaskStore(os.path.join(tmp_dir, "tasks.db"), ttl_seconds=0.2, max_entries=3, purge_interval=0)
+        for i in range(6):
+            state = TaskState.completed if i % 2 == 0 else TaskState.working
+            await store.save(new_test_task(str(i), state))
+        await store.flush()
+        assert store.stats()["persisted"] == 3 and store.stats()["purged"] == 3
+        assert all([await store.get(task_id) is None for task_id in ("0", "2", "4")]), \
+            "The oldest terminal rows over max_entries should be purged"
+        assert (await store.get("1")).status.state == TaskState.working, "Running tasks should not be purged"
+
+        await asyncio.sleep(0.3)
+        await store.save(new_test_task("6", TaskState.working))
+        await store.flush()
+        assert store.stats()["persisted"] == 1, "Rows older than the TTL should be purged on the next flush"
+
+        shared = SqliteTaskStore(os.path.join(tmp_dir, "shared.db"), max_entries=1, shared=True, purge_interval=0)
+        for i in range(3):
+            await shared.save(new_test_task(str(i), TaskState.completed))
+        assert shared.stats()["persisted"] == 1, "Shared stores should purge as they write"
+
+        print(f"✅ SqliteTaskStore purge stats: {store.stats()}")
+
+
+def test_create_task_store():
+    """Test that a file store only writes through when several workers share it."""
+
+    print("\n🧪 Testing create_task_store...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["TASK_STORE_PATH"] = os.path.join(tmp_dir, "tasks.db")
+        try:
+            single_worker = create_task_store(os.getenv("TASK_STORE_PATH"), shared=False)
+            workers = create_task_store(os.path.join(tmp_dir, "shared.db"), shared=True)
+            from_env = create_task_store()
+        finally:
+            del os.environ["TASK_STORE_PATH"]
+        assert isinstance(single_worker, SqliteTaskStore) and not single_worker.shared, \
+            "A single worker should batch its writes"
+        assert workers.shared and workers.db_path.endswith("shared.db")
+        assert isinstance(from_env, SqliteTaskStore) and not from_env.shared
+        assert type(create_task_store()) is BoundedTaskStore
+
+    print("✅ Task stores built as expected")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_task_store")
+    asyncio.run(test_bounded_task_store())
+    asyncio.run(test_sqlite_task_store())
+    asyncio.run(test_shared_sqlite_task_store())
+    asyncio.run(test_sqlite_purge())
+    test_create_task_store()
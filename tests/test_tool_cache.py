@@ -0,0 +1,97 @@
+"""
+Test file for the chat agent's tool-result cache
+Run from dev_post/ directory as: python -m tests.test_tool_cache
+"""
+import asyncio
+
+from chat_agent import ToolResultCache
+
+
+async def test_tool_result_cache():
+    """Test hits on normalized queries, shared in-flight calls, TTLs, size bound and invalidation."""
+
+    print("🧪 Testing ToolResultCache...")
+
+    cache = ToolResultCache({"airport_knowledge_base": 60, "employee_flight_requests": 0.05, "flight_search": 0}, max_entries=2)
+    calls = []
+
+    def agent_call(tool_name: str, query: str, result: str = None):
+        async def call():
+            calls.append((tool_name, query))
+            await asyncio.sleep(0.01)
+            return result or f"{tool_name}: {query}"
+        return call
+
+    first, second = await asyncio.gather(
+        cache.get_or_call("airport_knowledge_base", "Madrid", agent_call("airport_knowledge_base", "Madrid")),
+        cache.get_or_call("airport_knowledge_base", "  madrid ", agent_call("airport_knowledge_base", "madrid")),
+    )
+    assert first == second and len(calls) == 1, "Concurrent calls for the same query should share one A2A request"
+    await cache.get_or_call("airport_knowledge_base", "MADRID", agent_call("airport_knowledge_base", "MADRID"))
+    assert len(calls) == 1, "Normalized repeats should be served from the cache"
+    print("✅ Repeated and concurrent queries served by one call")
+
+    await cache.get_or_call("flight_search", "AEP", agent_call("flight_search", "AEP"))
+    await cache.get_or_call("flight_search", "AEP", agent_call("flight_search", "AEP"))
+    assert calls.count(("flight_search", "AEP")) == 2, "Tools without a TTL should not be cached"
+
+    await cache.get_or_call("employee_flight_requests", "pending", agent_call("employee_flight_requests", "pending"))
+    await asyncio.sleep(0.06)
+    await cache.get_or_call("employee_flight_requests", "pending", agent_call("employee_flight_requests", "pending"))
+    assert calls.count(("employee_flight_requests", "pending")) == 2, "Expired entries should be refreshed"
+
+    await cache.get_or_call("airport_knowledge_base", "Tokyo", agent_call("airport_knowledge_base", "Tokyo", "❌ Error"))
+    await cache.get_or_call("airport_knowledge_base", "Tokyo", agent_call("airport_knowledge_base", "Tokyo"))
+    assert calls.count(("airport_knowledge_base", "Tokyo")) == 2, "Errors should not be cached"
+    assert cache.stats()["entries"] <= 2, "The cache should stay within max_entries"
+
+    cache.invalidate("airport_knowledge_base")
+    assert not any(key[0] == "airport_knowledge_base" for key in cache._entries)
+
+    stats = cache.stats()
+    assert stats["tools"]["airport_knowledge_base"]["hit_rate"] > 0
+    print(f"✅ Stats: {stats}")
+
+
+async def test_cancelled_caller():
+    """Test that cancelling the call that started a shared request does not cancel it for the other callers."""
+
+    print("\n🧪 Testing cancellation of a shared tool call...")
+
+    cache = ToolResultCache({"airport_knowledge_base": 60})
+    calls = []
+
+    async def call():
+        calls.append("Madrid")
+        await asyncio.sleep(0.05)
+        return "MAD"
+
+    owner = asyncio.create_task(cache.get_or_call("airport_knowledge_base", "Madrid", call))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(cache.get_or_call("airport_knowledge_base", "madrid", call))
+    await asyncio.sleep(0.01)
+    owner.cancel()
+
+    assert await waiter == "MAD", "Other callers should still get the result"
+    assert owner.cancelled()
+    assert await cache.get_or_call("airport_knowledge_base", "MADRID", call) == "MAD" and calls == ["Madrid"], \
+        "The result should still be cached"
+
+    async def failing_call():
+        raise RuntimeError("agent down")
+
+    for _ in range(2):
+        try:
+            await cache.get_or_call("airport_knowledge_base", "Oslo", failing_call)
+            raise AssertionError("Errors should reach the caller")
+        except RuntimeError:
+            pass
+    assert cache.stats()["in_flight"] == 0 and cache.stats()["entries"] == 1
+
+    print("✅ Shared call survived the cancelled caller")
+
+
+if __name__ == "__main__":
+    print("💡 Run from dev_post/ directory as: python -m tests.test_tool_cache")
+    asyncio.run(test_tool_result_cache())
+    asyncio.run(test_cancelled_caller())